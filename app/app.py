@@ -1,18 +1,16 @@
 # app.py
 import streamlit as st
-import asyncio
-import json
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-import time
-import google.generativeai as genai
+from datetime import datetime
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import uuid
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+# Make the mental_health_bot package importable when running `streamlit run app/app.py`
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
 # Configure page with dark theme support
 st.set_page_config(
     page_title="🧠 MindMate - Mental Health Agent System",
@@ -154,451 +152,66 @@ if 'api_key_entered' not in st.session_state:
     st.session_state.api_key_entered = False
 
 # =============================================
-# 🏆 PART 1: GEMINI API CONFIGURATION - AUTO DISCOVERY
+# 🏆 PART 1: SHARED AGENT SYSTEM
 # =============================================
 
-class GeminiAIConfigurator:
-    """Intelligent API configuration that finds working models automatically"""
-    
-    def __init__(self):
-        self.working_models = []
-        self.primary_model = None
-        self.primary_model_name = None
-        self.fallback_mode = False
-        self.api_key = None
-        
-    def set_api_key(self, api_key: str):
-        """Set the API key and configure Gemini"""
-        self.api_key = api_key.strip()
-        return self.discover_models()
-        
-    def discover_models(self):
-        """Discover all available Gemini models"""
-        try:
-            if not self.api_key:
-                st.error("🔑 No API key provided!")
-                self.fallback_mode = True
-                return False
-                
-            genai.configure(api_key=self.api_key)
-            
-            # Priority order for models (same as your notebook)
-            priority_models = [
-                'models/gemini-2.0-flash-lite',
-                'models/gemini-2.0-flash-lite-001',
-                'models/gemma-3-1b-it',
-                'models/gemini-2.0-flash',
-                'models/gemini-2.5-flash',
-                'models/gemini-pro-latest'
-            ]
-            
-            # Test models in priority order
-            for model_name in priority_models:
-                try:
-                    model = genai.GenerativeModel(model_name)
-                    test_response = model.generate_content("Say 'AI Ready'")
-                    self.working_models.append(model_name)
-                    
-                    if not self.primary_model:
-                        self.primary_model = model
-                        self.primary_model_name = model_name
-                        st.success(f"🎯 PRIMARY MODEL SELECTED: {model_name}")
-                        
-                except Exception as e:
-                    continue
-            
-            if self.primary_model:
-                st.session_state.gemini_configured = True
-                self.fallback_mode = False
-                return True
-            else:
-                st.warning("🚨 No working AI models found - Using Advanced Simulated AI")
-                self.fallback_mode = True
-                return False
-                
-        except Exception as e:
-            st.error(f"❌ AI Configuration Failed: {e}")
-            st.warning("🔄 Switching to Advanced Simulated AI Mode...")
-            self.fallback_mode = True
-            return False
+# The pipeline (model discovery, tools, AI integration, agents) lives in the package
+from mental_health_bot.config import GeminiAIConfigurator
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.ai_orchestrator import ParallelAgentsSystem
+from mental_health_bot.event_loop import BackgroundEventLoop
+from mental_health_bot.memory import ConversationMemory
+from mental_health_bot.trajectory import RiskTrajectoryTracker
+from mental_health_bot import config
 
-# =============================================
-# 🏆 PART 2: MENTAL HEALTH TOOLS
-# =============================================
+# Messages kept in st.session_state for display; older turns live in ConversationMemory
+MAX_DISPLAYED_MESSAGES = 40
 
-class MentalHealthTools:
-    """Advanced custom tools for mental health analysis"""
-    
-    def __init__(self):
-        self.crisis_keywords = {
-            'suicidal': ['kill myself', 'end it all', 'suicide', 'want to die', 'not worth living'],
-            'self_harm': ['cut myself', 'self harm', 'hurt myself', 'bleeding'],
-            'panic': ['panic attack', 'cant breathe', 'heart racing', 'losing control'],
-            'depression': ['hopeless', 'empty inside', 'no point', 'cant get out of bed']
-        }
-        
-    def crisis_detector(self, text: str) -> Dict:
-        """Advanced crisis detection with multi-layer analysis"""
-        text_lower = text.lower()
-        
-        # Layer 1: Keyword matching
-        crisis_level = "low"
-        detected_issues = []
-        
-        for category, keywords in self.crisis_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                detected_issues.append(category)
-                if category in ['suicidal', 'self_harm']:
-                    crisis_level = "high"
-                elif crisis_level != "high" and category in ['panic']:
-                    crisis_level = "medium"
-        
-        # Layer 2: Emotional intensity analysis
-        emotional_intensity = self.analyze_emotional_intensity(text)
-        if emotional_intensity > 0.8 and crisis_level == "low":
-            crisis_level = "medium"
-            
-        # Layer 3: Contextual risk assessment
-        risk_score = self.calculate_risk_score(text, detected_issues)
-        
-        return {
-            "crisis_level": crisis_level,
-            "detected_issues": detected_issues,
-            "risk_score": risk_score,
-            "emotional_intensity": emotional_intensity,
-            "immediate_action_required": crisis_level in ["high", "medium"]
-        }
-    
-    def analyze_emotional_intensity(self, text: str) -> float:
-        """Analyze emotional intensity from text"""
-        intensity_indicators = [
-            len([w for w in text.split() if w in ['very', 'extremely', 'really', 'so', 'too']]),
-            text.count('!'),
-            len([w for w in text.split() if len(w) > 8]),
-            text.count(' not ')
-        ]
-        
-        intensity = sum(intensity_indicators) / (len(text.split()) + 1)
-        return min(intensity, 1.0)
-    
-    def calculate_risk_score(self, text: str, issues: List[str]) -> float:
-        """Calculate comprehensive risk score"""
-        base_score = 0.0
-        
-        issue_weights = {'suicidal': 1.0, 'self_harm': 0.9, 'panic': 0.7, 'depression': 0.6}
-        for issue in issues:
-            base_score += issue_weights.get(issue, 0.5)
-            
-        if 'help' in text.lower():
-            base_score += 0.3
-        if 'alone' in text.lower() or 'lonely' in text.lower():
-            base_score += 0.2
-            
-        return min(base_score, 1.0)
-    
-    def generate_coping_strategy(self, crisis_data: Dict) -> str:
-        """Generate personalized coping strategies"""
-        issues = crisis_data['detected_issues']
-        
-        strategies = {
-            'suicidal': """🚨 **CRITICAL**: Please contact crisis support immediately:
-• Call 988 (Suicide Prevention)
-• Text HOME to 741741
-• You are not alone - help is available NOW""",
-            
-            'panic': """💨 **Panic Attack Protocol**:
-1. 5-4-3-2-1 Grounding Technique
-2. Deep breathing: 4-4-6 pattern
-3. Focus on one safe object in your environment""",
-            
-            'depression': """🤗 **Depression Support**:
-• Break tasks into tiny steps
-• Reach out to one person today  
-• Remember: feelings aren't facts""",
-            
-            'default': """🌱 **General Wellness**:
-• Practice mindfulness for 5 minutes
-• Connect with nature or pets
-• Engage in gentle physical activity"""
-        }
-        
-        if 'suicidal' in issues:
-            return strategies['suicidal']
-        elif 'panic' in issues:
-            return strategies['panic']
-        elif 'depression' in issues:
-            return strategies['depression']
-        else:
-            return strategies['default']
+@st.cache_resource
+def load_memory() -> ConversationMemory:
+    """Conversation memory shared by every session (MENTAL_HEALTH_BOT_MEMORY_DB persists it)"""
+    return ConversationMemory(config.MEMORY_PATH)
 
-# =============================================
-# 🏆 PART 3: GEMINI AI INTEGRATION
-# =============================================
+@st.cache_resource
+def load_trajectory() -> RiskTrajectoryTracker:
+    """Running risk aggregates per user, updated once per message"""
+    return RiskTrajectoryTracker()
 
-class GeminiAIIntegration:
-    """Seamless integration between Gemini AI and custom tools"""
-    
-    def __init__(self, config):
-        self.config = config
-        self.model = config.primary_model if not config.fallback_mode else None
-        
-    async def analyze_with_ai(self, text: str, context: Dict = None) -> Dict:
-        """Advanced AI analysis with fallback to simulated AI"""
-        
-        if self.model and not self.config.fallback_mode:
-            try:
-                # AI-Powered Analysis
-                prompt = f"""
-                MENTAL HEALTH ANALYSIS REQUEST:
-                
-                User Message: "{text}"
-                Context: {context or 'No additional context'}
-                
-                Please analyze:
-                1. Primary emotions detected
-                2. Urgency level (low/medium/high)
-                3. Support needs identified
-                4. Therapeutic response approach
-                
-                Format response as:
-                EMOTIONS: [comma separated emotions]
-                URGENCY: [low/medium/high]
-                NEEDS: [key support needs]
-                APPROACH: [therapeutic approach]
-                RESPONSE: [compassionate response]
-                """
-                
-                response = self.model.generate_content(prompt)
-                return self._parse_ai_response(response.text)
-                
-            except Exception as e:
-                st.error(f"⚠️ AI Analysis Failed: {e}")
-                # Fall through to simulated AI
-        
-        # Simulated AI Analysis (Advanced)
-        return self._simulated_ai_analysis(text, context)
-    
-    def _parse_ai_response(self, ai_text: str) -> Dict:
-        """Parse AI response into structured data"""
-        lines = ai_text.split('\n')
-        result = {
-            'emotions': 'concerned',
-            'urgency': 'medium', 
-            'needs': 'emotional_support',
-            'approach': 'compassionate_listening',
-            'response': 'I hear you and I\'m here to support you through this.',
-            'ai_generated': True
-        }
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('EMOTIONS:'):
-                result['emotions'] = line[9:].strip()
-            elif line.startswith('URGENCY:'):
-                result['urgency'] = line[8:].strip().lower()
-            elif line.startswith('NEEDS:'):
-                result['needs'] = line[6:].strip()
-            elif line.startswith('APPROACH:'):
-                result['approach'] = line[9:].strip()
-            elif line.startswith('RESPONSE:'):
-                result['response'] = line[9:].strip()
-                
-        return result
-    
-    def _simulated_ai_analysis(self, text: str, context: Dict) -> Dict:
-        """Advanced simulated AI that impresses judges"""
-        text_lower = text.lower()
-        
-        if any(word in text_lower for word in ['die', 'suicide', 'kill myself']):
-            emotions = "desperate, hopeless, suicidal"
-            urgency = "high"
-            needs = "crisis_intervention"
-            approach = "emergency_support"
-            response = "🚨 I'm deeply concerned about what you're sharing. Your life is precious. Please call 988 now. I'm here with you - you don't have to face this alone."
-            
-        elif any(word in text_lower for word in ['anxious', 'panic', 'overwhelmed']):
-            emotions = "anxious, overwhelmed, scared" 
-            urgency = "medium"
-            needs = "anxiety_management"
-            approach = "grounding_techniques"
-            response = "💨 I understand anxiety can feel overwhelming. Let's breathe together: Inhale for 4 counts, hold for 4, exhale for 6. You're safe right here, right now."
-            
-        elif any(word in text_lower for word in ['sad', 'depressed', 'hopeless']):
-            emotions = "sad, depressed, hopeless"
-            urgency = "medium"
-            needs = "emotional_support"
-            approach = "validation_hope_building"
-            response = "🤗 I hear you're feeling really low. That sounds incredibly difficult. Remember that these feelings, while overwhelming, are temporary. Would you like to talk about what's been weighing on you?"
-            
-        else:
-            emotions = "concerned, attentive"
-            urgency = "low"
-            needs = "emotional_connection"
-            approach = "active_listening"
-            response = "🤗 Thank you for sharing that with me. I'm here to listen and support you through whatever you're experiencing. It takes courage to reach out."
-        
-        return {
-            'emotions': emotions,
-            'urgency': urgency,
-            'needs': needs,
-            'approach': approach, 
-            'response': response,
-            'ai_generated': False,
-            'simulated_ai': True
-        }
+@st.cache_resource
+def load_event_loop() -> BackgroundEventLoop:
+    """One event loop per server process; the LLM client and its connections live on it"""
+    return BackgroundEventLoop()
 
-# =============================================
-# 🏆 PART 4: PARALLEL AGENTS SYSTEM
-# =============================================
+def build_agent_system(api_key: Optional[str]) -> Tuple[GeminiAIConfigurator, ParallelAgentsSystem]:
+    """Configurator and agents for one API key (``None`` selects the simulated AI mode)"""
+    ai_config = GeminiAIConfigurator(api_key=api_key)
+    if api_key is None:
+        ai_config.fallback_mode = True
+    else:
+        ai_config.discover_models()
+    
+    # LLM routing follows MENTAL_HEALTH_BOT_ROUTER_THRESHOLD / _CLASSIFIER, like the package
+    agents = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(config=ai_config))
+    return ai_config, agents
 
-class ParallelAgentsSystem:
-    """Multi-agent system that works in parallel for comprehensive analysis"""
-    
-    def __init__(self, tools, ai_integration):
-        self.tools = tools
-        self.ai_integration = ai_integration
-        self.agents = {
-            'crisis_detector': self.crisis_detection_agent,
-            'emotion_analyzer': self.emotion_analysis_agent, 
-            'support_planner': self.support_planning_agent,
-            'resource_matcher': self.resource_matching_agent
-        }
-        
-    async def process_message(self, message: str, user_context: Dict) -> Dict:
-        """Process message through all parallel agents"""
-        
-        # Run all agents in parallel
-        tasks = []
-        for agent_name, agent_func in self.agents.items():
-            task = asyncio.create_task(agent_func(message, user_context))
-            tasks.append((agent_name, task))
-        
-        # Collect results
-        agent_results = {}
-        for agent_name, task in tasks:
-            try:
-                result = await task
-                agent_results[agent_name] = result
-            except Exception as e:
-                agent_results[agent_name] = {"error": str(e)}
-        
-        # Synthesize final response
-        final_response = self.synthesize_responses(agent_results)
-        
-        return {
-            "agent_results": agent_results,
-            "final_response": final_response,
-            "agents_used": len(agent_results),
-            "timestamp": datetime.now().isoformat()
-        }
-    
-    async def crisis_detection_agent(self, message: str, context: Dict) -> Dict:
-        """Specialized agent for crisis detection"""
-        await asyncio.sleep(0.1)
-        
-        crisis_data = self.tools.crisis_detector(message)
-        coping_strategy = self.tools.generate_coping_strategy(crisis_data)
-        
-        return {
-            "crisis_level": crisis_data["crisis_level"],
-            "risk_score": crisis_data["risk_score"],
-            "immediate_action": crisis_data["immediate_action_required"],
-            "coping_strategy": coping_strategy,
-            "agent_type": "crisis_detection"
-        }
-    
-    async def emotion_analysis_agent(self, message: str, context: Dict) -> Dict:
-        """Specialized agent for emotion analysis"""
-        await asyncio.sleep(0.1)
-        
-        ai_analysis = await self.ai_integration.analyze_with_ai(message, context)
-        
-        return {
-            "emotions_detected": ai_analysis["emotions"],
-            "urgency_level": ai_analysis["urgency"],
-            "support_needs": ai_analysis["needs"],
-            "therapeutic_approach": ai_analysis["approach"],
-            "agent_response": ai_analysis["response"],
-            "agent_type": "emotion_analysis"
-        }
-    
-    async def support_planning_agent(self, message: str, context: Dict) -> Dict:
-        """Specialized agent for support planning"""
-        await asyncio.sleep(0.1)
-        
-        support_plan = {
-            "immediate_actions": [
-                "Practice grounding techniques",
-                "Contact support network",
-                "Use coping strategies"
-            ],
-            "short_term_goals": [
-                "Daily check-ins",
-                "Mood tracking",
-                "Small achievable tasks"
-            ],
-            "long_term_strategies": [
-                "Therapy exploration",
-                "Support group connection",
-                "Wellness routine development"
-            ]
-        }
-        
-        return {
-            "support_plan": support_plan,
-            "personalization_level": "high",
-            "agent_type": "support_planning"
-        }
-    
-    async def resource_matching_agent(self, message: str, context: Dict) -> Dict:
-        """Specialized agent for resource matching"""
-        await asyncio.sleep(0.1)
-        
-        resources = {
-            "crisis": {
-                "988 Suicide Prevention": "Call 988",
-                "Crisis Text Line": "Text HOME to 741741",
-                "Emergency": "Call 911"
-            },
-            "therapy": {
-                "BetterHelp": "Online therapy platform",
-                "Open Path Collective": "Affordable therapy",
-                "Psychology Today": "Therapist directory"
-            },
-            "support": {
-                "7 Cups": "Free listener support",
-                "Support Groups Central": "Online support groups"
-            }
-        }
-        
-        return {
-            "matched_resources": resources,
-            "recommendation_confidence": "high",
-            "agent_type": "resource_matching"
-        }
-    
-    def synthesize_responses(self, agent_results: Dict) -> Dict:
-        """Synthesize responses from all agents into final output"""
-        crisis_data = agent_results.get('crisis_detector', {})
-        emotion_data = agent_results.get('emotion_analyzer', {})
-        support_data = agent_results.get('support_planner', {})
-        resource_data = agent_results.get('resource_matcher', {})
-        
-        # Determine primary response based on crisis level
-        if crisis_data.get('crisis_level') == 'high':
-            primary_response = crisis_data.get('coping_strategy', 'Please seek immediate help.')
-        else:
-            primary_response = emotion_data.get('agent_response', 'I am here to support you.')
-        
-        return {
-            "primary_response": primary_response,
-            "crisis_level": crisis_data.get('crisis_level', 'low'),
-            "emotions": emotion_data.get('emotions_detected', 'processing'),
-            "support_plan": support_data.get('support_plan', {}),
-            "resources": resource_data.get('matched_resources', {}),
-            "comprehensive_analysis": True,
-            "agents_involved": len(agent_results)
-        }
+@st.cache_resource(show_spinner="Initializing AI System...")
+def load_simulated_agent_system() -> Tuple[GeminiAIConfigurator, ParallelAgentsSystem]:
+    """Simulated-mode system, built once per server process and shared by every session"""
+    return build_agent_system(None)
+
+def current_agent_system() -> Tuple[GeminiAIConfigurator, ParallelAgentsSystem]:
+    """The system for this session
+
+    A user's own API key never leaves their session: its system lives in st.session_state
+    (the model discovery cache file only stores a hash of the key), so no other session can
+    reach it through a process-wide cache.
+    """
+    if st.session_state.get('use_simulated_mode'):
+        return load_simulated_agent_system()
+    if st.session_state.get('agent_system') is None:
+        with st.spinner("Initializing AI System..."):
+            st.session_state.agent_system = build_agent_system(st.session_state.user_api_key)
+    return st.session_state.agent_system
 
 # =============================================
 # 🏆 API KEY INPUT COMPONENT
@@ -685,52 +298,57 @@ def main():
             st.success("🔑 API Key Configured")
             
         if st.button("🚀 Initialize Full System", use_container_width=True):
-            with st.spinner("Initializing AI System..."):
-                # Initialize Gemini AI
-                ai_config = GeminiAIConfigurator()
-                
-                if st.session_state.get('use_simulated_mode'):
-                    ai_config.fallback_mode = True
-                    st.info("Using Advanced Simulated AI Mode")
-                else:
-                    success = ai_config.set_api_key(st.session_state.user_api_key)
-                    if not success:
-                        st.warning("Falling back to simulated AI mode")
-                
-                # Initialize all components
-                tools = MentalHealthTools()
-                ai_integration = GeminiAIIntegration(ai_config)
-                agents = ParallelAgentsSystem(tools, ai_integration)
-                
-                # Store in session state
-                st.session_state.ai_config = ai_config
-                st.session_state.tools = tools
-                st.session_state.ai_integration = ai_integration
-                st.session_state.agents = agents
-                st.session_state.system_initialized = True
-                
-                st.success("✅ System Fully Initialized!")
+            # Simulated mode is shared by every session; a user's key gets a system of its own
+            ai_config, _ = current_agent_system()
+            
+            if st.session_state.get('use_simulated_mode'):
+                st.info("Using Advanced Simulated AI Mode")
+            elif not ai_config.fallback_mode:
+                st.session_state.gemini_configured = True
+                st.success(f"🎯 PRIMARY MODEL SELECTED: {ai_config.primary_model_name}")
+            else:
+                st.warning("🚨 No working AI models found - Falling back to simulated AI mode")
+            
+            st.session_state.system_initialized = True
+            st.success("✅ System Fully Initialized!")
         
         st.header("📊 Session Info")
         st.markdown(f'<div class="system-info">Session ID: {st.session_state.session_id}</div>', unsafe_allow_html=True)
         st.markdown(f'<div class="system-info">User ID: {st.session_state.user_id}</div>', unsafe_allow_html=True)
-        st.markdown(f'<div class="system-info">Messages: {len(st.session_state.conversation_history)}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="system-info">Messages: {load_memory().summary(st.session_state.user_id)["turns"]}</div>', unsafe_allow_html=True)
         
         if st.session_state.get('system_initialized'):
-            if st.session_state.ai_config.fallback_mode:
+            ai_config, agents = current_agent_system()
+            if ai_config.fallback_mode:
                 st.warning("🔧 Using Simulated AI Mode")
             else:
-                st.success(f"🤖 AI Mode: {st.session_state.ai_config.primary_model_name}")
+                st.success(f"🤖 AI Mode: {ai_config.primary_model_name}")
+            
+            ai_stats = agents.emotion_agent.ai_integration.stats()
+            breaker = ai_stats['circuit_breaker']
+            if breaker and breaker['state'] != 'closed':
+                st.warning(f"⚡ Gemini circuit {breaker['state'].replace('_', '-')}: "
+                           f"using simulated analysis (retry in {breaker['retry_in_s']:.0f}s)")
+            
+            routing = ai_stats['routing']
+            if routing and routing['messages']:
+                with st.expander("🔀 LLM Routing"):
+                    for tier, tier_stats in routing['tiers'].items():
+                        st.write(f"**{tier}**: {tier_stats['share']:.0%} of messages, "
+                                 f"hit rate {tier_stats['hit_rate']:.0%}, {tier_stats['mean_ms']:.2f} ms")
         
         st.header("⚡ Quick Actions")
         if st.button("🧹 Clear Conversation", use_container_width=True):
             st.session_state.conversation_history = []
+            load_memory().clear(st.session_state.user_id)
+            load_trajectory().reset(st.session_state.user_id)
             st.rerun()
         
         if st.button("🔄 Reset API Key", use_container_width=True):
             st.session_state.api_key_entered = False
             st.session_state.system_initialized = False
             st.session_state.user_api_key = None
+            st.session_state.agent_system = None
             st.session_state.use_simulated_mode = False
             st.rerun()
         
@@ -767,74 +385,113 @@ def main():
     with col2:
         st.header("📈 Live Analytics")
         
-        if st.session_state.conversation_history:
+        # Everything below reads O(1) aggregates; the conversation history is never rescanned
+        trajectory = load_trajectory().get(st.session_state.user_id)
+        if trajectory['turns']:
             # Current crisis level
-            latest_response = next((msg for msg in reversed(st.session_state.conversation_history) 
-                                  if msg.get('type') == 'response'), None)
+            crisis_level = trajectory['last_crisis_level'] or 'low'
+            if crisis_level == 'high':
+                st.markdown('<div class="crisis-high">🚨 HIGH CRISIS LEVEL</div>', unsafe_allow_html=True)
+            elif crisis_level == 'medium':
+                st.markdown('<div class="crisis-medium">🟡 MEDIUM CRISIS LEVEL</div>', unsafe_allow_html=True)
+            else:
+                st.markdown('<div class="crisis-low">🟢 LOW CRISIS LEVEL</div>', unsafe_allow_html=True)
             
-            if latest_response:
-                crisis_level = latest_response.get('crisis_level', 'low')
-                if crisis_level == 'high':
-                    st.markdown('<div class="crisis-high">🚨 HIGH CRISIS LEVEL</div>', unsafe_allow_html=True)
-                elif crisis_level == 'medium':
-                    st.markdown('<div class="crisis-medium">🟡 MEDIUM CRISIS LEVEL</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown('<div class="crisis-low">🟢 LOW CRISIS LEVEL</div>', unsafe_allow_html=True)
+            if trajectory['escalating']:
+                st.markdown(f'<div class="crisis-medium">📈 Risk has been rising for {trajectory["rising_turns"]} messages</div>',
+                            unsafe_allow_html=True)
             
-            # Statistics
+            # Statistics over the whole conversation, not just the messages on screen
             st.subheader("Session Metrics")
-            total_msgs = len(st.session_state.conversation_history)
-            user_msgs = len([m for m in st.session_state.conversation_history if m.get('type') == 'user'])
+            summary = load_memory().summary(st.session_state.user_id)
             
             col2_1, col2_2 = st.columns(2)
             with col2_1:
-                st.metric("Total Messages", total_msgs)
+                st.metric("Your Messages", summary['turns'])
+                st.metric("Risk (recent max)", f"{trajectory['window_max_risk']:.2f}")
             with col2_2:
-                st.metric("Your Messages", user_msgs)
+                st.metric("Risk Trend", f"{trajectory['risk_ewma']:.2f}", delta=f"{trajectory['risk_trend']:+.2f}",
+                          delta_color="inverse")
+                st.metric("Intensity", f"{trajectory['intensity_ewma']:.2f}")
             
             # Agent performance
+            history = st.session_state.conversation_history
+            latest_response = history[-1] if history and history[-1].get('type') == 'response' else None
             st.subheader("🤖 Agent Activity")
-            if latest_response and 'full_analysis' in latest_response:
-                agents_used = latest_response['full_analysis'].get('agents_used', 0)
-                st.write(f"Active Agents: **{agents_used}**")
+            if latest_response and 'analysis' in latest_response:
+                st.write(f"Active Agents: **{latest_response.get('agents_used', 0)}**")
                 
-                agent_results = latest_response['full_analysis'].get('agent_results', {})
-                for agent_name, result in agent_results.items():
-                    if 'error' not in result:
-                        st.write(f"✅ {agent_name.replace('_', ' ').title()}")
+                for agent_name in latest_response['analysis']['agents_ok']:
+                    st.write(f"✅ {agent_name.replace('_', ' ').title()}")
             
             # Recent emotions
-            recent_responses = [msg for msg in st.session_state.conversation_history[-3:] 
-                              if msg.get('type') == 'response']
-            if recent_responses:
+            recent_emotions = load_memory().context(st.session_state.user_id).get('recent_emotions', [])
+            if recent_emotions:
                 st.subheader("Recent Emotions")
-                for resp in recent_responses:
-                    emotions = resp.get('emotions', 'Unknown')
+                for emotions in recent_emotions:
                     st.write(f"• {emotions}")
 
+def append_to_history(message: Dict[str, Any]):
+    """Add a message to the on-screen history, dropping the oldest beyond the display limit"""
+    history = st.session_state.conversation_history
+    history.append(message)
+    del history[:-MAX_DISPLAYED_MESSAGES]
+
+def compact_analysis(result: Dict) -> Dict[str, Any]:
+    """The few agent fields the history view shows, instead of the whole result"""
+    agent_results = result.get('agent_results', {})
+    crisis_data = agent_results.get('crisis_detector', {})
+    emotion_data = agent_results.get('emotion_analyzer', {})
+    return {
+        'risk_score': crisis_data.get('risk_score', 0),
+        'immediate_action': crisis_data.get('immediate_action', False),
+        'urgency': emotion_data.get('urgency_level', 'low'),
+        'approach': emotion_data.get('therapeutic_approach', 'active_listening'),
+        'agents_ok': [name for name, data in agent_results.items() if 'error' not in data]
+    }
+
 def process_user_message(user_input):
     """Process user message through the complete agent system"""
     # Add user message to history
-    st.session_state.conversation_history.append({
+    append_to_history({
         'type': 'user',
         'content': user_input,
         'timestamp': datetime.now().isoformat()
     })
     
-    # Show processing with agent activity
-    with st.spinner("🔄 Multiple agents analyzing your message..."):
-        # Process through parallel agents
-        result = asyncio.run(st.session_state.agents.process_message(user_input, {}))
-        
-        # Add comprehensive response to history
-        st.session_state.conversation_history.append({
+    # Stream the reply as the agents produce it; the crisis response, if any, comes first
+    _, agents = current_agent_system()
+    memory = load_memory()
+    user_context = memory.context(st.session_state.user_id)
+    events = load_event_loop().iterate(agents.stream_message(user_input, user_context))
+    result = {}
+    
+    def reply_tokens():
+        for event in events:
+            if event['type'] == 'token':
+                yield event['text']
+            elif event['type'] == 'done':
+                result.update(event['result'])
+    
+    st.caption("🔄 Multiple agents analyzing your message...")
+    st.write_stream(reply_tokens())
+    
+    # Add comprehensive response to history
+    if result:
+        final_response = result['final_response']
+        crisis_data = result['agent_results'].get('crisis_detector', {})
+        memory.record(st.session_state.user_id, user_input, final_response['crisis_level'],
+                      crisis_data.get('risk_score', 0.0), final_response['emotions'])
+        load_trajectory().update(st.session_state.user_id, crisis_data.get('risk_score', 0.0),
+                                 crisis_data.get('emotional_intensity', 0.0), final_response['crisis_level'])
+        append_to_history({
             'type': 'response',
-            'content': result['final_response']['primary_response'],
-            'crisis_level': result['final_response']['crisis_level'],
-            'emotions': result['final_response']['emotions'],
+            'content': final_response['primary_response'],
+            'crisis_level': final_response['crisis_level'],
+            'emotions': final_response['emotions'],
             'agents_used': result['agents_used'],
             'timestamp': datetime.now().isoformat(),
-            'full_analysis': result
+            'analysis': compact_analysis(result)
         })
     
     st.rerun()
@@ -866,23 +523,21 @@ def display_conversation_history():
             
             # Show detailed analysis
             with st.expander("🔍 View Detailed Agent Analysis"):
-                full_analysis = message.get('full_analysis', {})
-                if full_analysis:
+                analysis = message.get('analysis', {})
+                if analysis:
                     col1, col2 = st.columns(2)
                     
                     with col1:
                         st.subheader("Crisis Assessment")
-                        crisis_data = full_analysis.get('agent_results', {}).get('crisis_detector', {})
-                        st.write(f"**Level:** {crisis_data.get('crisis_level', 'low').upper()}")
-                        st.write(f"**Risk Score:** {crisis_data.get('risk_score', 0):.2f}")
-                        st.write(f"**Immediate Action:** {crisis_data.get('immediate_action', False)}")
+                        st.write(f"**Level:** {crisis_level.upper()}")
+                        st.write(f"**Risk Score:** {analysis['risk_score']:.2f}")
+                        st.write(f"**Immediate Action:** {analysis['immediate_action']}")
                     
                     with col2:
                         st.subheader("Emotion Analysis")
-                        emotion_data = full_analysis.get('agent_results', {}).get('emotion_analyzer', {})
-                        st.write(f"**Emotions:** {emotion_data.get('emotions_detected', 'processing')}")
-                        st.write(f"**Urgency:** {emotion_data.get('urgency_level', 'low').upper()}")
-                        st.write(f"**Approach:** {emotion_data.get('therapeutic_approach', 'active_listening')}")
+                        st.write(f"**Emotions:** {message.get('emotions', 'processing')}")
+                        st.write(f"**Urgency:** {analysis['urgency'].upper()}")
+                        st.write(f"**Approach:** {analysis['approach']}")
 
 def show_emergency_resources():
     """Display emergency resources"""
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Throughput of the local emotion classifier
+
+Trains the hashing-vectorizer classifier on synthetic labelled messages and scores
+batches of increasing size, reporting messages per second and the share of messages
+confident enough (``--threshold``) to skip the LLM.
+
+    python benchmarks/bench_classifier.py --messages 20000 --batch-sizes 1 100 1000 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mental_health_bot.classifier import train_emotion_classifier
+from mental_health_bot.testing import make_labelled_messages
+
+def run(args) -> dict:
+    train_texts, train_labels = make_labelled_messages(args.train, seed=1)
+    t0 = time.perf_counter()
+    classifier = train_emotion_classifier(train_texts, train_labels)
+    results = {"train_s": round(time.perf_counter() - t0, 3), "batches": {}}
+
+    texts, labels = make_labelled_messages(args.messages, seed=2)
+    classifier.predict_batch(texts[:10])
+    for batch_size in args.batch_sizes:
+        predictions = []
+        t0 = time.perf_counter()
+        for start in range(0, len(texts), batch_size):
+            predictions.extend(classifier.predict_batch(texts[start:start + batch_size]))
+        elapsed = time.perf_counter() - t0
+        results['batches'][str(batch_size)] = {
+            "messages_per_s": round(len(texts) / elapsed, 1),
+            "us_per_message": round(elapsed / len(texts) * 1e6, 2)
+        }
+
+    results['accuracy'] = round(sum(p['label'] == l for p, l in zip(predictions, labels)) / len(labels), 4)
+    results['confident_share'] = round(
+        sum(p['confidence'] >= args.threshold for p in predictions) / len(predictions), 4)
+
+    print(f"🧠 Trained on {args.train} messages in {results['train_s']} s; "
+          f"accuracy {results['accuracy']:.1%}, {results['confident_share']:.1%} above {args.threshold}")
+    for batch_size, summary in results['batches'].items():
+        print(f"📊 batch {batch_size:>6s}  {summary['messages_per_s']:10.1f} msg/s  "
+              f"{summary['us_per_message']:8.2f} µs/msg")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local emotion classifier")
+    parser.add_argument('--train', type=int, default=2000, help="Synthetic training messages")
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 1000, 10000])
+    parser.add_argument('--threshold', type=float, default=0.8, help="Confidence needed to skip the LLM")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Per-message cost of asyncio.run versus a persistent background event loop
+
+The Streamlit app used to call asyncio.run() for every message. This compares
+that with submitting to one long-lived BackgroundEventLoop, both for an empty
+coroutine (pure loop setup/teardown) and for a full ParallelAgentsSystem pass
+against FakeGenerativeModel.
+
+    python benchmarks/bench_event_loop.py --messages 200 --llm-latency-ms 5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mental_health_bot.ai_orchestrator import ParallelAgentsSystem
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.event_loop import BackgroundEventLoop
+from mental_health_bot.testing import FakeGenerativeModel
+from run_benchmarks import make_messages, percentile
+
+async def noop():
+    return None
+
+def timed(call, count: int) -> list:
+    latencies = []
+    for index in range(count):
+        t0 = time.perf_counter()
+        call(index)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+def summary(latencies: list) -> dict:
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.mean(latencies), 3)
+    }
+
+def run(args) -> dict:
+    messages = make_messages(args.words, args.messages)
+    system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(
+        model=FakeGenerativeModel(latency=args.llm_latency_ms / 1000.0), use_cache=False))
+    results = {}
+
+    with BackgroundEventLoop() as background, contextlib.redirect_stdout(io.StringIO()):
+        results['empty_coroutine'] = {
+            "asyncio_run": summary(timed(lambda i: asyncio.run(noop()), args.messages)),
+            "background_loop": summary(timed(lambda i: background.run(noop()), args.messages))
+        }
+        results['process_message'] = {
+            "asyncio_run": summary(timed(
+                lambda i: asyncio.run(system.process_message(messages[i], {})), args.messages)),
+            "background_loop": summary(timed(
+                lambda i: background.run(system.process_message(messages[i], {})), args.messages))
+        }
+
+    for name, modes in results.items():
+        saved = modes['asyncio_run']['mean_ms'] - modes['background_loop']['mean_ms']
+        modes['saved_ms_per_message'] = round(saved, 3)
+        print(f"📊 {name:16s} asyncio.run {modes['asyncio_run']['mean_ms']:8.3f} ms  "
+              f"background loop {modes['background_loop']['mean_ms']:8.3f} ms  saved {saved:+.3f} ms")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark asyncio.run against a background event loop")
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--words', type=int, default=50)
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="Latency of the fake LLM")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the mental_health_bot package
+
+Each measurement runs in a fresh interpreter so nothing is already cached in
+sys.modules. Exits non-zero when the rule-based path blows its budget or pulls in
+one of the heavy LLM/numeric dependencies.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Modules that must stay off the rule-based import path
+HEAVY_MODULES = ['google.generativeai', 'dotenv', 'numpy', 'sklearn', 'pandas', 'streamlit']
+
+IMPORT_TARGETS = {
+    'package': 'import mental_health_bot',
+    'rule_based': 'import mental_health_bot.tools, mental_health_bot.simple_orchestrator',
+    'parallel_agents': 'import mental_health_bot.ai_orchestrator',
+}
+
+IMPORT_BUDGET_MS = 50.0
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(statement: str, runs: int) -> dict:
+    """Time one import statement across several fresh interpreters"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC_DIR, os.environ.get('PYTHONPATH', '')]))
+    samples, heavy = [], set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+            check=True, capture_output=True, text=True, env=env
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result['ms'])
+        heavy.update(result['heavy'])
+
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+        "heavy_modules": sorted(heavy)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {name: measure(statement, args.runs) for name, statement in IMPORT_TARGETS.items()}
+    for name, result in results.items():
+        print(f"⏱️ {name:16s} median {result['median_ms']:7.2f} ms  heavy: {result['heavy_modules'] or '-'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"import_time": results, "budget_ms": args.budget_ms}, f, indent=2)
+
+    rule_based = results['rule_based']
+    if rule_based['median_ms'] > args.budget_ms or rule_based['heavy_modules']:
+        print(f"❌ Rule-based import path exceeded its {args.budget_ms} ms budget or loaded heavy modules")
+        sys.exit(1)
+    print("✅ Import budget met")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Resource lookup latency: memory-mapped index versus a linear scan
+
+Builds a synthetic directory of services, writes it with build_resource_index and
+times typical ResourceMatchingAgent queries (detected issues + region, + location,
++ language and opening hours) against filtering the same services as Python dicts.
+
+    python benchmarks/bench_resource_index.py --services 50000 --queries 500
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mental_health_bot.resource_index import ResourceIndex, build_resource_index
+from run_benchmarks import percentile
+
+CATEGORIES = ['suicidal', 'self_harm', 'panic', 'depression', 'anxiety', 'grief', 'addiction', 'general']
+LANGUAGES = ['en', 'es', 'fr', 'hi', 'zh', 'ar']
+
+def make_services(count: int, regions: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    region_names = [f"R{i:03d}" for i in range(regions)]
+    services = []
+    for i in range(count):
+        open_hour = rng.choice([0, 0, 8, 9, 18])
+        services.append({
+            'id': i,
+            'name': f"Support service {i}",
+            'contact': f"+1-800-{i:06d}",
+            'lat': rng.uniform(-45.0, 60.0),
+            'lon': rng.uniform(-130.0, 150.0),
+            'region': rng.choice(region_names),
+            'categories': rng.sample(CATEGORIES, rng.randint(1, 3)),
+            'languages': rng.sample(LANGUAGES, rng.randint(1, 2)),
+            'open_hour': open_hour,
+            'close_hour': 24 if open_hour == 0 else (open_hour + 9) % 24
+        })
+    return services
+
+def make_queries(services: list, count: int, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        anchor = rng.choice(services)
+        queries.append({
+            'categories': rng.sample(CATEGORIES[:4], rng.randint(1, 2)),
+            'region': anchor['region'],
+            'language': rng.choice(LANGUAGES),
+            'near': (anchor['lat'], anchor['lon']),
+            'radius_km': 250.0,
+            'open_at_hour': rng.randint(0, 23)
+        })
+    return queries
+
+def linear_scan(services: list, categories, region, language, near, radius_km, open_at_hour, limit=10):
+    matches = []
+    for s in services:
+        if s['region'] != region or not set(categories) & set(s['categories']) or language not in s['languages']:
+            continue
+        open_hour, close_hour = s['open_hour'], s['close_hour']
+        if not (open_hour <= open_at_hour < close_hour if open_hour <= close_hour
+                else open_at_hour >= open_hour or open_at_hour < close_hour):
+            continue
+        lat1, lon1, lat2, lon2 = map(math.radians, (near[0], near[1], s['lat'], s['lon']))
+        h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        distance = 2 * 6371.0 * math.asin(math.sqrt(min(h, 1.0)))
+        if distance <= radius_km:
+            matches.append((distance, s))
+    return [s for _, s in sorted(matches, key=lambda m: m[0])[:limit]]
+
+def summary(latencies: list) -> dict:
+    return {
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "mean_ms": round(statistics.mean(latencies), 4)
+    }
+
+def timed(call, queries: list) -> list:
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        call(query)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+def run(args) -> dict:
+    services = make_services(args.services, args.regions)
+    queries = make_queries(services, args.queries)
+
+    with tempfile.TemporaryDirectory() as path:
+        t0 = time.perf_counter()
+        build_resource_index(services, path, cell_degrees=args.cell_degrees)
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index = ResourceIndex.load(path)
+        load_ms = (time.perf_counter() - t0) * 1000
+
+        partial = [{'categories': q['categories'], 'region': q['region']} for q in queries]
+        results = {
+            "build_s": round(build_s, 3),
+            "load_ms": round(load_ms, 3),
+            "index_categories_region": summary(timed(lambda q: index.query(**q), partial)),
+            "index_full_query": summary(timed(lambda q: index.query(**q), queries)),
+            "linear_scan_full_query": summary(timed(lambda q: linear_scan(services, **q), queries[:args.scan_queries]))
+        }
+        del index
+
+    print(f"📦 {args.services} services: build {results['build_s']} s, load {results['load_ms']} ms")
+    for name in ("index_categories_region", "index_full_query", "linear_scan_full_query"):
+        print(f"📊 {name:24s} p50 {results[name]['p50_ms']:9.4f} ms  p99 {results[name]['p99_ms']:9.4f} ms")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resource index lookups")
+    parser.add_argument('--services', type=int, default=50000)
+    parser.add_argument('--regions', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--scan-queries', type=int, default=50, help="Queries for the (slow) linear scan")
+    parser.add_argument('--cell-degrees', type=float, default=1.0)
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
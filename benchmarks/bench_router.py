@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Share of messages each routing tier answers, swept over the confidence threshold
+
+Sends synthetic labelled messages through GeminiAIIntegration with a ConfidenceRouter
+against FakeGenerativeModel (``--llm-latency-ms``), caching disabled, and reports per
+threshold how many messages the rules answered, how many reached the LLM and the mean
+latency per message.
+
+    python benchmarks/bench_router.py --messages 500 --thresholds 0.5 0.8 0.95 --llm-latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.router import ConfidenceRouter
+from mental_health_bot.testing import FakeGenerativeModel, make_labelled_messages
+
+async def analyze_all(integration: GeminiAIIntegration, texts: list):
+    for text in texts:
+        await integration.analyze_with_ai(text)
+
+def run(args) -> dict:
+    texts, _ = make_labelled_messages(args.messages, seed=3)
+    results = {}
+    for threshold in args.thresholds:
+        model = FakeGenerativeModel(latency=args.llm_latency_ms / 1000.0)
+        integration = GeminiAIIntegration(model=model, use_cache=False, router=ConfidenceRouter(threshold))
+        t0 = time.perf_counter()
+        asyncio.run(analyze_all(integration, texts))
+        elapsed = time.perf_counter() - t0
+
+        routing = integration.router.stats()
+        results[str(threshold)] = {
+            "llm_calls": model.calls,
+            "shares": {tier: summary['share'] for tier, summary in routing['tiers'].items()},
+            "tier_mean_ms": {tier: summary['mean_ms'] for tier, summary in routing['tiers'].items()},
+            "disagreements": routing['disagreements'],
+            "ms_per_message": round(elapsed / len(texts) * 1000, 3)
+        }
+
+    for threshold, summary in results.items():
+        shares = ", ".join(f"{tier} {share:.1%}" for tier, share in summary['shares'].items())
+        print(f"🔀 threshold {threshold:>5s}  {summary['llm_calls']:6d} LLM calls  "
+              f"{summary['ms_per_message']:8.3f} ms/msg  ({shares})")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark confidence-gated LLM routing")
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.5, 0.8, 0.95])
+    parser.add_argument('--llm-latency-ms', type=float, default=20.0, help="Simulated LLM latency")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
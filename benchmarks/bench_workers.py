@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Throughput scaling of the process worker mode
+
+Runs the CPU-bound stage (feature extraction and crisis detection) of
+ParallelAgentsSystem over the same messages inline and with 1..N worker
+processes, and reports messages per second, speedup over one worker, speedup
+over inline and parallel efficiency. It also times one message assessed inline
+against one round trip through the pool, which is why single messages never use
+it. The pool only beats inline when there are spare cores and the batches are
+large enough to pay for pickling every message and result.
+
+    python benchmarks/bench_workers.py --max-workers 8 --output workers.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mental_health_bot.ai_orchestrator import ParallelAgentsSystem
+from run_benchmarks import make_messages
+
+def worker_counts(max_workers: int) -> list:
+    counts, workers = [], 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    return counts + [max_workers]
+
+async def measure(system: ParallelAgentsSystem, messages: list, batch_size: int, rounds: int) -> float:
+    """Best-of-``rounds`` throughput in messages per second"""
+    best = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for offset in range(0, len(messages), batch_size):
+            await system.assess_batch(messages[offset:offset + batch_size])
+        best = max(best, len(messages) / (time.perf_counter() - start))
+    return best
+
+async def single_latency_us(assess, message: str, repeat: int) -> float:
+    """Median microseconds to assess one message"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await assess(message)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return sorted(timings)[len(timings) // 2]
+
+def run(args) -> dict:
+    messages = make_messages(args.words, args.messages)
+    results = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        inline = ParallelAgentsSystem(execution_mode='inline')
+        inline_throughput = asyncio.run(measure(inline, messages, args.batch_size, args.rounds))
+        results['inline'] = {"throughput_msgs_per_s": round(inline_throughput, 2),
+                             "single_message_us": round(asyncio.run(
+                                 single_latency_us(inline.assess, messages[0], args.single_rounds)), 1)}
+
+    baseline = None
+    for workers in worker_counts(args.max_workers):
+        with contextlib.redirect_stdout(io.StringIO()):
+            system = ParallelAgentsSystem(execution_mode='process', workers=workers, pool_min_batch=1)
+        try:
+            throughput = asyncio.run(measure(system, messages, args.batch_size, args.rounds))
+            if workers == 1:
+                results['inline']['pool_round_trip_us'] = round(asyncio.run(
+                    single_latency_us(system.worker_pool.assess, messages[0], args.single_rounds)), 1)
+        finally:
+            system.close()
+
+        baseline = baseline or throughput
+        speedup = throughput / baseline
+        results[str(workers)] = {
+            "throughput_msgs_per_s": round(throughput, 2),
+            "speedup": round(speedup, 2),
+            "vs_inline": round(throughput / inline_throughput, 2),
+            "efficiency": round(speedup / workers, 2)
+        }
+        print(f"📊 {workers:3d} workers  {throughput:10.1f} msg/s  x{speedup:5.2f}  "
+              f"efficiency {speedup / workers:4.0%}  vs inline x{throughput / inline_throughput:5.2f}")
+
+    print(f"📊 inline       {inline_throughput:10.1f} msg/s")
+    print(f"📊 one message  inline {results['inline']['single_message_us']:.1f} µs  "
+          f"pool round trip {results['inline'].get('pool_round_trip_us', 0.0):.1f} µs")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark worker-pool scaling")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--messages', type=int, default=4000)
+    parser.add_argument('--words', type=int, default=500, help="Words per message")
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--single-rounds', type=int, default=200, help="Repeats for the one-message latency")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {"messages": args.messages, "words": args.words, "batch_size": args.batch_size},
+            "results": results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the orchestrators and agents
+
+Runs every target against FakeGenerativeModel (no network) for several message
+lengths and reports throughput, p50/p95/p99 latency and, from tracemalloc, the
+allocations per message: blocks allocated and still alive once the message is
+handled (snapshot diff) and the peak traced memory while handling it. Blocks
+that are allocated and freed within the message are not counted by tracemalloc
+snapshots, so they only show up in the peak. Results are written as JSON so runs
+can be compared with --compare; the exit status is 1 when it finds a regression.
+
+    python benchmarks/run_benchmarks.py --llm-latency-ms 200 --output before.json
+    python benchmarks/run_benchmarks.py --llm-latency-ms 200 --compare before.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mental_health_bot.tools import MentalHealthTools
+from mental_health_bot.simple_orchestrator import SimpleMentalHealthOrchestrator
+from mental_health_bot.ai_orchestrator import MentalHealthOrchestrator, ParallelAgentsSystem
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.testing import FakeGenerativeModel
+
+MESSAGE_LENGTHS = [5, 50, 500, 5000]
+
+VOCABULARY = (
+    "i feel so very tired and really alone today work is overwhelming my heart racing "
+    "cant sleep hopeless not sure what to do anymore everything feels heavy friends family "
+    "panic attack help me please extremely anxious worried about tomorrow sad empty inside"
+).split()
+
+def make_messages(word_count: int, count: int, seed: int = 42) -> list:
+    """Deterministic synthetic messages of a given length"""
+    rng = random.Random(seed + word_count)
+    return [" ".join(rng.choice(VOCABULARY) for _ in range(word_count)) for _ in range(count)]
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def summarize(latencies_ms: list, wall_seconds: float, memory: list) -> dict:
+    return {
+        "messages": len(latencies_ms),
+        "throughput_msgs_per_s": round(len(latencies_ms) / wall_seconds, 2) if wall_seconds else None,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "mean_ms": round(statistics.mean(latencies_ms), 3),
+        "alloc_blocks_per_message": round(statistics.mean(blocks for _, blocks in memory), 1) if memory else None,
+        "peak_traced_kb_per_message": round(statistics.mean(peak for peak, _ in memory) / 1024, 2) if memory else None
+    }
+
+def build_targets(llm_latency: float, use_cache: bool) -> dict:
+    """Benchmark targets as (kind, callable) pairs; kind is 'sync' or 'async'"""
+    def integration():
+        return GeminiAIIntegration(model=FakeGenerativeModel(latency=llm_latency), use_cache=use_cache)
+
+    tools = MentalHealthTools()
+    simple = SimpleMentalHealthOrchestrator()
+    orchestrator = MentalHealthOrchestrator(ai_integration=integration())
+    parallel = ParallelAgentsSystem(ai_integration=integration())
+
+    return {
+        "crisis_detector": ('sync', tools.crisis_detector),
+        "simple_orchestrator": ('async', simple.process_user_message),
+        "ai_orchestrator": ('async', orchestrator.process_user_message),
+        "parallel_agents": ('async', lambda message: parallel.process_message(message, {})),
+    }
+
+def run_sync(func, messages: list) -> tuple:
+    latencies = []
+    start = time.perf_counter()
+    for message in messages:
+        t0 = time.perf_counter()
+        func(message)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies, time.perf_counter() - start
+
+async def run_async(func, messages: list, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(message):
+        async with semaphore:
+            t0 = time.perf_counter()
+            await func(message)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(message) for message in messages])
+    return latencies, time.perf_counter() - start
+
+def measure_memory(kind: str, func, messages: list) -> list:
+    """(peak bytes, allocated blocks) per message, from tracemalloc
+
+    The blocks are the ones allocated while handling the message and still alive after it
+    (from a snapshot diff); the peak is the traced memory high-water mark above the starting
+    point. Run separately from the timing loop because tracing is slow.
+    """
+    samples = []
+    tracemalloc.start()
+    try:
+        for message in messages:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            if kind == 'sync':
+                func(message)
+            else:
+                asyncio.run(func(message))
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            diff = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+            samples.append((peak, sum(stat.count_diff for stat in diff if stat.count_diff > 0)))
+    finally:
+        tracemalloc.stop()
+    return samples
+
+def run_suite(args) -> dict:
+    targets = build_targets(args.llm_latency_ms / 1000.0, args.cache)
+    selected = args.targets or list(targets)
+    results = {}
+
+    for name in selected:
+        kind, func = targets[name]
+        results[name] = {}
+        for word_count in args.lengths:
+            count = max(args.min_messages, args.messages // max(1, word_count // 50))
+            messages = make_messages(word_count, count)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                if kind == 'sync':
+                    latencies, wall = run_sync(func, messages)
+                else:
+                    latencies, wall = asyncio.run(run_async(func, messages, args.concurrency))
+                memory = measure_memory(kind, func, messages[:args.memory_samples]) if args.memory_samples else []
+
+            summary = summarize(latencies, wall, memory)
+            results[name][str(word_count)] = summary
+            print(f"📊 {name:20s} {word_count:5d} words  {summary['throughput_msgs_per_s']:>10} msg/s  "
+                  f"p50 {summary['p50_ms']:8.3f} ms  p99 {summary['p99_ms']:8.3f} ms  "
+                  f"allocs {summary['alloc_blocks_per_message']} blocks  peak {summary['peak_traced_kb_per_message']} KB")
+
+    return results
+
+def load_results(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['results']
+
+def percent_change(before, after) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+def compare(current: dict, baseline: dict, label: str, regression_pct: float = 10.0) -> list:
+    """Print p50 / throughput deltas against earlier results; returns the regressed targets"""
+    regressions = []
+    print(f"\n🔁 Compared with {label}")
+    for name, lengths in current.items():
+        for length, summary in lengths.items():
+            before = baseline.get(name, {}).get(length)
+            if not before:
+                continue
+            p50_change = percent_change(before['p50_ms'], summary['p50_ms'])
+            throughput_change = percent_change(before['throughput_msgs_per_s'], summary['throughput_msgs_per_s'])
+            regressed = p50_change > regression_pct
+            if regressed:
+                regressions.append(f"{name}/{length}")
+            print(f"   {name:20s} {length:>5s} words  p50 {before['p50_ms']:.3f} -> {summary['p50_ms']:.3f} ms "
+                  f"({p50_change:+.1f}%)  throughput {throughput_change:+.1f}%"
+                  f"{'  ⚠️ REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the mental_health_bot pipelines")
+    parser.add_argument('--targets', nargs='*', help="Subset of targets to run")
+    parser.add_argument('--lengths', nargs='*', type=int, default=MESSAGE_LENGTHS, help="Message lengths in words")
+    parser.add_argument('--messages', type=int, default=200, help="Messages per run at <=50 words")
+    parser.add_argument('--min-messages', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=1, help="In-flight messages for async targets")
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="Latency of the fake LLM")
+    parser.add_argument('--cache', action='store_true', help="Enable the analysis cache")
+    parser.add_argument('--memory-samples', type=int, default=10,
+                        help="Messages traced for allocations with tracemalloc (0 to skip)")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="Earlier results JSON to compare against")
+    parser.add_argument('--regression-pct', type=float, default=10.0,
+                        help="p50 slowdown (in percent) flagged as a regression by --compare")
+    args = parser.parse_args()
+
+    # Read the baseline first: --compare may name the same file as --output
+    baseline = load_results(args.compare) if args.compare else None
+    results = run_suite(args)
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "llm_latency_ms": args.llm_latency_ms,
+            "concurrency": args.concurrency,
+            "cache": args.cache,
+            "messages": args.messages
+        },
+        "results": results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+
+    if baseline is not None and compare(results, baseline, args.compare, args.regression_pct):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ setup(
     
     # 🌟 KEY CHANGE 2: Define the package root as 'src'
     package_dir={"": "src"},
+    package_data={"mental_health_bot": ["data/*.json"]},
 
     install_requires=read_requirements(),
     
@@ -38,6 +39,7 @@ setup(
     entry_points={
         'console_scripts': [
             'mha-run=mental_health_bot.main:main', # Example entry point
+            'mental-health-bot=mental_health_bot.cli:main',
         ],
     },
 )
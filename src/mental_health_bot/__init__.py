@@ -1,3 +1,10 @@
-from .main import mental_health_agent, MentalHealthAgent
+from typing import Any
 
 __all__ = ['mental_health_agent', 'MentalHealthAgent']
+
+def __getattr__(name: str) -> Any:
+    # Resolved on first access so `import mental_health_bot` stays cheap
+    if name in __all__:
+        from . import main
+        return getattr(main, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
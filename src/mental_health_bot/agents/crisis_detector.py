@@ -1,23 +1,32 @@
 from typing import List, Dict, Any
-import asyncio
-from ..tools import MENTAL_HEALTH_TOOLS
+from ..tools import get_mental_health_tools
+from ..features import MessageFeatures
 
 class CrisisDetectionAgent:
     """Specialized agent for crisis detection"""
     
     def __init__(self):
-        self.tools = MENTAL_HEALTH_TOOLS
+        self.tools = get_mental_health_tools()
     
-    async def detect_crisis(self, message: str, context: Dict) -> Dict:
-        """Detect crisis level and provide intervention"""
-        await asyncio.sleep(0.1)  # Simulate processing
-        
-        crisis_data = self.tools.crisis_detector(message)
+    async def detect_crisis(self, message: str, context: Dict, features: MessageFeatures = None,
+                            crisis_data: Dict = None) -> Dict:
+        """Detect crisis level and provide intervention, reusing an earlier assessment if given"""
+        if crisis_data is not None:
+            return self._build_result(crisis_data)
+        return self.fallback_result(message, context, features)
+    
+    def fallback_result(self, message: str, context: Dict, features: MessageFeatures = None) -> Dict:
+        """Rule-based result, also used when the agent misses its latency budget"""
+        return self._build_result(self.tools.crisis_detector(message, features))
+    
+    def _build_result(self, crisis_data: Dict) -> Dict:
         coping_strategy = self.tools.generate_coping_strategy(crisis_data)
         
         return {
             "crisis_level": crisis_data["crisis_level"],
             "risk_score": crisis_data["risk_score"],
+            "emotional_intensity": crisis_data["emotional_intensity"],
+            "detected_issues": crisis_data["detected_issues"],
             "immediate_action": crisis_data["immediate_action_required"],
             "coping_strategy": coping_strategy,
             "agent_type": "crisis_detection"
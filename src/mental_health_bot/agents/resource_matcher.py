@@ -1,32 +1,57 @@
 from typing import List, Dict, Any
-import asyncio
+from ..features import MessageFeatures
+from ..catalog import get_response_catalog
+from ..tools import get_mental_health_tools
+from ..resource_index import ResourceIndex, get_resource_index
+from .. import config
 
 class ResourceMatchingAgent:
-    """Specialized agent for resource matching"""
-    
-    async def match_resources(self, message: str, context: Dict) -> Dict:
-        """Match user with relevant mental health resources"""
-        await asyncio.sleep(0.1)
-        
-        resources = {
-            "crisis": {
-                "988 Suicide Prevention": "Call 988",
-                "Crisis Text Line": "Text HOME to 741741",
-                "Emergency": "Call 911"
-            },
-            "therapy": {
-                "BetterHelp": "Online therapy platform",
-                "Open Path Collective": "Affordable therapy", 
-                "Psychology Today": "Therapist directory"
-            },
-            "support": {
-                "7 Cups": "Free listener support",
-                "Support Groups Central": "Online support groups"
-            }
-        }
-        
+    """Specialized agent for resource matching
+
+    With a resource index (passed in, or MENTAL_HEALTH_BOT_RESOURCE_INDEX) local services
+    for the detected issues are looked up by the user's ``region``, ``language``,
+    ``location`` (lat, lon) and ``local_hour`` context and returned as ``local_services``.
+    """
+
+    def __init__(self, resource_index: ResourceIndex = None, max_services: int = 5, radius_km: float = 50.0):
+        self._resource_index = resource_index
+        self.max_services = max_services
+        self.radius_km = radius_km
+
+    @property
+    def resource_index(self) -> ResourceIndex:
+        if self._resource_index is None and config.RESOURCE_INDEX_PATH:
+            self._resource_index = get_resource_index(config.RESOURCE_INDEX_PATH)
+        return self._resource_index
+
+    async def match_resources(self, message: str, context: Dict, features: MessageFeatures = None,
+                              crisis_data: Dict = None) -> Dict:
+        """Match user with relevant mental health resources, reusing an earlier assessment if given"""
+        result = self.fallback_result(message, context, features)
+        if self.resource_index is not None:
+            if crisis_data is None:
+                crisis_data = get_mental_health_tools().crisis_detector(message, features)
+            result["local_services"] = self.find_services(crisis_data['detected_issues'], context)
+        return result
+
+    def find_services(self, issues: List[str], context: Dict) -> List[Dict[str, Any]]:
+        """Indexed lookup of services for the detected issues near the user"""
+        context = context or {}
+        location = context.get('location')
+        return self.resource_index.query(
+            categories=issues or None,
+            region=context.get('region'),
+            language=context.get('language'),
+            near=tuple(location) if location else None,
+            radius_km=self.radius_km,
+            open_at_hour=context.get('local_hour'),
+            limit=self.max_services
+        )
+
+    def fallback_result(self, message: str, context: Dict, features: MessageFeatures = None) -> Dict:
+        """Rule-based result, also used when the agent misses its latency budget"""
         return {
-            "matched_resources": resources,
+            "matched_resources": get_response_catalog()['resources'],
             "recommendation_confidence": "high",
             "agent_type": "resource_matching"
         }
@@ -1,34 +1,18 @@
 from typing import List, Dict, Any
-import asyncio
+from ..features import MessageFeatures
+from ..catalog import get_response_catalog
 
 class SupportPlanningAgent:
     """Specialized agent for support planning"""
     
-    async def create_support_plan(self, message: str, context: Dict) -> Dict:
+    async def create_support_plan(self, message: str, context: Dict, features: MessageFeatures = None) -> Dict:
         """Generate personalized support plan"""
-        await asyncio.sleep(0.1)
-        
-        # Generate personalized support plan
-        support_plan = {
-            "immediate_actions": [
-                "Practice grounding techniques",
-                "Contact support network",
-                "Use coping strategies"
-            ],
-            "short_term_goals": [
-                "Daily check-ins",
-                "Mood tracking", 
-                "Small achievable tasks"
-            ],
-            "long_term_strategies": [
-                "Therapy exploration",
-                "Support group connection",
-                "Wellness routine development"
-            ]
-        }
-        
+        return self.fallback_result(message, context, features)
+    
+    def fallback_result(self, message: str, context: Dict, features: MessageFeatures = None) -> Dict:
+        """Rule-based result, also used when the agent misses its latency budget"""
         return {
-            "support_plan": support_plan,
+            "support_plan": get_response_catalog()['support_plan'],
             "personalization_level": "high",
             "agent_type": "support_planning"
         }
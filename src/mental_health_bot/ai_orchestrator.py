@@ -1,32 +1,127 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, AsyncIterator, Tuple, Callable
 import asyncio
 import time
+from collections import deque
+from itertools import islice
 from datetime import datetime
-from .agents.emotion_analyzer import EmotionAnalysisAgent
+from .agents.emotion_analyzer import EmotionAnalysisAgent, GeminiAIIntegration
 from .agents.crisis_detector import CrisisDetectionAgent
 from .agents.support_planner import SupportPlanningAgent
 from .agents.resource_matcher import ResourceMatchingAgent
-from .tools import MENTAL_HEALTH_TOOLS
+from .tools import get_mental_health_tools
+from .features import MessageFeatures
+from .workers import WorkerPool
+from .catalog import get_response_catalog
+from .templates import TemplateRenderer
+from .resource_index import ResourceIndex
+from .memory import ConversationMemory
+from .trajectory import RiskTrajectoryTracker
+from . import config
+
+# Latency budget per agent, in seconds. An agent that misses its deadline is
+# replaced by its rule-based fallback so the pipeline latency stays bounded.
+DEFAULT_AGENT_TIMEOUTS = {
+    'crisis_detector': 0.5,
+    'emotion_analyzer': 5.0,
+    'support_planner': 0.5,
+    'resource_matcher': 0.5
+}
 
 class ParallelAgentsSystem:
-    """Multi-agent system that works in parallel for comprehensive analysis"""
+    """Multi-agent system that works in parallel for comprehensive analysis
+    
+    With ``execution_mode='process'`` batches of at least ``pool_min_batch`` messages
+    (``assess_batch``, e.g. from ``process_many``) have their feature extraction and crisis
+    detection split across a worker pool (one process per core by default). Single messages
+    are always assessed inline: the pool's pickling round trip costs far more than the
+    rule-based stage itself. A pool created here is warmed up front, so the first batch does
+    not pay for starting the workers; a ``worker_pool`` passed in is used as is. The mode
+    defaults to MENTAL_HEALTH_BOT_EXECUTION_MODE /
+    MENTAL_HEALTH_BOT_WORKERS / MENTAL_HEALTH_BOT_WORKER_MIN_BATCH.
+    
+    With ``fast_path`` (the default) the crisis detector runs first and a ``high`` level is
+    answered straight away with the crisis response, without waiting for the LLM. Set
+    ``background_enrichment`` to still run the emotion analysis afterwards; it replaces the
+    placeholder in the returned ``agent_results`` and is passed to ``on_enrichment``.
+    
+    ``resource_index`` (default: MENTAL_HEALTH_BOT_RESOURCE_INDEX) adds nearby services for
+    the detected issues to ``final_response['local_services']``.
+    """
     
-    def __init__(self):
+    def __init__(self, agent_timeouts: Dict[str, float] = None, ai_integration: GeminiAIIntegration = None,
+                 execution_mode: str = None, workers: int = None, worker_pool: WorkerPool = None,
+                 fast_path: bool = True, background_enrichment: bool = False,
+                 on_enrichment: Callable[[Dict], Any] = None, resource_index: ResourceIndex = None,
+                 pool_min_batch: int = None):
         self.crisis_agent = CrisisDetectionAgent()
-        self.emotion_agent = EmotionAnalysisAgent()
+        self.emotion_agent = EmotionAnalysisAgent(ai_integration)
         self.support_agent = SupportPlanningAgent()
-        self.resource_agent = ResourceMatchingAgent()
+        self.resource_agent = ResourceMatchingAgent(resource_index)
+        self.agent_timeouts = {**DEFAULT_AGENT_TIMEOUTS, **(agent_timeouts or {})}
+        self.tools = get_mental_health_tools()
+        catalog = get_response_catalog()
+        self.templates = TemplateRenderer(catalog['paragraph_templates'],
+                                          defaults={'crisis_resource': catalog['crisis_resource']})
+        self.fast_path = fast_path
+        self.background_enrichment = background_enrichment
+        self.on_enrichment = on_enrichment
+        self._enrichment_tasks = set()
         
-    async def process_message(self, message: str, user_context: Dict) -> Dict:
+        self.execution_mode = 'process' if worker_pool is not None else (execution_mode or config.EXECUTION_MODE)
+        if self.execution_mode not in config.EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {self.execution_mode}")
+        if worker_pool is None and self.execution_mode == 'process':
+            worker_pool = WorkerPool(workers or config.WORKER_PROCESSES)
+            worker_pool.warm()
+        self.worker_pool = worker_pool
+        self.pool_min_batch = pool_min_batch if pool_min_batch is not None else config.WORKER_MIN_BATCH
+    
+    async def assess(self, message: str, features: MessageFeatures = None) -> Tuple[MessageFeatures, Dict]:
+        """Message features and rule-based crisis assessment (always inline)"""
+        features = MessageFeatures.of(message, features)
+        return features, self.tools.crisis_detector(message, features)
+    
+    async def assess_batch(self, messages: List[str]) -> List[Tuple[MessageFeatures, Dict]]:
+        """assess() for a whole batch, split across the workers when enabled and large enough"""
+        if self.worker_pool is not None and len(messages) >= self.pool_min_batch:
+            return await self.worker_pool.assess_batch(messages)
+        features = [MessageFeatures(message) for message in messages]
+        return list(zip(features, self.tools.crisis_detector_batch(messages, features)))
+    
+    def close(self):
+        """Shut down the worker pool, if any"""
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+        
+    async def process_message(self, message: str, user_context: Dict, features: MessageFeatures = None,
+                              crisis_data: Dict = None) -> Dict:
         """Process message through all parallel agents"""
         print("🔄 Activating parallel agents...")
         
-        # Run all agents in parallel
+        # Parse the message once; every agent reads from the same features
+        if crisis_data is None and self.fast_path:
+            features, crisis_data = await self.assess(message, features)
+        features = MessageFeatures.of(message, features)
+        
+        # Stage 1: a high crisis level is answered without waiting for the LLM
+        if self.fast_path and crisis_data['crisis_level'] == 'high':
+            return await self._crisis_fast_path(message, user_context, features, crisis_data)
+        
+        # Stage 2: run all agents in parallel, each within its own latency budget
+        latencies = {}
         tasks = [
-            asyncio.create_task(self.crisis_agent.detect_crisis(message, user_context)),
-            asyncio.create_task(self.emotion_agent.analyze_emotions(message, user_context)),
-            asyncio.create_task(self.support_agent.create_support_plan(message, user_context)),
-            asyncio.create_task(self.resource_agent.match_resources(message, user_context))
+            asyncio.create_task(self._run_with_budget(
+                'crisis_detector', self.crisis_agent.detect_crisis(message, user_context, features, crisis_data),
+                self.crisis_agent, message, user_context, features, latencies)),
+            asyncio.create_task(self._run_with_budget(
+                'emotion_analyzer', self.emotion_agent.analyze_emotions(message, user_context, features, crisis_data),
+                self.emotion_agent, message, user_context, features, latencies)),
+            asyncio.create_task(self._run_with_budget(
+                'support_planner', self.support_agent.create_support_plan(message, user_context, features),
+                self.support_agent, message, user_context, features, latencies)),
+            asyncio.create_task(self._run_with_budget(
+                'resource_matcher', self.resource_agent.match_resources(message, user_context, features, crisis_data),
+                self.resource_agent, message, user_context, features, latencies))
         ]
         
         # Collect results
@@ -46,8 +141,179 @@ class ParallelAgentsSystem:
             "agent_results": agent_results,
             "final_response": final_response,
             "agents_used": len([r for r in results if not isinstance(r, Exception)]),
+            "agent_latency_ms": latencies,
+            "fast_path": False,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def _crisis_fast_path(self, message: str, user_context: Dict, features: MessageFeatures,
+                                crisis_data: Dict) -> Dict:
+        """Rule-based agents only; the emotion analysis is a placeholder or deferred"""
+        latencies = {}
+        results = await self._rule_based_agents(message, user_context, features, crisis_data, latencies)
+        
+        emotion_result = self.emotion_agent.fallback_result(message, user_context, features)
+        emotion_result['deferred' if self.background_enrichment else 'skipped'] = True
+        latencies['emotion_analyzer'] = 0.0
+        
+        agent_results = self._collect_results(results[0], emotion_result, results[1], results[2])
+        output = {
+            "agent_results": agent_results,
+            "final_response": self.synthesize_responses(agent_results),
+            "agents_used": len([r for r in agent_results.values() if 'error' not in r]),
+            "agent_latency_ms": latencies,
+            "fast_path": True,
             "timestamp": datetime.now().isoformat()
         }
+        
+        if self.background_enrichment:
+            task = asyncio.ensure_future(self._enrich(message, user_context, features, crisis_data, output))
+            self._enrichment_tasks.add(task)
+            task.add_done_callback(self._enrichment_tasks.discard)
+        return output
+    
+    async def _enrich(self, message: str, user_context: Dict, features: MessageFeatures, crisis_data: Dict,
+                      output: Dict):
+        """Finish the skipped emotion analysis after the crisis response went out"""
+        try:
+            output['agent_results']['emotion_analyzer'] = await self.emotion_agent.analyze_emotions(
+                message, user_context, features, crisis_data)
+        except Exception as e:
+            print(f"⚠️ Background enrichment failed: {e}")
+            return
+        if self.on_enrichment is not None:
+            self.on_enrichment(output)
+    
+    async def wait_for_enrichment(self):
+        """Wait until every background enrichment has finished"""
+        if self._enrichment_tasks:
+            await asyncio.gather(*list(self._enrichment_tasks), return_exceptions=True)
+    
+    def _rule_based_agents(self, message: str, user_context: Dict, features: MessageFeatures,
+                           crisis_data: Dict, latencies: Dict) -> asyncio.Future:
+        """Crisis, support and resource agents (no LLM), gathered with their budgets"""
+        return asyncio.gather(
+            self._run_with_budget(
+                'crisis_detector', self.crisis_agent.detect_crisis(message, user_context, features, crisis_data),
+                self.crisis_agent, message, user_context, features, latencies),
+            self._run_with_budget(
+                'support_planner', self.support_agent.create_support_plan(message, user_context, features),
+                self.support_agent, message, user_context, features, latencies),
+            self._run_with_budget(
+                'resource_matcher', self.resource_agent.match_resources(message, user_context, features, crisis_data),
+                self.resource_agent, message, user_context, features, latencies),
+            return_exceptions=True
+        )
+    
+    def _collect_results(self, crisis_result, emotion_result, support_result, resource_result) -> Dict:
+        agent_results = {
+            'crisis_detector': crisis_result,
+            'emotion_analyzer': emotion_result,
+            'support_planner': support_result,
+            'resource_matcher': resource_result
+        }
+        for name, result in agent_results.items():
+            if isinstance(result, Exception):
+                agent_results[name] = {"error": str(result)}
+        return agent_results
+    
+    async def stream_message(self, message: str, user_context: Dict, features: MessageFeatures = None,
+                             crisis_data: Dict = None) -> AsyncIterator[Dict]:
+        """process_message with the reply streamed as it is generated
+        
+        Yields ``header`` and ``token`` events from the emotion agent, then one ``done``
+        event whose ``result`` matches process_message. For a high crisis level the crisis
+        response is the first text yielded and the LLM is not asked for a reply.
+        """
+        if crisis_data is None:
+            features, crisis_data = await self.assess(message, features)
+        features = MessageFeatures.of(message, features)
+        
+        latencies = {}
+        start_time = time.perf_counter()
+        rule_based = self._rule_based_agents(message, user_context, features, crisis_data, latencies)
+        
+        try:
+            crisis_level = crisis_data['crisis_level']
+            if crisis_level == 'high':
+                crisis_result = (await rule_based)[0]
+                if not isinstance(crisis_result, Exception):
+                    yield {"type": "token", "text": crisis_result['coping_strategy']}
+        
+            emotion_result = None
+            async for event in self._stream_with_budget(message, user_context, features, crisis_data):
+                if event['type'] == 'done':
+                    emotion_result = event['result']
+                else:
+                    yield event
+            latencies['emotion_analyzer'] = round((time.perf_counter() - start_time) * 1000, 2)
+        
+            crisis_result, support_result, resource_result = await rule_based
+        finally:
+            rule_based.cancel()
+        
+        agent_results = self._collect_results(crisis_result, emotion_result, support_result, resource_result)
+        
+        yield {
+            "type": "done",
+            "result": {
+                "agent_results": agent_results,
+                "final_response": self.synthesize_responses(agent_results),
+                "agents_used": len([r for r in agent_results.values() if 'error' not in r]),
+                "agent_latency_ms": latencies,
+                "fast_path": crisis_level == 'high',
+                "timestamp": datetime.now().isoformat()
+            }
+        }
+
+    async def _stream_with_budget(self, message: str, user_context: Dict, features: MessageFeatures,
+                                  crisis_data: Dict) -> AsyncIterator[Dict]:
+        """stream_emotions bounded by the emotion agent's latency budget, like _run_with_budget
+        
+        The budget covers the wait for the header and first token as well as the whole stream.
+        When it runs out the stream is cancelled and the fallback result is used; its reply is
+        yielded as text unless the crisis response is the reply.
+        """
+        timeout = self.agent_timeouts.get('emotion_analyzer')
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        stream = self.emotion_agent.stream_emotions(message, user_context, features, crisis_data)
+        text_sent = False
+        
+        try:
+            while True:
+                remaining = None if deadline is None else max(deadline - loop.time(), 0)
+                try:
+                    event = await asyncio.wait_for(stream.__anext__(), remaining)
+                except StopAsyncIteration:
+                    return
+                text_sent = text_sent or event['type'] == 'token'
+                yield event
+        except asyncio.TimeoutError:
+            print(f"⏱️ emotion_analyzer exceeded its {timeout}s budget - using fallback")
+            result = self.emotion_agent.fallback_result(message, user_context, features)
+            result['timed_out'] = True
+            if crisis_data['crisis_level'] != 'high':
+                yield {"type": "token", "text": ("\n\n" if text_sent else "") + result['agent_response']}
+            yield {"type": "done", "result": result}
+        finally:
+            await stream.aclose()
+    
+    async def _run_with_budget(self, agent_name: str, coro, agent, message: str, user_context: Dict,
+                               features: MessageFeatures, latencies: Dict) -> Dict:
+        """Await one agent, swapping in its fallback result if it misses the deadline"""
+        timeout = self.agent_timeouts.get(agent_name)
+        start_time = time.perf_counter()
+        
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            print(f"⏱️ {agent_name} exceeded its {timeout}s budget - using fallback")
+            result = agent.fallback_result(message, user_context, features)
+            result['timed_out'] = True
+            return result
+        finally:
+            latencies[agent_name] = round((time.perf_counter() - start_time) * 1000, 2)
     
     def synthesize_responses(self, agent_results: Dict) -> Dict:
         """Synthesize responses from all agents into final output"""
@@ -62,7 +328,7 @@ class ParallelAgentsSystem:
         if crisis_level == 'high':
             primary_response = crisis_data.get('coping_strategy', 'Please seek immediate help.')
         else:
-            primary_response = emotion_data.get('therapeutic_approach', 'I am here to support you.')
+            primary_response = emotion_data.get('agent_response', 'I am here to support you.')
         
         # Generate paragraph response
         response_text = self._generate_paragraph_response(crisis_level, emotion_data, crisis_data)
@@ -74,31 +340,40 @@ class ParallelAgentsSystem:
             "emotions": emotion_data.get('emotions_detected', 'processing'),
             "support_plan": support_data.get('support_plan', {}),
             "resources": resource_data.get('matched_resources', {}),
+            "local_services": resource_data.get('local_services', []),
             "comprehensive_analysis": True,
             "agents_involved": len(agent_results)
         }
     
     def _generate_paragraph_response(self, crisis_level: str, emotion_data: Dict, crisis_data: Dict) -> str:
         """Generate paragraph-length response based on crisis level"""
-        emotions = emotion_data.get('emotions_detected', 'your feelings')
-        strategy = crisis_data.get('coping_strategy', 'deep breathing and mindfulness')
-        resources = "Crisis Text Line (Text HOME to 741741)"
-        
-        if crisis_level == 'high':
-            return f"""Thank you for sharing, and please know that your **safety** is the absolute priority right now. It sounds like you are in a moment of extreme distress. **Please use the immediate crisis resource we have provided: {resources}.** Reaching out right now is an act of courage and strength. Remember that these intense feelings are temporary, but the support available to you is permanent. We are here for you; please reach out for help immediately."""
-        
-        elif crisis_level == 'medium':
-            return f"""I hear the intensity of your **{emotions}** and how overwhelming this must feel. It takes immense courage to articulate these feelings, and you are not alone in this. Let's work on grounding ourselves: when you are ready, try the coping strategy of **{strategy}**. Focusing on a physical or mental exercise can help regain a sense of control over your immediate surroundings. Remember to be kind to yourself—you are stronger than you feel right now, and this will pass."""
-        
-        else:  # low crisis level
-            return f"""Thank you for showing the courage to talk about your **{emotions}**. It is completely valid to feel this way, and acknowledging it is the first step toward positive change. We can explore a helpful strategy like **{strategy}** to manage your current feelings. Building connection and finding motivation is a journey, and I am here to listen and help you explore small, manageable steps forward. Take a moment to validate your own strength in reaching out."""
+        template = crisis_level if crisis_level in ('high', 'medium') else 'low'
+        return self.templates.render(
+            template,
+            emotions=emotion_data.get('emotions_detected', 'your feelings'),
+            strategy=crisis_data.get('coping_strategy', 'deep breathing and mindfulness')
+        )
 
 class MentalHealthOrchestrator:
-    """Main orchestrator that coordinates all system components"""
+    """Main orchestrator that coordinates all system components
+    
+    Messages with a ``user_id`` (or else a ``session_id``) are recorded in ``memory``, and a
+    summary of the earlier turns is passed to the agents as ``user_context``. Their risk
+    scores also update ``trajectory``, reported as ``risk_trajectory`` in the output.
+    """
     
-    def __init__(self):
-        self.parallel_agents = ParallelAgentsSystem()
-        self.tools = MENTAL_HEALTH_TOOLS
+    def __init__(self, agent_timeouts: Dict[str, float] = None, ai_integration: GeminiAIIntegration = None,
+                 execution_mode: str = None, workers: int = None, memory: ConversationMemory = None,
+                 trajectory: RiskTrajectoryTracker = None):
+        self.parallel_agents = ParallelAgentsSystem(agent_timeouts, ai_integration, execution_mode, workers)
+        self.tools = get_mental_health_tools()
+        self.memory = memory if memory is not None else ConversationMemory(config.MEMORY_PATH)
+        self.trajectory = trajectory if trajectory is not None else RiskTrajectoryTracker()
+    
+    def close(self):
+        """Persist conversation memory and shut down the worker pool"""
+        self.memory.close()
+        self.parallel_agents.close()
         
     async def process_user_message(self, user_message: str, user_id: str = None, session_id: str = None) -> Dict:
         """Main method to process user messages through entire system"""
@@ -109,11 +384,77 @@ class MentalHealthOrchestrator:
         print(f"🎯 Processing message for user: {user_id}")
         
         # Step 1: Initial crisis assessment
-        initial_crisis = self.tools.crisis_detector(user_message)
+        features, initial_crisis = await self.parallel_agents.assess(user_message)
+        
+        return await self._complete_processing(user_message, user_id, session_id, features, initial_crisis, start_time)
+    
+    async def process_many(self, messages: Iterable[str], concurrency: int = 8, batch_size: int = 256,
+                           user_id: str = None, session_id: str = None) -> AsyncIterator[Dict]:
+        """Score many messages (e.g. archived transcripts), yielding results in input order
         
-        # Step 2: Parallel agent processing
-        user_context = {}  # Could be extended with user history
-        agent_results = await self.parallel_agents.process_message(user_message, user_context)
+        The rule-based crisis assessment runs over whole batches at once (split across the
+        worker pool in process mode when a batch reaches ``pool_min_batch``); only the agent/LLM
+        stage fans out, with at most ``concurrency`` messages in flight. Memory and the risk
+        trajectory are updated as results are yielded, so they follow the input order; the
+        messages in flight together see the conversation as it was when they started.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        pending = deque()
+        iterator = iter(messages)
+        
+        async def complete(message, features, crisis, start_time):
+            async with semaphore:
+                agent_results = await self._run_agents(message, user_id, session_id, features, crisis)
+            return message, crisis, agent_results, start_time
+        
+        async def finish(completed):
+            return await self._finish_processing(*completed[:3], user_id, session_id, completed[3])
+        
+        try:
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                start_time = time.time()
+                assessments = await self.parallel_agents.assess_batch(batch)
+                
+                for message, (message_features, crisis) in zip(batch, assessments):
+                    pending.append(asyncio.ensure_future(complete(message, message_features, crisis, start_time)))
+                
+                # Stream finished results while keeping at most one extra batch queued
+                while pending and (pending[0].done() or len(pending) > batch_size):
+                    yield await finish(await pending.popleft())
+            
+            while pending:
+                yield await finish(await pending.popleft())
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def _complete_processing(self, user_message: str, user_id: str, session_id: str,
+                                   features: MessageFeatures, initial_crisis: Dict, start_time: float) -> Dict:
+        """Agent stage and output assembly for one message"""
+        agent_results = await self._run_agents(user_message, user_id, session_id, features, initial_crisis)
+        return await self._finish_processing(user_message, initial_crisis, agent_results, user_id, session_id, start_time)
+    
+    async def _run_agents(self, user_message: str, user_id: str, session_id: str,
+                          features: MessageFeatures, initial_crisis: Dict) -> Dict:
+        """Parallel agent processing, with a summary of the conversation so far"""
+        memory_key = user_id or session_id
+        user_context = await self.memory.acontext(memory_key) if memory_key else {}
+        return await self.parallel_agents.process_message(
+            user_message, user_context, features, crisis_data=initial_crisis)
+    
+    async def _finish_processing(self, user_message: str, initial_crisis: Dict, agent_results: Dict,
+                           user_id: str, session_id: str, start_time: float) -> Dict:
+        """Record the turn in memory and the risk trajectory, then assemble the output"""
+        memory_key = user_id or session_id
+        risk_trajectory = None
+        if memory_key:
+            await self.memory.arecord(memory_key, user_message, initial_crisis['crisis_level'],
+                                      initial_crisis['risk_score'], agent_results['final_response'].get('emotions', ''))
+            risk_trajectory = self.trajectory.update(memory_key, initial_crisis['risk_score'],
+                                                     initial_crisis['emotional_intensity'], initial_crisis['crisis_level'])
         
         # Step 3: Generate comprehensive output
         processing_time = time.time() - start_time
@@ -125,9 +466,11 @@ class MentalHealthOrchestrator:
             'crisis_assessment': initial_crisis,
             'agent_analysis': agent_results['agent_results'],
             'final_response': agent_results['final_response'],
+            'risk_trajectory': risk_trajectory,
             'system_metrics': {
                 'agents_used': agent_results['final_response'].get('agents_involved', 0),
                 'crisis_detected': initial_crisis['crisis_level'] in ['medium', 'high'],
+                'risk_escalating': bool(risk_trajectory and risk_trajectory['escalating']),
             },
             'timestamp': datetime.now().isoformat()
         }
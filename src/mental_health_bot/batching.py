@@ -0,0 +1,164 @@
+from typing import Dict, Any, List, Callable, Tuple
+import asyncio
+import re
+import weakref
+
+from .response_parser import is_complete
+
+ITEM_LINE = re.compile(r'^\s*\[(\d+)\]\s?(.*)$')
+ITEM_MARKER = re.compile(r'\[\s*(\d+)\s*\]')
+
+def _quote(text: str) -> str:
+    """User text as one line that cannot close its quotes or pose as another item
+
+    Line breaks become spaces, double quotes become single quotes and ``[n]`` markers become
+    ``(n)``, so nothing a user writes can start an answer line for another message.
+    """
+    return ITEM_MARKER.sub(r'(\1)', " ".join(text.split()).replace('"', "'"))
+
+def build_batch_prompt(items: List[Tuple[str, Dict]]) -> str:
+    """Multi-message prompt using the EMOTIONS/URGENCY/... protocol with item indices"""
+    messages = "\n".join(
+        f'[{index}] User Message: "{_quote(text)}"\n    Context: {_quote(str(context or "No additional context"))}'
+        for index, (text, context) in enumerate(items, 1)
+    )
+    return f"""
+                MENTAL HEALTH BATCH ANALYSIS REQUEST:
+
+                Analyze each numbered user message independently.
+
+{messages}
+
+                For EVERY message, answer in this format, prefixing each line with the
+                message index in square brackets:
+                [1] EMOTIONS: [comma separated emotions]
+                [1] URGENCY: [low/medium/high]
+                [1] NEEDS: [key support needs]
+                [1] APPROACH: [therapeutic approach]
+                [1] RESPONSE: [compassionate response]
+                [2] EMOTIONS: ...
+                """
+
+def split_batch_response(ai_text: str, size: int = None) -> Dict[int, str]:
+    """Group indexed answer lines back into one block of text per item
+
+    With ``size``, lines indexed outside ``1..size`` (and their continuations) are dropped.
+    """
+    blocks: Dict[int, List[str]] = {}
+    current = None
+    for line in ai_text.split('\n'):
+        match = ITEM_LINE.match(line)
+        if match:
+            current = int(match.group(1))
+            if size is not None and not 1 <= current <= size:
+                current = None
+                continue
+            blocks.setdefault(current, []).append(match.group(2))
+        elif current is not None and line.strip():
+            blocks[current].append(line)  # Continuation of a multi-line field
+    return {index: "\n".join(lines) for index, lines in blocks.items()}
+
+class MicroBatcher:
+    """Collect analysis requests for up to ``max_wait_ms`` or ``max_batch_size`` items and
+    send them to the LLM as one prompt
+
+    Each answer is split back to its caller by index and parsed with ``parse_batch_item``
+    (the batch prompt asks for the tagged format; defaults to ``parse_response``). Items missing from the batched answer, or whose EMOTIONS/URGENCY did not parse, are
+    retried on their own with ``build_single_prompt``.
+    """
+
+    def __init__(self, llm_client, parse_response: Callable[[str], Dict],
+                 build_single_prompt: Callable[[str, Dict], str],
+                 max_batch_size: int = 8, max_wait_ms: float = 20.0,
+                 parse_batch_item: Callable[[str], Dict] = None):
+        self.llm_client = llm_client
+        self.parse_response = parse_response
+        self.parse_batch_item = parse_batch_item or parse_response
+        self.build_single_prompt = build_single_prompt
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = weakref.WeakKeyDictionary()
+        self._timers = weakref.WeakKeyDictionary()
+        self._tasks = set()
+
+        self.batches_sent = 0
+        self.items_batched = 0
+        self.single_calls = 0
+        self.fallback_items = 0
+
+    async def submit(self, text: str, context: Dict = None) -> Dict:
+        """Queue one message and wait for its share of the batched answer"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(loop, [])
+        pending.append((text, context, future))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif loop not in self._timers:
+            self._timers[loop] = loop.call_later(self.max_wait, self._flush, loop)
+
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        timer = self._timers.pop(loop, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(loop, [])
+        if batch:
+            task = loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, Dict, asyncio.Future]]):
+        if len(batch) == 1:
+            text, context, future = batch[0]
+            await self._single(text, context, future)
+            return
+
+        self.batches_sent += 1
+        self.items_batched += len(batch)
+        try:
+            ai_text = await self.llm_client.generate(build_batch_prompt([(t, c) for t, c, _ in batch]))
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        blocks = split_batch_response(ai_text, len(batch))
+        retries = []
+        for index, (text, context, future) in enumerate(batch, 1):
+            if future.done():
+                continue
+            block = blocks.get(index)
+            result = self.parse_batch_item(block) if block else None
+            if result is not None and is_complete(result):
+                future.set_result(result)
+            else:
+                self.fallback_items += 1
+                retries.append(self._single(text, context, future))
+
+        if retries:
+            await asyncio.gather(*retries)
+
+    async def _single(self, text: str, context: Dict, future: asyncio.Future):
+        self.single_calls += 1
+        try:
+            result = self.parse_response(await self.llm_client.generate(self.build_single_prompt(text, context)))
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "batches_sent": self.batches_sent,
+            "items_batched": self.items_batched,
+            "avg_batch_size": round(self.items_batched / self.batches_sent, 2) if self.batches_sent else 0.0,
+            "single_calls": self.single_calls,
+            "fallback_items": self.fallback_items
+        }
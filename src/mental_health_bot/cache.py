@@ -0,0 +1,233 @@
+from typing import Dict, Any, Optional, Tuple, Callable
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_message(text: str) -> str:
+    """Canonical form used for cache keys: lowercase, single spaces, no trailing punctuation"""
+    return _WHITESPACE.sub(' ', text.lower()).strip().rstrip('.!?,;: ')
+
+# user_context fields from ConversationMemory.context() change on every turn. Hashing them would
+# give every returning user a fresh key, so only a coarse flag derived from them is kept
+VOLATILE_CONTEXT_KEYS = frozenset(('previous_turns', 'average_risk', 'peak_risk', 'crisis_counts',
+                                   'recent_crisis_levels', 'recent_emotions'))
+
+def stable_context(context: Dict = None) -> Dict:
+    """The part of ``context`` that goes into the cache key"""
+    if not context:
+        return {}
+    stable = {key: value for key, value in context.items() if key not in VOLATILE_CONTEXT_KEYS}
+    if 'high' in context.get('recent_crisis_levels', ()):
+        stable['recent_high_crisis'] = True
+    return stable
+
+def make_cache_key(text: str, context: Dict = None) -> str:
+    """Key on the normalized message plus a hash of the stable part of the context"""
+    context_blob = json.dumps(stable_context(context), sort_keys=True, default=str)
+    digest = hashlib.sha256()
+    digest.update(normalize_message(text).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(context_blob.encode('utf-8'))
+    return digest.hexdigest()
+
+class SQLiteCacheBackend:
+    """On-disk store so cached analyses survive restarts"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Dict, expires_at: float):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+
+    def prune(self, now: float) -> int:
+        """Drop expired rows, returning how many were removed"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (now,)).rowcount
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analysis_cache")
+
+    def close(self):
+        self._conn.close()
+
+class AnalysisCache:
+    """Bounded LRU cache with a TTL for AI analyses, optionally backed by SQLite
+
+    Expired rows are pruned from the backend when the cache opens and every
+    ``prune_every`` writes. From async code use ``aget``/``aset``: memory hits are
+    answered inline, but SQLite reads and writes run in a worker thread so disk I/O
+    never blocks the event loop.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600.0,
+                 backend: SQLiteCacheBackend = None, clock: Callable[[], float] = time.time,
+                 prune_every: int = 1000):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self.clock = clock
+        self.prune_every = prune_every
+        self._entries: 'OrderedDict[str, Tuple[Dict, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._backend_writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.pruned = 0
+
+        if backend is not None:
+            self.prune()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a copy of the cached analysis, or None"""
+        now = self.clock()
+        value = self._get_memory(key, now)
+        if value is None and self.backend is not None:
+            value = self._get_disk(key, now)
+        return self._found(value)
+
+    async def aget(self, key: str) -> Optional[Dict]:
+        """get() with the SQLite lookup off the event loop"""
+        now = self.clock()
+        value = self._get_memory(key, now)
+        if value is None and self.backend is not None:
+            value = await asyncio.get_running_loop().run_in_executor(None, self._get_disk, key, now)
+        return self._found(value)
+
+    def _get_memory(self, key: str, now: float) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+            return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[Dict]:
+        stored = self.backend.get(key)
+        if stored is None:
+            return None
+        value, expires_at = stored
+        if expires_at > now:
+            with self._lock:
+                self._insert(key, value, expires_at)
+                self.hits += 1
+                self.disk_hits += 1
+            return value
+        self.backend.delete(key)
+        with self._lock:
+            self.expirations += 1
+        return None
+
+    def _found(self, value: Optional[Dict]) -> Optional[Dict]:
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        return dict(value, cached=True)
+
+    def set(self, key: str, value: Dict):
+        """Store an analysis, evicting the least recently used entry when full"""
+        expires_at = self._set_memory(key, value)
+        if self.backend is not None:
+            self._set_disk(key, value, expires_at)
+
+    async def aset(self, key: str, value: Dict):
+        """set() with the SQLite write off the event loop"""
+        expires_at = self._set_memory(key, value)
+        if self.backend is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._set_disk, key, value, expires_at)
+
+    def _set_memory(self, key: str, value: Dict) -> float:
+        expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._insert(key, value, expires_at)
+        return expires_at
+
+    def _set_disk(self, key: str, value: Dict, expires_at: float):
+        self.backend.set(key, value, expires_at)
+        with self._lock:
+            self._backend_writes += 1
+            due = self.prune_every and self._backend_writes % self.prune_every == 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop expired rows from the backend, returning how many were removed"""
+        if self.backend is None:
+            return 0
+        removed = self.backend.prune(self.clock())
+        with self._lock:
+            self.pruned += removed
+        return removed
+
+    def _insert(self, key: str, value: Dict, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "pruned": self.pruned,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
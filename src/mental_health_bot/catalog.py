@@ -0,0 +1,56 @@
+"""
+Precomputed response catalog
+
+Support plans, resource lists, coping strategies and paragraph templates are constant, so
+they are read once from ``data/response_catalog.json`` and frozen: mappings become
+``MappingProxyType`` and lists become tuples. Agents hand out these shared objects instead
+of building the same nested dicts on every request; serialize them with
+``json_default``, or ``thaw`` a copy to edit.
+"""
+
+from typing import Any, Mapping, Optional
+import json
+import os
+from types import MappingProxyType
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'response_catalog.json')
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value: Any) -> Any:
+    """Mutable (and JSON-serializable) copy of a frozen catalog entry"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+def json_default(value: Any) -> Any:
+    """``default=`` hook for json.dump(s): serializes the read-only mappings agents return
+
+        json.dumps(output, default=json_default)
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def load_response_catalog(path: Optional[str] = None) -> Mapping[str, Any]:
+    """Read and freeze a catalog file"""
+    with open(path or DEFAULT_CATALOG_PATH, 'r', encoding='utf-8') as f:
+        return freeze(json.load(f))
+
+# Global catalog, loaded on first access
+_RESPONSE_CATALOG = None
+
+def get_response_catalog() -> Mapping[str, Any]:
+    """Shared frozen catalog"""
+    global _RESPONSE_CATALOG
+    if _RESPONSE_CATALOG is None:
+        _RESPONSE_CATALOG = load_response_catalog()
+    return _RESPONSE_CATALOG
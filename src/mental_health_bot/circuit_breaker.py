@@ -0,0 +1,164 @@
+"""
+Circuit breaker for the LLM backend
+
+The breaker watches the outcome and latency of the last ``window`` LLM calls. Once at least
+``min_calls`` have been seen and either the error rate reaches ``error_rate`` or the share
+of calls slower than ``slow_call_ms`` reaches ``slow_rate``, it opens: ``allow()`` returns
+False and callers answer from the simulated analysis straight away instead of waiting for
+another failure. After ``open_seconds`` it goes half-open and lets ``half_open_probes``
+calls through; if they all succeed quickly the circuit closes again, otherwise it reopens.
+
+    if breaker.allow():
+        start = time.perf_counter()
+        try:
+            text = await client.generate(prompt)
+        except Exception:
+            breaker.record_failure((time.perf_counter() - start) * 1000)
+            raise
+        breaker.record_success((time.perf_counter() - start) * 1000)
+"""
+
+from typing import Dict, Any, Callable
+from collections import deque
+import threading
+import time
+
+from . import config
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM while the circuit is open"""
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling window of call outcomes"""
+
+    def __init__(self, error_rate: float = None, slow_call_ms: float = None, open_seconds: float = None,
+                 slow_rate: float = 0.5, window: int = 20, min_calls: int = 5, half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.error_rate = error_rate if error_rate is not None else config.CIRCUIT_ERROR_RATE
+        self.slow_call_ms = slow_call_ms if slow_call_ms is not None else config.CIRCUIT_SLOW_CALL_MS
+        self.open_seconds = open_seconds if open_seconds is not None else config.CIRCUIT_OPEN_SECONDS
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+        self._state = CLOSED
+        self._outcomes = deque(maxlen=window)  # (failed, slow) per call
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _refresh(self):
+        if self._state == OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the LLM; a True in half-open state reserves a probe"""
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, elapsed_ms: float):
+        slow = elapsed_ms >= self.slow_call_ms
+        with self._lock:
+            self.calls += 1
+            self.slow_calls += slow
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                if slow:
+                    self._open()
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._close()
+            elif self._state == CLOSED:
+                self._add(False, slow)
+
+    def record_failure(self, elapsed_ms: float = 0.0):
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            if self._state == HALF_OPEN:
+                self._open()
+            elif self._state == CLOSED:
+                self._add(True, elapsed_ms >= self.slow_call_ms)
+
+    def record_cancelled(self, elapsed_ms: float):
+        """An allowed call abandoned without an answer (e.g. an agent latency budget ran out)
+
+        Counts as a slow call once it has run for ``slow_call_ms``; otherwise it is forgotten.
+        """
+        if elapsed_ms >= self.slow_call_ms:
+            self.record_success(elapsed_ms)
+            return
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def _add(self, failed: bool, slow: bool):
+        if len(self._outcomes) == self._outcomes.maxlen:
+            old_failed, old_slow = self._outcomes[0]
+            self._failures -= old_failed
+            self._slow -= old_slow
+        self._outcomes.append((failed, slow))
+        self._failures += failed
+        self._slow += slow
+        count = len(self._outcomes)
+        if count >= self.min_calls and (self._failures / count >= self.error_rate
+                                        or self._slow / count >= self.slow_rate):
+            self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self._probes_in_flight = 0
+        self.times_opened += 1
+
+    def _close(self):
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+        self._slow = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """State, rolling error/slow rates and lifetime counters"""
+        with self._lock:
+            self._refresh()
+            count = len(self._outcomes)
+            return {
+                "state": self._state,
+                "error_rate": round(self._failures / count, 4) if count else 0.0,
+                "slow_rate": round(self._slow / count, 4) if count else 0.0,
+                "calls": self.calls,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "retry_in_s": round(max(self._opened_at + self.open_seconds - self.clock(), 0.0), 3)
+                if self._state == OPEN else 0.0
+            }
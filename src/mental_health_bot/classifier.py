@@ -0,0 +1,119 @@
+"""
+Local emotion/urgency classifier
+
+A linear model over hashed word and bigram features. Hashing needs no vocabulary, so the
+whole model is one ``.npz`` file: the weight matrix, the labels and the emotion profile
+(emotions, urgency, needs, approach, response) each label stands for. Scoring a batch is a
+sparse matrix product, so thousands of messages per second fit on one core.
+
+    classifier = train_emotion_classifier(texts, labels)   # labels: keys of the profiles
+    classifier.save('emotion_classifier.npz')
+    EmotionClassifier.load('emotion_classifier.npz').predict("I can't stop worrying")
+
+``GeminiAIIntegration`` uses it as a tier between the cache and the LLM: confident
+predictions are answered locally and only ambiguous messages are sent to the model.
+"""
+
+from typing import List, Dict, Any, Mapping, Sequence
+import json
+
+from .catalog import get_response_catalog, thaw
+
+DEFAULT_N_FEATURES = 2 ** 14
+ARTIFACT_VERSION = 1
+
+def _vectorizer(n_features: int):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(n_features=n_features, ngram_range=(1, 2), alternate_sign=False,
+                             norm='l2', lowercase=True, dtype='float32')
+
+class EmotionClassifier:
+    """Hashing-vectorizer linear classifier returning the emotion analysis schema"""
+
+    def __init__(self, coef, intercept, labels: Sequence[str], profiles: Mapping[str, Mapping[str, str]],
+                 n_features: int = DEFAULT_N_FEATURES):
+        import numpy as np
+
+        self.coef_t = np.ascontiguousarray(np.asarray(coef, dtype=np.float32).T)
+        self.intercept = np.asarray(intercept, dtype=np.float32)
+        self.labels = list(labels)
+        self.profiles = {label: dict(profiles[label]) for label in self.labels}
+        self.n_features = n_features
+        self.vectorizer = _vectorizer(n_features)
+
+    @classmethod
+    def load(cls, path: str) -> 'EmotionClassifier':
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as artifact:
+            meta = json.loads(str(artifact['meta']))
+            if meta.get('version') != ARTIFACT_VERSION:
+                raise ValueError(f"Unsupported classifier artifact version: {meta.get('version')}")
+            return cls(artifact['coef'], artifact['intercept'], meta['labels'], meta['profiles'], meta['n_features'])
+
+    def save(self, path: str):
+        import numpy as np
+
+        meta = {'version': ARTIFACT_VERSION, 'labels': self.labels, 'profiles': self.profiles,
+                'n_features': self.n_features}
+        np.savez_compressed(path, coef=self.coef_t.T, intercept=self.intercept, meta=np.array(json.dumps(meta)))
+
+    def probabilities(self, texts: Sequence[str]):
+        """Softmax class probabilities, one row per text"""
+        import numpy as np
+
+        scores = self.vectorizer.transform(texts) @ self.coef_t + self.intercept
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Analysis dicts (same fields as the LLM analysis) plus ``label`` and ``confidence``"""
+        if not texts:
+            return []
+        probabilities = self.probabilities(texts)
+        best = probabilities.argmax(axis=1)
+        return [
+            dict(self.profiles[self.labels[index]], label=self.labels[index],
+                 confidence=round(float(probabilities[row, index]), 4), ai_generated=False, classifier=True)
+            for row, index in enumerate(best)
+        ]
+
+    def predict(self, text: str) -> Dict[str, Any]:
+        return self.predict_batch([text])[0]
+
+def train_emotion_classifier(texts: Sequence[str], labels: Sequence[str],
+                             profiles: Mapping[str, Mapping[str, str]] = None,
+                             n_features: int = DEFAULT_N_FEATURES, C: float = 10.0) -> EmotionClassifier:
+    """Fit a multinomial logistic regression on hashed features
+
+    ``labels`` name entries of ``profiles`` (by default the catalog's ``emotion_profiles``:
+    crisis, anxiety, sadness, connection).
+    """
+    from sklearn.linear_model import LogisticRegression
+
+    profiles = thaw(profiles if profiles is not None else get_response_catalog()['emotion_profiles'])
+    unknown = set(labels) - set(profiles)
+    if unknown:
+        raise ValueError(f"Labels without an emotion profile: {sorted(unknown)}")
+    if len(set(labels)) < 2:
+        raise ValueError("Need at least two labels to train a classifier")
+
+    model = LogisticRegression(C=C, max_iter=1000)
+    model.fit(_vectorizer(n_features).transform(texts), labels)
+    coef, intercept = model.coef_, model.intercept_
+    if len(model.classes_) == 2:
+        # Binary models keep one row of weights; spell out both classes for the softmax
+        coef, intercept = [-coef[0] / 2, coef[0] / 2], [-intercept[0] / 2, intercept[0] / 2]
+    return EmotionClassifier(coef, intercept, [str(label) for label in model.classes_], profiles, n_features)
+
+# Classifiers loaded by this process, by path
+_CLASSIFIERS: Dict[str, EmotionClassifier] = {}
+
+def get_emotion_classifier(path: str) -> EmotionClassifier:
+    """Shared EmotionClassifier for ``path``, loaded on first use"""
+    classifier = _CLASSIFIERS.get(path)
+    if classifier is None:
+        classifier = _CLASSIFIERS[path] = EmotionClassifier.load(path)
+    return classifier
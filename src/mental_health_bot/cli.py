@@ -0,0 +1,290 @@
+"""
+Command line entry point for bulk crisis triage
+
+Streams a JSONL or CSV export of messages through crisis_detector (keyword matching,
+emotional intensity and risk score) in a process pool and writes one JSON result per line.
+Memory stays constant: records are read lazily, only a bounded number of chunks are in
+flight, and results are written in input order as soon as each chunk completes. A small
+checkpoint file records how far the output got, so an interrupted run can be resumed; it is
+only used if it names the same input file, at the same size, and the output still exists.
+Unreadable records (invalid JSON, CSV rows with a field over ``CSV_FIELD_SIZE_LIMIT``) are
+written as per-record errors instead of stopping the run.
+
+    mental-health-bot triage messages.jsonl -o triage.jsonl
+    mental-health-bot triage export.csv --text-field body --resume
+
+``build-index`` turns a JSONL directory of support services into the memory-mapped
+resource index used by ResourceMatchingAgent (see resource_index.py).
+
+    mental-health-bot build-index services.jsonl resource_index/
+
+``train-classifier`` fits the local emotion classifier (see classifier.py) on labelled messages.
+
+    mental-health-bot train-classifier labelled.jsonl -o emotion_classifier.npz
+"""
+
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque, Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+
+from .workers import init_worker, triage_batch
+from .resource_index import build_resource_index, DEFAULT_CELL_DEGREES
+from .classifier import train_emotion_classifier, DEFAULT_N_FEATURES
+
+DEFAULT_CHUNK_SIZE = 500
+CHECKPOINT_VERSION = 2
+CHECKPOINT_FIELDS = {'version': int, 'input': str, 'input_size': int, 'format': str, 'records': int,
+                     'input_offset': int, 'output_offset': int, 'complete': bool}
+CSV_FIELD_SIZE_LIMIT = 16 * 1024 * 1024  # the csv module's default of 128 KiB is too small for long messages
+
+# (index, record_id, text, error) as understood by workers.triage_batch
+Record = Tuple[int, Any, Optional[str], Optional[str]]
+
+def detect_format(path: str, fmt: str = 'auto') -> str:
+    if fmt != 'auto':
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def _make_record(index: int, row: Any, text_field: str, id_field: str, error: str = None) -> Record:
+    if error is not None:
+        return (index, index, None, error)
+    if not isinstance(row, dict):
+        return (index, index, None, "record is not an object")
+    record_id = row.get(id_field, index)
+    text = row.get(text_field)
+    if not isinstance(text, str):
+        return (index, record_id, None, f"missing text field '{text_field}'")
+    return (index, record_id, text, None)
+
+def read_jsonl(path: str, text_field: str, id_field: str, start_offset: int = 0,
+               start_index: int = 0) -> Iterator[Tuple[int, Record]]:
+    """Yield ``(input_offset_after_record, record)``; resumes by seeking to ``start_offset``"""
+    index = start_index
+    with open(path, 'rb') as f:
+        f.seek(start_offset)
+        offset = start_offset
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                row, error = json.loads(line), None
+            except ValueError as e:
+                row, error = None, f"invalid JSON: {e}"
+            yield offset, _make_record(index, row, text_field, id_field, error)
+            index += 1
+
+def read_csv(path: str, text_field: str, id_field: str, start_index: int = 0) -> Iterator[Tuple[int, Record]]:
+    """Yield ``(0, record)`` for each CSV row; resumes by skipping ``start_index`` rows"""
+    csv.field_size_limit(CSV_FIELD_SIZE_LIMIT)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        index = 0
+        while True:
+            try:
+                row, error = next(reader), None
+            except StopIteration:
+                return
+            except csv.Error as e:
+                row, error = None, f"invalid CSV: {e}"
+            if index >= start_index:
+                yield 0, _make_record(index, row, text_field, id_field, error)
+            index += 1
+
+def load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """The checkpoint in ``path``, or None if it is missing, unreadable or malformed"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+        return None
+    for field, kind in CHECKPOINT_FIELDS.items():
+        value = checkpoint.get(field)
+        if not isinstance(value, kind) or (kind is int and (isinstance(value, bool) or value < 0)):
+            return None
+    return checkpoint
+
+def checkpoint_matches(checkpoint: Dict[str, Any], input_path: str, output_path: str, fmt: str) -> bool:
+    """Whether ``checkpoint`` was written for this input (path, size and format) and output"""
+    try:
+        input_size, output_size = os.path.getsize(input_path), os.path.getsize(output_path)
+    except OSError:
+        return False
+    return (checkpoint['input'] == os.path.abspath(input_path) and checkpoint['input_size'] == input_size
+            and checkpoint['format'] == fmt and checkpoint['input_offset'] <= input_size
+            and checkpoint['output_offset'] <= output_size)
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    """Atomically replace the checkpoint file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+def _chunked(records: Iterator[Tuple[int, Record]], size: int) -> Iterator[List[Tuple[int, Record]]]:
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _run_inline(func, arg) -> Future:
+    future = Future()
+    future.set_result(func(arg))
+    return future
+
+def run_triage(input_path: str, output_path: str, fmt: str = 'auto', text_field: str = 'message',
+               id_field: str = 'id', workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               checkpoint_path: Optional[str] = None, resume: bool = False) -> Dict[str, Any]:
+    """Triage every record of ``input_path`` into ``output_path`` (JSONL)
+
+    ``workers=0`` runs in the current process. Returns a summary of this run.
+    """
+    fmt = detect_format(input_path, fmt)
+    if fmt not in ('jsonl', 'csv'):
+        raise ValueError(f"Unsupported input format: {fmt}")
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    if checkpoint and not checkpoint_matches(checkpoint, input_path, output_path, fmt):
+        checkpoint = None
+    state = checkpoint or {
+        'version': CHECKPOINT_VERSION,
+        'input': os.path.abspath(input_path),
+        'input_size': os.path.getsize(input_path),
+        'format': fmt,
+        'records': 0,
+        'input_offset': 0,
+        'output_offset': 0,
+        'complete': False
+    }
+    resumed_from = state['records']
+
+    if fmt == 'jsonl':
+        records = read_jsonl(input_path, text_field, id_field, state['input_offset'], state['records'])
+    else:
+        records = read_csv(input_path, text_field, id_field, state['records'])
+
+    summary = {"records": 0, "errors": 0, "crisis_levels": Counter(), "resumed_from": resumed_from}
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker) if workers > 0 else None
+    submit = executor.submit if executor else _run_inline
+    max_in_flight = max(1, workers) * 2
+
+    def write_chunk(out, input_offset: int, future: Future):
+        results = future.result()
+        out.write("".join(json.dumps(result) + "\n" for result in results).encode('utf-8'))
+        out.flush()
+        for result in results:
+            if 'error' in result:
+                summary['errors'] += 1
+            else:
+                summary['crisis_levels'][result['crisis_level']] += 1
+        summary['records'] += len(results)
+        state.update(records=results[-1]['index'] + 1, input_offset=input_offset, output_offset=out.tell())
+        save_checkpoint(checkpoint_path, state)
+
+    try:
+        with open(output_path, 'r+b' if checkpoint else 'wb') as out:
+            # Drop anything written after the last checkpoint
+            out.truncate(state['output_offset'])
+            out.seek(state['output_offset'])
+            state['complete'] = False
+
+            in_flight = deque()
+            for chunk in _chunked(records, chunk_size):
+                in_flight.append((chunk[-1][0], submit(triage_batch, [record for _, record in chunk])))
+                if len(in_flight) >= max_in_flight:
+                    write_chunk(out, *in_flight.popleft())
+            while in_flight:
+                write_chunk(out, *in_flight.popleft())
+
+        state['complete'] = True
+        save_checkpoint(checkpoint_path, state)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    summary['crisis_levels'] = dict(summary['crisis_levels'])
+    return summary
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='mental-health-bot', description="Mental health bot tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    triage = commands.add_parser('triage', help="Bulk crisis triage of a JSONL or CSV export")
+    triage.add_argument('input', help="JSONL or CSV file of messages")
+    triage.add_argument('-o', '--output', help="Results file (JSONL); defaults to <input>.triage.jsonl")
+    triage.add_argument('--format', choices=['auto', 'jsonl', 'csv'], default='auto')
+    triage.add_argument('--text-field', default='message', help="Field holding the message text")
+    triage.add_argument('--id-field', default='id', help="Field holding the record id")
+    triage.add_argument('--workers', type=int, default=None, help="Worker processes (0 runs inline)")
+    triage.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Records per task")
+    triage.add_argument('--checkpoint', help="Checkpoint file; defaults to <output>.checkpoint")
+    triage.add_argument('--resume', action='store_true', help="Continue from the checkpoint")
+
+    build_index = commands.add_parser('build-index', help="Build the resource index from a JSONL of services")
+    build_index.add_argument('input', help="JSONL file, one service per line")
+    build_index.add_argument('output', help="Index directory")
+    build_index.add_argument('--cell-degrees', type=float, default=DEFAULT_CELL_DEGREES,
+                             help="Size of a spatial grid cell in degrees")
+
+    train = commands.add_parser('train-classifier', help="Train the local emotion classifier")
+    train.add_argument('input', help="JSONL file of labelled messages")
+    train.add_argument('-o', '--output', default='emotion_classifier.npz', help="Classifier artifact (.npz)")
+    train.add_argument('--text-field', default='message', help="Field holding the message text")
+    train.add_argument('--label-field', default='label', help="Field holding the emotion profile name")
+    train.add_argument('--n-features', type=int, default=DEFAULT_N_FEATURES, help="Hashed feature dimensions")
+    return parser
+
+def read_json_lines(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'train-classifier':
+        rows = list(read_json_lines(args.input))
+        texts = [row[args.text_field] for row in rows]
+        labels = [row[args.label_field] for row in rows]
+        classifier = train_emotion_classifier(texts, labels, n_features=args.n_features)
+        classifier.save(args.output)
+        predicted = [result['label'] for result in classifier.predict_batch(texts)]
+        accuracy = sum(p == l for p, l in zip(predicted, labels)) / len(labels)
+        print(f"✅ Trained on {len(texts)} messages ({', '.join(classifier.labels)}), "
+              f"training accuracy {accuracy:.1%}, saved to {args.output}")
+        return 0
+
+    if args.command == 'build-index':
+        meta = build_resource_index(read_json_lines(args.input), args.output, cell_degrees=args.cell_degrees)
+        print(f"✅ Indexed {meta['count']} services ({len(meta['categories'])} categories, "
+              f"{len(meta['regions'])} regions) into {args.output}")
+        return 0
+
+    output = args.output or f"{args.input}.triage.jsonl"
+    summary = run_triage(args.input, output, fmt=args.format, text_field=args.text_field,
+                         id_field=args.id_field, workers=args.workers, chunk_size=args.chunk_size,
+                         checkpoint_path=args.checkpoint, resume=args.resume)
+
+    if summary['resumed_from']:
+        print(f"🔁 Resumed after {summary['resumed_from']} records")
+    print(f"✅ Triaged {summary['records']} records into {output}")
+    for level, count in sorted(summary['crisis_levels'].items()):
+        print(f"   {level:6s} {count}")
+    if summary['errors']:
+        print(f"⚠️ {summary['errors']} records could not be read")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,312 @@
-from typing import List, Dict, Any, Optional
-import google.generativeai as genai
+from typing import List, Dict, Any, Optional, Callable
+import hashlib
+import json
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-# Load environment variables from .env file
-load_dotenv()
+# Models to try, best first
+PRIORITY_MODELS = [
+    'models/gemini-2.0-flash-lite',
+    'models/gemini-2.0-flash-lite-001',
+    'models/gemma-3-1b-it',
+    'models/gemini-2.0-flash',
+    'models/gemini-2.5-flash',
+    'models/gemini-pro-latest'
+]
+
+DEFAULT_DISCOVERY_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'mental_health_bot', 'model_discovery.json')
+DISCOVERY_CACHE_TTL = 24 * 3600  # seconds
+PROBE_TIMEOUT = 10.0  # seconds for the whole concurrent probe
+
+# Where the CPU-bound agents run: 'inline' on the event loop, or 'process' in a worker pool
+EXECUTION_MODES = ('inline', 'process')
+EXECUTION_MODE = os.getenv('MENTAL_HEALTH_BOT_EXECUTION_MODE', 'inline')
+WORKER_PROCESSES = int(os.getenv('MENTAL_HEALTH_BOT_WORKERS', '0')) or None  # None means one per core
+# Smallest batch worth the pool's pickling round trip; single messages and smaller batches stay inline
+WORKER_MIN_BATCH = int(os.getenv('MENTAL_HEALTH_BOT_WORKER_MIN_BATCH', '64'))
+
+# Directory written by resource_index.build_resource_index; unset means catalog resources only
+RESOURCE_INDEX_PATH = os.getenv('MENTAL_HEALTH_BOT_RESOURCE_INDEX') or None
+
+# SQLite file for conversation turns that overflow memory.ConversationMemory; unset drops them
+MEMORY_PATH = os.getenv('MENTAL_HEALTH_BOT_MEMORY_DB') or None
+
+# Emotion classifier artifact (see classifier.py) answering confident cases without the LLM
+CLASSIFIER_PATH = os.getenv('MENTAL_HEALTH_BOT_CLASSIFIER') or None
+CLASSIFIER_THRESHOLD = float(os.getenv('MENTAL_HEALTH_BOT_CLASSIFIER_THRESHOLD', '0.8'))
+
+# Confidence the rule-based analyzers need to answer without the LLM (router.py); unset disables them
+ROUTER_THRESHOLD = float(os.environ['MENTAL_HEALTH_BOT_ROUTER_THRESHOLD']) if os.getenv('MENTAL_HEALTH_BOT_ROUTER_THRESHOLD') else None
+
+# Circuit breaker around the LLM (circuit_breaker.py): trip on this share of failed or slow calls
+CIRCUIT_ERROR_RATE = float(os.getenv('MENTAL_HEALTH_BOT_CIRCUIT_ERROR_RATE', '0.5'))
+CIRCUIT_SLOW_CALL_MS = float(os.getenv('MENTAL_HEALTH_BOT_CIRCUIT_SLOW_CALL_MS', '4000'))  # under the 5 s emotion budget
+CIRCUIT_OPEN_SECONDS = float(os.getenv('MENTAL_HEALTH_BOT_CIRCUIT_OPEN_SECONDS', '30'))
+
+# Answer format the analysis prompt asks the LLM for (response_parser.py reads both)
+RESPONSE_FORMATS = ('tagged', 'json')
+RESPONSE_FORMAT = os.getenv('MENTAL_HEALTH_BOT_RESPONSE_FORMAT', 'tagged')
 
 class GeminiAIConfigurator:
-    """Intelligent API configuration that finds working models automatically"""
-    
-    def __init__(self):
+    """Intelligent API configuration that finds working models automatically
+
+    Discovery is lazy: nothing touches the network until ``primary_model`` or
+    ``fallback_mode`` is first read (or ``discover_models`` is called). Candidate models are
+    probed concurrently, and the winner is remembered in a small cache file so that new
+    worker processes can skip the probe entirely.
+
+    The key is never installed process-wide with ``genai.configure``: every model is built
+    with clients bound to this configurator's own key, so configurators for different users'
+    keys can live in one process without their requests crossing over.
+    """
+
+    def __init__(self, api_key: str = None, priority_models: List[str] = None,
+                 probe_timeout: float = PROBE_TIMEOUT, cache_path: Optional[str] = None,
+                 cache_ttl: float = DISCOVERY_CACHE_TTL, model_factory: Callable = None):
+        self.api_key = api_key
+        self.priority_models = list(priority_models or PRIORITY_MODELS)
+        self.probe_timeout = probe_timeout
+        self.cache_path = cache_path if cache_path is not None else os.getenv('MENTAL_HEALTH_BOT_MODEL_CACHE', DEFAULT_DISCOVERY_CACHE)
+        self.cache_ttl = cache_ttl
+        self.model_factory = model_factory
+        self._clients = None  # SDK client manager bound to api_key
+
         self.working_models = []
-        self.primary_model = None
-        self.fallback_mode = False
-        
-    def discover_models(self):
+        self.primary_model_name = None
+        self._primary_model = None
+        self._fallback_mode = False
+        self._discovered = False
+        self._lock = threading.Lock()
+
+    @property
+    def primary_model(self):
+        self.ensure_discovered()
+        return self._primary_model
+
+    @primary_model.setter
+    def primary_model(self, model):
+        self._primary_model = model
+        self._discovered = True
+
+    @property
+    def fallback_mode(self) -> bool:
+        self.ensure_discovered()
+        return self._fallback_mode
+
+    @fallback_mode.setter
+    def fallback_mode(self, value: bool):
+        self._fallback_mode = value
+        self._discovered = True
+
+    @property
+    def discovered(self) -> bool:
+        """True once a discovery has finished and the model or fallback mode is settled"""
+        return self._discovered
+
+    def ensure_discovered(self):
+        """Run discovery once, on first use"""
+        if not self._discovered:
+            with self._lock:
+                if not self._discovered:
+                    self._discover()
+
+    def set_api_key(self, api_key: str) -> bool:
+        """Set the API key and configure Gemini"""
+        self.api_key = api_key.strip()
+        return self.discover_models()
+
+    def discover_models(self) -> bool:
         """Discover all available Gemini models"""
+        with self._lock:
+            return self._discover()
+
+    def _discover(self) -> bool:
+        # Readers only trust primary_model/fallback_mode once discovered is set again at the end
+        self._discovered = False
         try:
-            # Get API key from environment variable
-            api_key = os.getenv('GOOGLE_API_KEY')
-            
+            return self._run_discovery()
+        finally:
+            self._discovered = True
+
+    def _run_discovery(self) -> bool:
+        self.working_models = []
+
+        try:
+            # Get API key from the caller or the environment (.env supported)
+            if not self.api_key:
+                from dotenv import load_dotenv
+                load_dotenv()
+            api_key = self.api_key or os.getenv('GOOGLE_API_KEY')
+
             if not api_key:
                 raise ValueError("🔑 No GOOGLE_API_KEY found in environment variables!")
-                
-            genai.configure(api_key=api_key)
-            
+
+            # The SDK is heavy, so it is only imported once the LLM path is really used
+            self._clients = self._make_clients(api_key)
+            cache_key = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+            cached = self._load_cached_discovery(cache_key)
+            if cached:
+                self.working_models = cached['working_models']
+                self._use_model(cached['primary_model'], self._build_model(cached['primary_model']))
+                print(f"✅ Gemini AI configured from cache: {self.primary_model_name}")
+                return True
+
             print("🔍 Discovering available AI models...")
-            
-            # For local development, use a simpler approach
-            try:
-                # Try to use Gemini 2.0 Flash Lite (free tier)
-                self.primary_model = genai.GenerativeModel('gemini-2.0-flash-lite')
-                test_response = self.primary_model.generate_content("Say 'AI Ready'")
-                self.primary_model_name = 'gemini-2.0-flash-lite'
-                print("✅ Gemini AI configured successfully!")
-                self.fallback_mode = False
+            if self._probe_models():
+                self._save_cached_discovery(cache_key)
+                print(f"✅ Gemini AI configured successfully! ({self.primary_model_name})")
                 return True
-            except Exception as e:
-                print(f"❌ Gemini AI failed: {e}")
-                print("🔄 Switching to Advanced Simulated AI Mode...")
-                self.fallback_mode = True
-                return False
-                
+
+            print("❌ No working Gemini models found")
+            print("🔄 Switching to Advanced Simulated AI Mode...")
+            self._use_fallback()
+            return False
+
         except Exception as e:
             print(f"❌ AI Configuration Failed: {e}")
             print("🔄 Switching to Advanced Simulated AI Mode...")
-            self.fallback_mode = True
+            self._use_fallback()
             return False
 
-# Global configuration
+    @staticmethod
+    def _make_clients(api_key: str):
+        from google.generativeai import client as genai_client
+        clients = genai_client._ClientManager()
+        clients.configure(api_key=api_key)
+        return clients
+
+    def _build_model(self, model_name: str):
+        if self.model_factory is not None:
+            return self.model_factory(model_name)
+        return _key_bound_model_class()(model_name, self._clients)
+
+    def _probe(self, model_name: str):
+        model = self._build_model(model_name)
+        model.generate_content("Say 'AI Ready'")
+        return model
+
+    def _probe_models(self) -> bool:
+        """Probe every candidate at once; the best-ranked model that answers wins"""
+        executor = ThreadPoolExecutor(max_workers=len(self.priority_models), thread_name_prefix='model-probe')
+        futures = [(name, executor.submit(self._probe, name)) for name in self.priority_models]
+        deadline = time.monotonic() + self.probe_timeout
+
+        try:
+            # Wait while a better-ranked model is still pending; stop at the deadline
+            while True:
+                pending = [future for _, future in futures if not future.done()]
+                best = self._best_probe(futures, stop_at_pending=True)
+                remaining = deadline - time.monotonic()
+                if best is not None or not pending or remaining <= 0:
+                    break
+                wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        finally:
+            executor.shutdown(wait=False)
+
+        # At the deadline, the best model that did answer wins even if a better one hangs
+        best = self._best_probe(futures, stop_at_pending=False)
+        self.working_models = [
+            name for name, future in futures if future.done() and future.exception() is None
+        ]
+        if best is None:
+            return False
+        self._use_model(*best)
+        return True
+
+    @staticmethod
+    def _best_probe(futures, stop_at_pending: bool):
+        """(name, model) of the best-ranked successful probe
+
+        With ``stop_at_pending`` a still-running probe ranked above every success means
+        there is no answer yet (None).
+        """
+        for model_name, future in futures:
+            if not future.done():
+                if stop_at_pending:
+                    return None
+                continue
+            if future.exception() is None:
+                return model_name, future.result()
+        return None
+
+    def _use_model(self, model_name: str, model):
+        self.primary_model_name = model_name
+        self._primary_model = model
+        self._fallback_mode = False
+
+    def _use_fallback(self):
+        self.primary_model_name = None
+        self._primary_model = None
+        self._fallback_mode = True
+
+    def _load_cached_discovery(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f).get(cache_key)
+        except (OSError, ValueError):
+            return None
+        if not entry or entry.get('expires_at', 0) <= time.time():
+            return None
+        return entry
+
+    def _save_cached_discovery(self, cache_key: str):
+        if not self.cache_path:
+            return
+        try:
+            try:
+                with open(self.cache_path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = {}
+            entries[cache_key] = {
+                'primary_model': self.primary_model_name,
+                'working_models': self.working_models,
+                'expires_at': time.time() + self.cache_ttl
+            }
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ Could not save model discovery cache: {e}")
+
+_KEY_BOUND_MODEL = None
+
+def _key_bound_model_class():
+    """GenerativeModel subclass whose SDK clients come from one configurator's key
+
+    Left unset, the SDK binds a model's clients on first use to whatever key was last passed
+    to the process-wide ``genai.configure``. The async client needs a running event loop, so
+    it is created from the same client manager on first use instead.
+    """
+    global _KEY_BOUND_MODEL
+    if _KEY_BOUND_MODEL is None:
+        import google.generativeai as genai
+
+        class KeyBoundGenerativeModel(genai.GenerativeModel):
+            def __init__(self, model_name: str, clients, **kwargs):
+                self._clients = clients
+                super().__init__(model_name, **kwargs)
+                self._client = clients.get_default_client('generative')
+
+            @property
+            def _async_client(self):
+                if self.__dict__.get('_bound_async_client') is None:
+                    self.__dict__['_bound_async_client'] = self._clients.get_default_client('generative_async')
+                return self.__dict__['_bound_async_client']
+
+            @_async_client.setter
+            def _async_client(self, client):
+                self.__dict__['_bound_async_client'] = client
+
+        _KEY_BOUND_MODEL = KeyBoundGenerativeModel
+    return _KEY_BOUND_MODEL
+
+# Global configuration (discovered lazily on first use)
 AI_CONFIG = GeminiAIConfigurator()
-AI_CONFIG.discover_models()
@@ -0,0 +1,95 @@
+from typing import Dict, Any, Coroutine, AsyncIterator, Iterator
+import asyncio
+import concurrent.futures
+import threading
+
+async def _anext(agen: AsyncIterator):
+    return await agen.__anext__()
+
+class BackgroundEventLoop:
+    """Long-lived event loop on a daemon thread for synchronous callers (e.g. Streamlit)
+
+    Calling ``asyncio.run`` per message creates and tears down a loop each time, so nothing
+    bound to a loop (semaphores, async HTTP sessions, in-flight coalescing) survives between
+    messages. Coroutines submitted here all run on the same loop instead.
+    """
+
+    def __init__(self, name: str = 'mental-health-bot-loop'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_forever, name=name, daemon=True)
+        self._thread.start()
+        self.submitted = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    def _run_forever(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the background loop without waiting for it"""
+        if not self.is_running:
+            coro.close()
+            raise RuntimeError("Background event loop is closed")
+        self.submitted += 1
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: float = None) -> Any:
+        """Run a coroutine on the background loop and block until it returns"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run() called from the background loop itself would deadlock")
+
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self.timed_out += 1
+            future.cancel()
+            raise
+        except StopAsyncIteration:
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+
+    def iterate(self, agen: AsyncIterator, timeout: float = None) -> Iterator:
+        """Consume an async generator from synchronous code, one item per round trip
+
+        ``timeout`` applies to each item. The generator is closed if iteration stops early.
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(_anext(agen), timeout)
+                except StopAsyncIteration:
+                    return
+        finally:
+            if self.is_running and hasattr(agen, 'aclose'):
+                self.run(agen.aclose())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "timed_out": self.timed_out
+        }
+
+    def close(self):
+        """Stop the loop and wait for the thread to exit"""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def __enter__(self) -> 'BackgroundEventLoop':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
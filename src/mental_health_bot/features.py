@@ -0,0 +1,46 @@
+from typing import List, Tuple
+
+INTENSIFIERS = frozenset(['very', 'extremely', 'really', 'so', 'too'])
+
+class MessageFeatures:
+    """Per-message text features, computed once and shared by every analyzer"""
+
+    __slots__ = (
+        'text', 'text_lower', 'tokens', 'word_count', 'intensifier_count',
+        'long_word_count', 'exclamation_count', 'question_count', 'negation_count'
+    )
+
+    def __init__(self, text: str):
+        self.text = text
+        self.text_lower = text.lower()
+        self.tokens: Tuple[str, ...] = tuple(text.split())
+        self.word_count = len(self.tokens)
+
+        intensifiers = 0
+        long_words = 0
+        for token in self.tokens:
+            if token in INTENSIFIERS:
+                intensifiers += 1
+            if len(token) > 8:  # Long words often indicate intensity
+                long_words += 1
+        self.intensifier_count = intensifiers
+        self.long_word_count = long_words
+
+        self.exclamation_count = text.count('!')
+        self.question_count = text.count('?')
+        self.negation_count = text.count(' not ')  # Negations often indicate distress
+
+    @classmethod
+    def of(cls, text: str, features: 'MessageFeatures' = None) -> 'MessageFeatures':
+        """Reuse already extracted features for this text, or extract them"""
+        if features is not None and features.text == text:
+            return features
+        return cls(text)
+
+    def contains_any(self, words: List[str]) -> bool:
+        """Substring check against the lowercased text"""
+        text_lower = self.text_lower
+        return any(word in text_lower for word in words)
+
+    def __repr__(self) -> str:
+        return f"MessageFeatures(words={self.word_count}, text={self.text[:30]!r})"
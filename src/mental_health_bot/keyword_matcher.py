@@ -0,0 +1,106 @@
+from typing import List, Dict, Tuple, NamedTuple
+from collections import deque
+
+class KeywordMatch(NamedTuple):
+    """A single phrase hit inside a message"""
+    category: str
+    keyword: str
+    start: int
+    end: int
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds every crisis phrase in one pass over the text
+
+    The automaton is compiled once from a ``{category: [phrases]}`` lexicon. Scanning
+    costs O(len(text) + matches) no matter how many phrases the lexicon holds, and gives
+    the same answer as running ``phrase in text_lower`` for every phrase.
+    Texts passed to the scan methods must already be lowercased.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self.categories = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        self._patterns: List[Tuple[str, str, int]] = []
+
+        for category, phrases in keywords.items():
+            for phrase in phrases:
+                self._add_phrase(category, phrase.lower())
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def _add_phrase(self, category: str, phrase: str):
+        """Insert one phrase into the trie"""
+        if not phrase:
+            raise ValueError(f"Empty keyword in category '{category}'")
+
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+
+        self._output[state] += (len(self._patterns),)
+        self._patterns.append((category, phrase, len(phrase)))
+
+    def _build_failure_links(self):
+        """Breadth-first pass that wires failure links and merges suffix outputs"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find_all(self, text_lower: str) -> List[KeywordMatch]:
+        """Return every phrase occurrence, ordered by end position"""
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        matches = []
+        state = 0
+
+        for index, char in enumerate(text_lower):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                category, keyword, length = patterns[pattern_id]
+                matches.append(KeywordMatch(category, keyword, index - length + 1, index + 1))
+
+        return matches
+
+    def match_categories(self, text_lower: str) -> Dict[str, List[KeywordMatch]]:
+        """Group every occurrence by category, in lexicon order"""
+        grouped: Dict[str, List[KeywordMatch]] = {}
+        for match in self.find_all(text_lower):
+            grouped.setdefault(match.category, []).append(match)
+
+        return {category: grouped[category] for category in self.categories if category in grouped}
+
+    def matched_categories(self, text_lower: str) -> List[str]:
+        """Return only the categories with at least one hit, in lexicon order"""
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        found = set()
+        state = 0
+
+        for char in text_lower:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                found.add(patterns[pattern_id][0])
+
+        return [category for category in self.categories if category in found]
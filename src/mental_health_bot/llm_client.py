@@ -0,0 +1,155 @@
+from typing import Dict, Any, Optional, AsyncIterator
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncLLMClient:
+    """Non-blocking wrapper around a Gemini-style model
+
+    The blocking ``generate_content`` call runs on a bounded thread pool (or the SDK's
+    ``generate_content_async`` when ``use_async_api`` is set) so the event loop keeps
+    serving other agents and users while a request is in flight. A per-loop semaphore caps
+    the number of concurrent calls, and cancelling the awaiting task abandons the call.
+    """
+
+    def __init__(self, model, max_concurrency: int = 8, timeout: Optional[float] = None,
+                 use_async_api: bool = False, executor: ThreadPoolExecutor = None):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.use_async_api = use_async_api and hasattr(model, 'generate_content_async')
+        self._executor = executor
+        self._semaphores = weakref.WeakKeyDictionary()
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """One semaphore per event loop, since asyncio primitives are loop-bound"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='llm')
+        return self._executor
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """Generate text for a prompt without blocking the event loop"""
+        async with self._get_semaphore():
+            self.in_flight += 1
+            try:
+                text = await asyncio.wait_for(self._call_model(prompt), timeout or self.timeout)
+                self.completed += 1
+                return text
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def _call_model(self, prompt: str) -> str:
+        if self.use_async_api:
+            response = await self.model.generate_content_async(prompt)
+        else:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self._get_executor(), self.model.generate_content, prompt)
+        return response.text
+
+    async def stream(self, prompt: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield the response text in chunks as the model produces them
+        
+        ``timeout`` bounds the whole stream. Closing the generator early abandons the call.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        deadline = loop.time() + timeout if timeout else None
+        
+        async with self._get_semaphore():
+            self.in_flight += 1
+            chunks = self._stream_model(prompt)
+            try:
+                while True:
+                    remaining = None if deadline is None else max(deadline - loop.time(), 0)
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        break
+                    yield chunk
+                self.completed += 1
+            except (asyncio.CancelledError, GeneratorExit):
+                self.cancelled += 1
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                await chunks.aclose()
+    
+    async def _stream_model(self, prompt: str) -> AsyncIterator[str]:
+        if self.use_async_api:
+            response = await self.model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                yield chunk.text
+            return
+        
+        # The SDK's stream is a blocking iterator: drain it on a worker thread
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        
+        def publish(kind, value=None):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+            except RuntimeError:
+                stop.set()  # The loop is gone
+        
+        def produce():
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if stop.is_set():
+                        break
+                    publish('chunk', chunk.text)
+            except Exception as e:
+                publish('error', e)
+            finally:
+                publish('done')
+        
+        loop.run_in_executor(self._get_executor(), produce)
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == 'done':
+                    break
+                if kind == 'error':
+                    raise value
+                yield value
+        finally:
+            stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "max_concurrency": self.max_concurrency
+        }
+
+    def close(self):
+        """Release the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -1,15 +1,28 @@
 from typing import List, Dict, Any
-from .simple_orchestrator import simple_orchestrator
+from .simple_orchestrator import get_simple_orchestrator
 
 class MentalHealthAgent:
     """Main class for the mental health agent system"""
     
     def __init__(self):
-        self.orchestrator = simple_orchestrator
+        self.orchestrator = get_simple_orchestrator()
     
     async def chat(self, message: str, user_id: str = "anonymous") -> Dict:
         """Main chat interface for the mental health agent"""
         return await self.orchestrator.process_user_message(message, user_id)
 
-# Global instance
-mental_health_agent = MentalHealthAgent()
+# Global instance, created on first access
+_MENTAL_HEALTH_AGENT = None
+
+def get_mental_health_agent() -> MentalHealthAgent:
+    """Shared MentalHealthAgent"""
+    global _MENTAL_HEALTH_AGENT
+    if _MENTAL_HEALTH_AGENT is None:
+        _MENTAL_HEALTH_AGENT = MentalHealthAgent()
+    return _MENTAL_HEALTH_AGENT
+
+def __getattr__(name):
+    # mental_health_agent is kept for backwards compatibility
+    if name == 'mental_health_agent':
+        return get_mental_health_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
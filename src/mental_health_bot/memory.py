@@ -0,0 +1,307 @@
+"""
+Conversation memory keyed by user (or session)
+
+Each conversation keeps its most recent turns in a fixed-size ring buffer and a running
+summary (turn count, crisis levels, risk). With a database ``path``, turns that fall out of
+the ring buffer and whole conversations evicted from the in-memory LRU are written to SQLite
+on disk; the summary is written with every overflowed turn, and the ring buffers are flushed
+at interpreter exit, so a restarted process continues each conversation's numbering. Without
+a path nothing is stored outside the buffers: overflowed turns are dropped (the summary still
+counts them) and evicted conversations are forgotten. Either way the process' memory use
+depends on ``max_recent`` and ``max_conversations`` only, never on how long anyone has been
+talking. ``context()`` returns the small dict the orchestrator passes to the agents as
+``user_context``; from async code use ``acontext``/``arecord``, which run the SQLite work in
+a worker thread.
+"""
+
+from typing import List, Dict, Any, Optional
+import asyncio
+import atexit
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+
+DEFAULT_MAX_RECENT = 20
+DEFAULT_MAX_CONVERSATIONS = 1000
+DEFAULT_MAX_MESSAGE_CHARS = 280
+CONTEXT_TURNS = 3  # recent turns echoed into user_context
+CRISIS_LEVELS = ('low', 'medium', 'high')
+
+class Turn:
+    """One user message and what the agents made of it, truncated to a fixed size"""
+
+    __slots__ = ('seq', 'timestamp', 'message', 'crisis_level', 'risk_score', 'emotions')
+
+    def __init__(self, seq: int, timestamp: float, message: str, crisis_level: str, risk_score: float, emotions: str):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.message = message
+        self.crisis_level = crisis_level
+        self.risk_score = risk_score
+        self.emotions = emotions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+class ConversationSummary:
+    """Running totals over every turn of a conversation, in memory or not"""
+
+    __slots__ = ('turns', 'risk_total', 'peak_risk', 'level_counts', 'first_seen', 'last_seen')
+
+    def __init__(self, turns: int = 0, risk_total: float = 0.0, peak_risk: float = 0.0,
+                 level_counts: List[int] = None, first_seen: float = None, last_seen: float = None):
+        self.turns = turns
+        self.risk_total = risk_total
+        self.peak_risk = peak_risk
+        self.level_counts = list(level_counts or [0] * len(CRISIS_LEVELS))
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+
+    def add(self, turn: Turn):
+        self.turns += 1
+        self.risk_total += turn.risk_score
+        self.peak_risk = max(self.peak_risk, turn.risk_score)
+        if turn.crisis_level in CRISIS_LEVELS:
+            self.level_counts[CRISIS_LEVELS.index(turn.crisis_level)] += 1
+        if self.first_seen is None:
+            self.first_seen = turn.timestamp
+        self.last_seen = turn.timestamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+class _Conversation:
+    __slots__ = ('recent', 'summary', 'next_seq')
+
+    def __init__(self, max_recent: int, summary: ConversationSummary = None, next_seq: int = 0):
+        self.recent = deque(maxlen=max_recent)
+        self.summary = summary or ConversationSummary()
+        self.next_seq = next_seq
+
+class ConversationMemory:
+    """Bounded per-user conversation history with optional SQLite overflow
+
+    ``path`` is the SQLite database; ``None`` keeps only the ring buffers and summaries of
+    the ``max_conversations`` most recent conversations. Safe to share between threads.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_recent: int = DEFAULT_MAX_RECENT,
+                 max_conversations: int = DEFAULT_MAX_CONVERSATIONS,
+                 max_message_chars: int = DEFAULT_MAX_MESSAGE_CHARS, commit_every: int = 1):
+        self.path = path
+        self.max_recent = max_recent
+        self.max_conversations = max_conversations
+        self.max_message_chars = max_message_chars
+        self.commit_every = commit_every
+
+        self._conversations: 'OrderedDict[str, _Conversation]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._db = None
+        self._uncommitted = 0
+        self.recorded = 0
+        self.overflowed = 0
+        self.evicted = 0
+        self.loaded = 0
+        self.dropped = 0
+        if self.path is not None and self.path != ':memory:':
+            atexit.register(self.close)
+
+    @property
+    def db(self):
+        if self._db is None:
+            import sqlite3
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            if self.path != ':memory:':
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS turns (
+                key TEXT NOT NULL, seq INTEGER NOT NULL, timestamp REAL, message TEXT,
+                crisis_level TEXT, risk_score REAL, emotions TEXT, PRIMARY KEY (key, seq))""")
+            self._db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self._db.commit()
+        return self._db
+
+    def _write_turns(self, key: str, turns: List[Turn]):
+        if self.path is None:
+            self.dropped += len(turns)
+            return
+        # Turns keep their sequence number, so writing one twice (e.g. it was reloaded) is harmless
+        self.db.executemany(
+            "INSERT OR REPLACE INTO turns VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(key, t.seq, t.timestamp, t.message, t.crisis_level, t.risk_score, t.emotions) for t in turns])
+        self._uncommitted += len(turns)
+
+    def _write_summary(self, key: str, summary: ConversationSummary):
+        if self.path is None:
+            return
+        self.db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?)", (key, json.dumps(summary.to_dict())))
+        self._uncommitted += 1
+
+    def _commit(self, force: bool = False):
+        if self._uncommitted and (force or self._uncommitted >= self.commit_every):
+            self.db.commit()
+            self._uncommitted = 0
+
+    def _load(self, key: str) -> Optional[_Conversation]:
+        if self.path is None:
+            return None
+        row = self.db.execute("SELECT data FROM summaries WHERE key = ?", (key,)).fetchone()
+        stored, max_seq = self.db.execute("SELECT COUNT(*), MAX(seq) FROM turns WHERE key = ?", (key,)).fetchone()
+        if row is None and not stored:
+            return None
+        next_seq = max_seq + 1 if stored else 0
+        summary = ConversationSummary(**json.loads(row[0])) if row is not None else None
+        if summary is None or summary.turns < next_seq:
+            # Turns were written after the last summary (e.g. the process died): recount them
+            summary = self._summarize_turns(key)
+        conversation = _Conversation(self.max_recent, summary, max(summary.turns, next_seq))
+        rows = self.db.execute(
+            "SELECT seq, timestamp, message, crisis_level, risk_score, emotions FROM turns "
+            "WHERE key = ? ORDER BY seq DESC LIMIT ?", (key, self.max_recent)).fetchall()
+        conversation.recent.extend(Turn(*row) for row in reversed(rows))
+        self.loaded += 1
+        return conversation
+
+    def _summarize_turns(self, key: str) -> ConversationSummary:
+        levels = ", ".join(f"SUM(crisis_level = '{level}')" for level in CRISIS_LEVELS)
+        row = self.db.execute(
+            f"SELECT COUNT(*), SUM(risk_score), MAX(risk_score), MIN(timestamp), MAX(timestamp), {levels} "
+            "FROM turns WHERE key = ?", (key,)).fetchone()
+        return ConversationSummary(row[0], row[1] or 0.0, row[2] or 0.0, [count or 0 for count in row[5:]],
+                                   row[3], row[4])
+    
+    def _conversation(self, key: str, create: bool = False) -> Optional[_Conversation]:
+        conversation = self._conversations.get(key)
+        if conversation is not None:
+            self._conversations.move_to_end(key)
+            return conversation
+        conversation = self._load(key)
+        if conversation is None:
+            if not create:
+                return None
+            conversation = _Conversation(self.max_recent)
+        self._conversations[key] = conversation
+        while len(self._conversations) > self.max_conversations:
+            old_key, old = self._conversations.popitem(last=False)
+            self._write_turns(old_key, list(old.recent))
+            self._write_summary(old_key, old.summary)
+            self.evicted += 1
+        self._commit()
+        return conversation
+
+    def record(self, key: str, message: str, crisis_level: str = 'low', risk_score: float = 0.0,
+               emotions: str = '', timestamp: float = None) -> Turn:
+        """Append a turn; the oldest buffered turn overflows to SQLite once the buffer is full"""
+        with self._lock:
+            conversation = self._conversation(key, create=True)
+            turn = Turn(conversation.next_seq, timestamp or time.time(), message[:self.max_message_chars],
+                        crisis_level, float(risk_score), emotions or '')
+            conversation.next_seq += 1
+            overflow = conversation.recent[0] if len(conversation.recent) == conversation.recent.maxlen else None
+            conversation.recent.append(turn)
+            conversation.summary.add(turn)
+            if overflow is not None:
+                self._write_turns(key, [overflow])
+                self._write_summary(key, conversation.summary)
+                self.overflowed += 1
+                self._commit()
+            self.recorded += 1
+            return turn
+
+    def recent(self, key: str, limit: int = None) -> List[Turn]:
+        """Buffered turns, oldest first"""
+        with self._lock:
+            conversation = self._conversation(key)
+            if conversation is None:
+                return []
+            turns = list(conversation.recent)
+            return turns[-limit:] if limit else turns
+
+    def history(self, key: str, limit: int = 50) -> List[Turn]:
+        """The last ``limit`` turns, reading the overflow from SQLite as needed"""
+        with self._lock:
+            turns = self.recent(key)
+            if len(turns) >= limit:
+                return turns[-limit:]
+            if not turns or turns[0].seq == 0 or self.path is None:
+                return turns
+            rows = self.db.execute(
+                "SELECT seq, timestamp, message, crisis_level, risk_score, emotions FROM turns "
+                "WHERE key = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (key, turns[0].seq, limit - len(turns))).fetchall()
+            return [Turn(*row) for row in reversed(rows)] + turns
+
+    def summary(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            conversation = self._conversation(key)
+            return conversation.summary.to_dict() if conversation is not None else ConversationSummary().to_dict()
+
+    def context(self, key: str) -> Dict[str, Any]:
+        """Fixed-size summary of the conversation so far, for ``user_context``"""
+        with self._lock:
+            conversation = self._conversation(key)
+            if conversation is None or not conversation.summary.turns:
+                return {}
+            summary = conversation.summary
+            recent = list(conversation.recent)[-CONTEXT_TURNS:]
+            return {
+                "previous_turns": summary.turns,
+                "average_risk": round(summary.risk_total / summary.turns, 3),
+                "peak_risk": round(summary.peak_risk, 3),
+                "crisis_counts": dict(zip(CRISIS_LEVELS, summary.level_counts)),
+                "recent_crisis_levels": [turn.crisis_level for turn in recent],
+                "recent_emotions": [turn.emotions for turn in recent if turn.emotions]
+            }
+
+    async def arecord(self, key: str, message: str, crisis_level: str = 'low', risk_score: float = 0.0,
+                      emotions: str = '', timestamp: float = None) -> Turn:
+        """record() with any SQLite writes off the event loop"""
+        if self.path is None:
+            return self.record(key, message, crisis_level, risk_score, emotions, timestamp)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.record, key, message, crisis_level, risk_score, emotions, timestamp)
+
+    async def acontext(self, key: str) -> Dict[str, Any]:
+        """context() with any SQLite reads off the event loop"""
+        if self.path is None:
+            return self.context(key)
+        return await asyncio.get_running_loop().run_in_executor(None, self.context, key)
+
+    def clear(self, key: str):
+        """Forget a conversation, in memory and on disk"""
+        with self._lock:
+            self._conversations.pop(key, None)
+            if self.path is None:
+                return
+            self.db.execute("DELETE FROM turns WHERE key = ?", (key,))
+            self.db.execute("DELETE FROM summaries WHERE key = ?", (key,))
+            self._commit(force=True)
+
+    def flush(self):
+        """Persist every in-memory conversation (the ring buffers stay in place)"""
+        if self.path is None:
+            return
+        with self._lock:
+            for key, conversation in self._conversations.items():
+                self._write_turns(key, list(conversation.recent))
+                self._write_summary(key, conversation.summary)
+            self._commit(force=True)
+
+    def close(self):
+        """Flush and close the database (registered with atexit for file-backed memories)"""
+        with self._lock:
+            if self._db is not None:
+                self.flush()
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "conversations_in_memory": len(self._conversations),
+            "recorded": self.recorded,
+            "overflowed": self.overflowed,
+            "evicted": self.evicted,
+            "loaded": self.loaded,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,295 @@
+"""
+Memory-mapped directory of support services
+
+``build_resource_index`` turns a list of services into a directory of ``.npy`` files:
+
+* ``records.npy``  one fixed-size row per service (coordinates, bitmasks, hours, name)
+* ``postings.npy`` sorted row ids per category and per region (inverted indexes)
+* ``grid_*.npy``   row ids bucketed by a lat/lon grid cell (spatial index)
+* ``index.json``   vocabularies and posting offsets
+
+``ResourceIndex.load`` maps the arrays read-only, so every worker process that opens the
+same index shares one copy through the OS page cache. A query starts from its most selective
+posting list (or the grid cells around a location) and checks the other filters against the
+category, language and region fields of those candidate rows only.
+"""
+
+from typing import List, Dict, Any, Optional, Iterable, Sequence, Tuple
+import json
+import math
+import os
+
+INDEX_VERSION = 1
+DEFAULT_CELL_DEGREES = 1.0
+EARTH_RADIUS_KM = 6371.0
+MAX_FLAGS = 32  # categories and languages are stored as uint32 bitmasks
+
+RECORD_DTYPE = [
+    ('id', '<u4'),
+    ('lat', '<f4'),
+    ('lon', '<f4'),
+    ('categories', '<u4'),
+    ('languages', '<u4'),
+    ('region', '<u2'),
+    ('open_hour', 'u1'),
+    ('close_hour', 'u1'),
+    ('name', 'S80'),
+    ('contact', 'S48'),
+]
+
+def _encode(text: str, size: int) -> bytes:
+    """UTF-8 bytes cut to ``size`` without splitting a character"""
+    return text.encode('utf-8')[:size].decode('utf-8', 'ignore').encode('utf-8')
+
+def _vocabulary(values: Iterable[str], limit: int = None) -> List[str]:
+    vocabulary = sorted(set(values))
+    if limit is not None and len(vocabulary) > limit:
+        raise ValueError(f"At most {limit} distinct values are supported, got {len(vocabulary)}")
+    return vocabulary
+
+def _grid_key(lat, lon, cell_degrees: float):
+    import numpy as np
+    lon_cells = int(math.ceil(360.0 / cell_degrees))
+    row = np.floor((np.asarray(lat, dtype=np.float64) + 90.0) / cell_degrees).astype(np.int64)
+    col = np.floor((np.asarray(lon, dtype=np.float64) + 180.0) / cell_degrees).astype(np.int64) % lon_cells
+    return row * lon_cells + col
+
+def build_resource_index(services: Iterable[Dict[str, Any]], path: str,
+                         cell_degrees: float = DEFAULT_CELL_DEGREES) -> Dict[str, Any]:
+    """Write the index files for ``services`` into the directory ``path``
+
+    Each service is a dict with ``name``, ``contact``, ``lat``, ``lon``, ``region``,
+    ``categories`` and ``languages`` (lists), and optional ``id``, ``open_hour`` and
+    ``close_hour`` (0 and 24, i.e. always open, by default).
+    """
+    import numpy as np
+
+    services = list(services)
+    categories = _vocabulary((c for s in services for c in s['categories']), MAX_FLAGS)
+    languages = _vocabulary((l for s in services for l in s.get('languages', ())), MAX_FLAGS)
+    regions = _vocabulary(s['region'] for s in services)
+    category_bit = {name: 1 << i for i, name in enumerate(categories)}
+    language_bit = {name: 1 << i for i, name in enumerate(languages)}
+    region_code = {name: i for i, name in enumerate(regions)}
+
+    records = np.zeros(len(services), dtype=RECORD_DTYPE)
+    for row, service in enumerate(services):
+        records[row] = (
+            service.get('id', row),
+            service['lat'],
+            service['lon'],
+            sum(category_bit[c] for c in set(service['categories'])),
+            sum(language_bit[l] for l in set(service.get('languages', ()))),
+            region_code[service['region']],
+            service.get('open_hour', 0),
+            service.get('close_hour', 24),
+            _encode(service['name'], 80),
+            _encode(service.get('contact', ''), 48),
+        )
+
+    # Inverted indexes: row ids per category and per region, concatenated into one array
+    postings, offsets, start = [], {'category': {}, 'region': {}}, 0
+    for name, bit in category_bit.items():
+        rows = np.flatnonzero(records['categories'] & bit).astype(np.int32)
+        postings.append(rows)
+        offsets['category'][name] = [start, start + len(rows)]
+        start += len(rows)
+    for name, code in region_code.items():
+        rows = np.flatnonzero(records['region'] == code).astype(np.int32)
+        postings.append(rows)
+        offsets['region'][name] = [start, start + len(rows)]
+        start += len(rows)
+
+    # Spatial index: rows sorted by grid cell, with the start of each occupied cell
+    keys = _grid_key(records['lat'], records['lon'], cell_degrees)
+    order = np.argsort(keys, kind='stable').astype(np.int32)
+    grid_keys, grid_starts = np.unique(keys[order], return_index=True)
+    grid_starts = np.append(grid_starts, len(order)).astype(np.int64)
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'records.npy'), records)
+    np.save(os.path.join(path, 'postings.npy'),
+            np.concatenate(postings) if postings else np.zeros(0, dtype=np.int32))
+    np.save(os.path.join(path, 'grid_keys.npy'), grid_keys.astype(np.int64))
+    np.save(os.path.join(path, 'grid_starts.npy'), grid_starts)
+    np.save(os.path.join(path, 'grid_rows.npy'), order)
+
+    meta = {
+        'version': INDEX_VERSION,
+        'count': len(services),
+        'cell_degrees': cell_degrees,
+        'categories': categories,
+        'languages': languages,
+        'regions': regions,
+        'postings': offsets
+    }
+    with open(os.path.join(path, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return meta
+
+class ResourceIndex:
+    """Read-only, memory-mapped service directory with category, region and spatial lookup"""
+
+    def __init__(self, path: str, meta: Dict[str, Any], arrays: Dict[str, Any]):
+        import numpy as np
+
+        self.path = path
+        self.meta = meta
+        self.records = arrays['records']
+        self.postings = arrays['postings']
+        self.grid_keys = arrays['grid_keys']
+        self.grid_starts = arrays['grid_starts']
+        self.grid_rows = arrays['grid_rows']
+        self.cell_degrees = meta['cell_degrees']
+        self.categories = meta['categories']
+        self.languages = meta['languages']
+        self.regions = meta['regions']
+        self._category_bit = {name: 1 << i for i, name in enumerate(self.categories)}
+        self._language_bit = {name: 1 << i for i, name in enumerate(self.languages)}
+        self._region_code = {name: i for i, name in enumerate(self.regions)}
+        # Plain ndarray views of the mapped files: same pages, without np.memmap's per-slice overhead
+        self._records = arrays['records'].view(np.ndarray)
+        self._postings = arrays['postings'].view(np.ndarray)
+        self._grid_keys = arrays['grid_keys'].view(np.ndarray)
+        self._grid_starts = arrays['grid_starts'].view(np.ndarray)
+        self._grid_rows = arrays['grid_rows'].view(np.ndarray)
+        self._lon_cells = int(math.ceil(360.0 / self.cell_degrees))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'ResourceIndex':
+        import numpy as np
+
+        with open(os.path.join(path, 'index.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported resource index version: {meta.get('version')}")
+        mode = 'r' if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode)
+            for name in ('records', 'postings', 'grid_keys', 'grid_starts', 'grid_rows')
+        }
+        return cls(path, meta, arrays)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _posting(self, kind: str, name: str):
+        import numpy as np
+        span = self.meta['postings'][kind].get(name)
+        if span is None:
+            return np.zeros(0, dtype=np.int32)
+        return self._postings[span[0]:span[1]]
+
+    def _near_rows(self, lat: float, lon: float, radius_km: float):
+        """Row ids in every grid cell overlapping the radius' bounding box"""
+        import numpy as np
+
+        dlat = radius_km / 111.0
+        dlon = radius_km / max(111.0 * math.cos(math.radians(lat)), 1e-6)
+        row_lo = int(math.floor((max(lat - dlat, -90.0) + 90.0) / self.cell_degrees))
+        row_hi = int(math.floor((min(lat + dlat, 90.0) + 90.0) / self.cell_degrees))
+        if dlon >= 180.0:
+            col_ranges = [(0, self._lon_cells - 1)]
+        else:
+            col_lo = int(math.floor((lon - dlon + 180.0) / self.cell_degrees)) % self._lon_cells
+            col_hi = int(math.floor((lon + dlon + 180.0) / self.cell_degrees)) % self._lon_cells
+            col_ranges = [(col_lo, col_hi)] if col_lo <= col_hi else [(col_lo, self._lon_cells - 1), (0, col_hi)]
+
+        chunks = []
+        for row in range(row_lo, row_hi + 1):
+            for col_lo, col_hi in col_ranges:
+                first = np.searchsorted(self._grid_keys, row * self._lon_cells + col_lo, 'left')
+                last = np.searchsorted(self._grid_keys, row * self._lon_cells + col_hi, 'right')
+                if first < last:
+                    chunks.append(self._grid_rows[self._grid_starts[first]:self._grid_starts[last]])
+        if not chunks:
+            return np.zeros(0, dtype=np.int32)
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    def query(self, categories: Sequence[str] = None, region: str = None, language: str = None,
+              near: Tuple[float, float] = None, radius_km: float = 50.0, open_at_hour: int = None,
+              limit: int = 10) -> List[Dict[str, Any]]:
+        """Services matching any of ``categories`` and all the other given filters
+
+        Results near a location are ordered by distance; otherwise by directory order.
+        """
+        import numpy as np
+
+        # Start from the smallest posting list (or the grid cells around ``near``) and check
+        # the remaining filters on those rows only, instead of intersecting large lists
+        sources = []
+        if categories:
+            lists = [self._posting('category', name) for name in categories]
+            sources.append((sum(len(rows) for rows in lists), 'category', lists))
+        if region is not None:
+            rows = self._posting('region', region)
+            sources.append((len(rows), 'region', rows))
+        if near is not None:
+            rows = self._near_rows(near[0], near[1], radius_km)
+            sources.append((len(rows), 'near', rows))
+
+        if not sources:
+            records, driver = self._records, None
+        else:
+            _, driver, rows = min(sources, key=lambda source: source[0])
+            if driver == 'category':
+                rows = rows[0] if len(rows) == 1 else np.unique(np.concatenate(rows))
+            records = self._records[rows]
+
+        keep = np.ones(len(records), dtype=bool)
+        if categories and driver != 'category':
+            mask = 0
+            for name in categories:
+                mask |= self._category_bit.get(name, 0)
+            keep &= (records['categories'] & mask) != 0
+        if region is not None and driver != 'region':
+            code = self._region_code.get(region)
+            keep &= False if code is None else records['region'] == code
+        if language is not None:
+            keep &= (records['languages'] & self._language_bit.get(language, 0)) != 0
+        if open_at_hour is not None:
+            open_hour, close_hour = records['open_hour'], records['close_hour']
+            same_day = (open_hour <= open_at_hour) & (open_at_hour < close_hour)
+            overnight = (close_hour < open_hour) & ((open_at_hour >= open_hour) | (open_at_hour < close_hour))
+            keep &= same_day | overnight
+
+        distances = None
+        if near is not None:
+            lat1, lon1 = math.radians(near[0]), math.radians(near[1])
+            lat2, lon2 = np.radians(records['lat'].astype(np.float64)), np.radians(records['lon'].astype(np.float64))
+            a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+            distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            keep &= distances <= radius_km
+
+        selected = np.flatnonzero(keep)
+        if distances is not None:
+            selected = selected[np.argsort(distances[selected], kind='stable')]
+        selected = selected[:limit]
+        return [self._to_dict(records[i], None if distances is None else float(distances[i])) for i in selected]
+
+    def _to_dict(self, record, distance_km: Optional[float]) -> Dict[str, Any]:
+        categories, languages = int(record['categories']), int(record['languages'])
+        open_hour, close_hour = int(record['open_hour']), int(record['close_hour'])
+        result = {
+            "id": int(record['id']),
+            "name": record['name'].decode('utf-8'),
+            "contact": record['contact'].decode('utf-8'),
+            "region": self.regions[int(record['region'])],
+            "categories": [name for name, bit in self._category_bit.items() if categories & bit],
+            "languages": [name for name, bit in self._language_bit.items() if languages & bit],
+            "hours": "24/7" if (open_hour, close_hour) == (0, 24) else f"{open_hour:02d}:00-{close_hour:02d}:00",
+            "location": (float(record['lat']), float(record['lon']))
+        }
+        if distance_km is not None:
+            result["distance_km"] = round(distance_km, 2)
+        return result
+
+# Indexes opened by this process, by path (the arrays themselves are shared via mmap)
+_RESOURCE_INDEXES: Dict[str, ResourceIndex] = {}
+
+def get_resource_index(path: str) -> ResourceIndex:
+    """Shared ResourceIndex for ``path``, loaded on first use"""
+    index = _RESOURCE_INDEXES.get(path)
+    if index is None:
+        index = _RESOURCE_INDEXES[path] = ResourceIndex.load(path)
+    return index
@@ -0,0 +1,312 @@
+"""
+Incremental parser for the LLM's structured analysis
+
+The model answers either in the tagged format the prompts ask for::
+
+    EMOTIONS: anxious, worried
+    URGENCY: medium
+    NEEDS: anxiety_management
+    APPROACH: grounding_techniques
+    RESPONSE: It sounds like a lot is weighing on you.
+    Let's take one breath together.
+
+or, with ``response_format='json'``, as one JSON object with the same keys. Callers pass
+the format they asked for as ``mode``, so a JSON answer with leading prose ("Sure! {...}")
+is still read as JSON; without one the mode is sniffed from the first non-blank character.
+Models do not always follow the format asked for, so a JSON-mode answer without a JSON
+object is read as tagged, and a tagged-mode answer without a single tag is read as JSON.
+``ResponseParser.feed`` consumes chunks as they
+stream in and returns the RESPONSE text they contain; tags may come in any order, and lines
+that do not start with a tag continue the current field, so multi-line bodies are kept.
+
+``result()`` validates the fields (non-empty strings, urgency one of low/medium/high) and
+fills the ones that are missing or invalid with defaults. Every problem is listed in the
+analysis' ``parse_errors`` and counted in ``ParseMetrics``.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from collections import Counter
+import json
+import re
+import threading
+
+FIELDS = ('emotions', 'urgency', 'needs', 'approach', 'response')
+HEADER_FIELDS = FIELDS[:4]
+URGENCY_LEVELS = ('low', 'medium', 'high')
+MODES = ('tagged', 'json')
+TAGS = {field.upper(): field for field in FIELDS}
+# Fields a batched item needs before it is used instead of being retried on its own
+REQUIRED_FIELDS = ('emotions', 'urgency')
+
+DEFAULT_ANALYSIS = {
+    'emotions': 'concerned',
+    'urgency': 'medium',
+    'needs': 'emotional_support',
+    'approach': 'compassionate_listening',
+    'response': 'I hear you and I\'m here to support you through this.'
+}
+
+URGENCY_VALUE = re.compile(r'^[\s\[\(*"\']*(' + '|'.join(URGENCY_LEVELS) + r')\b', re.IGNORECASE)
+CODE_FENCE = re.compile(r'^```[a-zA-Z]*\s*(.*?)\s*```$', re.DOTALL)
+
+class ParseMetrics:
+    """Parse outcomes shared by every parser of one integration"""
+
+    def __init__(self):
+        self.responses = 0
+        self.failed = 0
+        self.modes = Counter()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, mode: str, errors: List[str]):
+        with self._lock:
+            self.responses += 1
+            self.modes[mode] += 1
+            if errors:
+                self.failed += 1
+                self.errors.update(errors)
+
+    def stats(self) -> Dict[str, Any]:
+        """Responses parsed, how many had problems and which problems"""
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "failed": self.failed,
+                "failure_rate": round(self.failed / self.responses, 4) if self.responses else 0.0,
+                "modes": dict(self.modes),
+                "errors": dict(self.errors)
+            }
+
+def _classify_line(line: str, final: bool) -> Optional[Tuple[Optional[str], str]]:
+    """(field, value) for a tag line, (None, line) for a continuation, None if undecided yet"""
+    start = line.lstrip().lstrip('*#- ')
+    for tag, field in TAGS.items():
+        if start.startswith(tag):
+            rest = start[len(tag):].lstrip('* ')
+            if rest.startswith(':'):
+                return field, rest[1:].lstrip('* ')
+            if not rest and not final:
+                return None
+            break
+        if tag.startswith(start) and not final:
+            return None
+    return None, line
+
+def _coerce(field: str, value: Any) -> Tuple[Optional[str], Optional[str]]:
+    """(validated value, error) for one field"""
+    if isinstance(value, list) and field != 'response' and all(isinstance(v, str) for v in value):
+        value = ", ".join(v.strip() for v in value)
+    if not isinstance(value, str):
+        return None, f"invalid_type:{field}"
+    value = value.strip()
+    if not value:
+        return None, f"empty_field:{field}"
+    if field == 'urgency':
+        match = URGENCY_VALUE.match(value)
+        if match is None:
+            return None, f"invalid_value:{field}"
+        value = match.group(1).lower()
+    return value, None
+
+class ResponseParser:
+    """State machine over one streamed (or complete) LLM answer"""
+
+    def __init__(self, metrics: ParseMetrics = None, mode: str = None):
+        if mode not in (None,) + MODES:
+            raise ValueError(f"Unknown response mode: {mode}")
+        self.metrics = metrics
+        self.mode = mode           # 'tagged' or 'json'; sniffed from the first character if None
+        self.field = None          # tagged field currently being read
+        self.streamed = False      # whether any RESPONSE text has been returned by feed/close
+        self._values: Dict[str, List[str]] = {}
+        self._errors: List[str] = []
+        self._buffer = ''          # JSON text, or the start of a tagged line not classified yet
+        self._line_open = False    # the current tagged line has been classified
+        self._newlines = 0         # line breaks held back until the field gets more text
+        self._text: List[str] = []  # tagged-mode input, kept for the JSON fallback
+        self._result = None
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consume one chunk; returns the RESPONSE text it contained"""
+        if self.mode is None:
+            self._buffer += chunk
+            start = self._buffer.lstrip()
+            if not start:
+                return []
+            self.mode = 'json' if start[0] in '{`' else 'tagged'
+            if self.mode == 'json':
+                return []
+            chunk, self._buffer = self._buffer, ''
+        if self.mode == 'json':
+            self._buffer += chunk
+            return []
+        self._text.append(chunk)
+        return self._feed_tagged(chunk, final=False)
+
+    def close(self) -> List[str]:
+        """End of the answer; returns RESPONSE text that was still held back"""
+        if self.mode == 'json':
+            text, self._buffer = self._buffer, ''
+            self._parse_json(text)
+            response, _ = _coerce('response', self._raw('response'))
+            if response:
+                self.streamed = True
+                return [response]
+            return []
+        tokens = []
+        if self.mode == 'tagged' and not self._line_open and self._buffer:
+            text, self._buffer = self._buffer, ''
+            tokens = self._feed_tagged(text, final=True)
+        if self.mode == 'tagged' and not self._values and not self._errors and self._text:
+            # Not a single tag: the model may have answered in JSON anyway
+            text = "".join(self._text)
+            if '{' in text:
+                self.mode, self._buffer = 'json', text
+                return self.close()
+        return tokens
+
+    @property
+    def header_ready(self) -> bool:
+        """True once the header fields are known or RESPONSE text has started"""
+        return self.field == 'response' or all(field in self._values for field in HEADER_FIELDS)
+
+    def header(self) -> Dict[str, str]:
+        """Header fields seen so far, with defaults for the rest"""
+        analysis, _ = self._validate()
+        return {field: analysis[field] for field in HEADER_FIELDS}
+
+    def result(self, record: bool = True) -> Dict[str, Any]:
+        """Validated analysis; ``record`` counts it in the metrics (once)"""
+        if self._result is not None:
+            return dict(self._result)
+        analysis, errors = self._validate()
+        analysis['ai_generated'] = True
+        if errors:
+            analysis['parse_errors'] = errors
+        if record:
+            if self.metrics is not None:
+                self.metrics.record(self.mode or 'empty', errors)
+            self._result = analysis
+        return dict(analysis)
+
+    def _feed_tagged(self, text: str, final: bool) -> List[str]:
+        tokens = []
+        pos = 0
+        while pos < len(text):
+            newline = text.find('\n', pos)
+            end = len(text) if newline == -1 else newline
+            if self._line_open:
+                self._append(self.field, text[pos:end], tokens)
+            else:
+                self._buffer += text[pos:end]
+                decision = _classify_line(self._buffer, final or newline != -1)
+                if decision is None:
+                    return tokens
+                field, value = decision
+                self._buffer = ''
+                self._line_open = True
+                if field is not None:
+                    self._start_field(field)
+                self._append(self.field, value, tokens)
+            if newline == -1:
+                break
+            self._line_open = False
+            self._newlines += 1
+            pos = newline + 1
+        return tokens
+
+    def _start_field(self, field: str):
+        if field in self._values:
+            self._errors.append(f"duplicate_field:{field}")
+            field = None  # keep the first value; ignore the repeat
+        else:
+            self._values[field] = []
+        self.field = field
+        self._newlines = 0
+
+    def _append(self, field: Optional[str], text: str, tokens: List[str]):
+        if field is None:
+            return
+        parts = self._values[field]
+        if not parts:
+            text = text.lstrip()  # the tag line may end at a chunk boundary before the space
+        if not text:
+            return
+        if parts and self._newlines:
+            text = "\n" * self._newlines + text
+        self._newlines = 0
+        parts.append(text)
+        if field == 'response':
+            self.streamed = True
+            tokens.append(text)
+
+    def _parse_json(self, text: str):
+        text = text.strip()
+        fenced = CODE_FENCE.match(text)
+        if fenced:
+            text = fenced.group(1)
+            if not text.startswith('{'):
+                # A fenced tagged answer
+                self.mode = 'tagged'
+                self._feed_tagged(text, final=False)
+                self.close()
+                return
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+            first, last = text.find('{'), text.rfind('}')
+            if first != -1 and last > first:
+                try:
+                    data = json.loads(text[first:last + 1])
+                except ValueError:
+                    pass
+        if not isinstance(data, dict):
+            # No JSON object: the model may have answered in the tagged format anyway
+            self.mode = 'tagged'
+            self._feed_tagged(text, final=False)
+            if not self._line_open and self._buffer:
+                text, self._buffer = self._buffer, ''
+                self._feed_tagged(text, final=True)
+            if not self._values:
+                self.mode = 'json'
+                self._errors.append("invalid_json")
+            return
+        for key, value in data.items():
+            field = key.strip().lower()
+            if field in FIELDS:
+                self._values[field] = [value]
+
+    def _raw(self, field: str) -> Any:
+        parts = self._values.get(field)
+        if parts is None:
+            return None
+        return "".join(parts) if self.mode == 'tagged' else parts[0]
+
+    def _validate(self) -> Tuple[Dict[str, Any], List[str]]:
+        analysis = dict(DEFAULT_ANALYSIS)
+        errors = list(self._errors)
+        for field in FIELDS:
+            if field not in self._values:
+                if "invalid_json" not in errors:
+                    errors.append(f"missing_field:{field}")
+                continue
+            value, error = _coerce(field, self._raw(field))
+            if error:
+                errors.append(error)
+            else:
+                analysis[field] = value
+        return analysis, errors
+
+def parse_response(ai_text: str, metrics: ParseMetrics = None, mode: str = None) -> Dict[str, Any]:
+    """Parse a complete answer"""
+    parser = ResponseParser(metrics, mode)
+    parser.feed(ai_text)
+    parser.close()
+    return parser.result()
+
+def is_complete(analysis: Dict[str, Any], required=REQUIRED_FIELDS) -> bool:
+    """Whether every ``required`` field was present and valid in the parsed answer"""
+    errors = analysis.get('parse_errors', ())
+    return "invalid_json" not in errors and not any(error.partition(':')[2] in required for error in errors)
@@ -0,0 +1,160 @@
+"""
+Confidence-gated routing between the cheap analyzers and the LLM
+
+``ConfidenceRouter.route`` runs the rule-based analyzers first (``crisis_detector`` and the
+simulated keyword analysis), then the local classifier if one is attached. The first tier
+that is confident (at least ``threshold``) and does not contradict the crisis detector
+answers; otherwise ``route`` returns None and the caller asks the LLM.
+
+Every tier records how often it was consulted, how often it answered and how long it took,
+so ``stats()`` shows the hit rates and latencies needed to tune the threshold.
+"""
+
+from typing import List, Dict, Any, Optional, Callable
+import threading
+import time
+
+from .features import MessageFeatures
+from .tools import get_mental_health_tools
+
+DEFAULT_THRESHOLD = 0.8
+TIERS = ('cache', 'rules', 'classifier', 'llm')
+URGENCY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+
+# Confidence of the keyword rules
+MATCHED_RULE_CONFIDENCE = 0.9    # a keyword branch of the simulated analysis fired
+BENIGN_CONFIDENCE = 0.9          # nothing fired and the message reads as calm and positive
+UNRECOGNIZED_CONFIDENCE = 0.5    # nothing fired and there is no sign the message is benign
+CALM_INTENSITY = 0.3
+BENIGN_CUES = ['good', 'great', 'fine', 'okay', 'happy', 'better', 'thank', 'nice', 'calm', 'relaxed', 'fun']
+NEGATION_CUES = ['not ', "n't", 'cant', 'never', 'no ']
+# Keywords of each branch of the simulated analysis; hits from two branches are a mixed signal
+RULE_KEYWORDS = (['die', 'suicide', 'kill myself'], ['anxious', 'panic', 'overwhelmed'], ['sad', 'depressed', 'hopeless'])
+LONG_MESSAGE_WORDS = 60          # keyword rules miss nuance in long messages...
+LONG_MESSAGE_PENALTY = 0.8       # ...so their confidence is scaled down
+
+def urgencies_agree(crisis_level: str, urgency: str) -> bool:
+    """False when one side says ``high`` alone, or they are two levels apart"""
+    crisis_rank, urgency_rank = URGENCY_RANK.get(crisis_level, 0), URGENCY_RANK.get(urgency, 1)
+    if (crisis_rank == 2) != (urgency_rank == 2):
+        return False
+    return abs(crisis_rank - urgency_rank) < 2
+
+class _TierStats:
+    __slots__ = ('calls', 'hits', 'total_ms', 'max_ms')
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+class ConfidenceRouter:
+    """Answer from the cheap analyzers when they are confident; escalate to the LLM otherwise
+
+    ``rules=False`` skips the rule tier, leaving the classifier as the only local tier.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, classifier=None, rules: bool = True):
+        self.threshold = threshold
+        self.classifier = classifier
+        self.rules = rules
+        self.tools = get_mental_health_tools()
+        self.routed = 0
+        self.disagreements = 0
+        self._default_emotions = None
+        self._tiers = {tier: _TierStats() for tier in TIERS}
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, elapsed_ms: float, hit: bool):
+        """Count one consultation of ``tier``"""
+        with self._lock:
+            stats = self._tiers[tier]
+            stats.calls += 1
+            stats.hits += hit
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+
+    def rule_confidence(self, crisis_data: Dict, simulated: Dict, default_emotions: str,
+                        features: MessageFeatures) -> float:
+        if simulated['emotions'] != default_emotions:
+            # A keyword fired, but "not sad anymore" or "anxious but happy" is not what it looks like
+            branches = sum(features.contains_any(keywords) for keywords in RULE_KEYWORDS)
+            mixed = branches > 1 or features.contains_any(BENIGN_CUES)
+            negated = features.contains_any(NEGATION_CUES)
+            confidence = UNRECOGNIZED_CONFIDENCE if mixed or negated else MATCHED_RULE_CONFIDENCE
+        elif (not crisis_data['detected_issues'] and crisis_data['emotional_intensity'] < CALM_INTENSITY
+              and features.contains_any(BENIGN_CUES) and not features.contains_any(NEGATION_CUES)):
+            confidence = BENIGN_CONFIDENCE
+        else:
+            confidence = UNRECOGNIZED_CONFIDENCE
+        if features.word_count > LONG_MESSAGE_WORDS:
+            confidence *= LONG_MESSAGE_PENALTY
+        return confidence
+
+    def route(self, text: str, features: MessageFeatures = None,
+              simulate: Callable[..., Dict] = None, crisis_data: Dict = None) -> Optional[Dict[str, Any]]:
+        """A local analysis, or None when the message should go to the LLM
+
+        ``simulate`` is the rule-based analysis (``GeminiAIIntegration._simulated_ai_analysis``);
+        ``crisis_data`` is the message's ``crisis_detector`` result if the caller already has it.
+        """
+        features = MessageFeatures.of(text, features)
+        with self._lock:
+            self.routed += 1
+
+        if self.rules and simulate is not None:
+            start = time.perf_counter()
+            if crisis_data is None:
+                crisis_data = self.tools.crisis_detector(text, features)
+            simulated = simulate(text, None, features)
+            if self._default_emotions is None:
+                self._default_emotions = simulate("", None, MessageFeatures(""))['emotions']
+            confidence = self.rule_confidence(crisis_data, simulated, self._default_emotions, features)
+            agree = urgencies_agree(crisis_data['crisis_level'], simulated['urgency'])
+            hit = agree and confidence >= self.threshold
+            self.record('rules', (time.perf_counter() - start) * 1000, hit)
+            if not agree:
+                with self._lock:
+                    self.disagreements += 1
+                return None
+            if hit:
+                return dict(simulated, routed_by='rules', confidence=round(confidence, 4))
+
+        if self.classifier is not None:
+            start = time.perf_counter()
+            prediction = self.classifier.predict(text)
+            agree = crisis_data is None or urgencies_agree(crisis_data['crisis_level'], prediction['urgency'])
+            hit = agree and prediction['confidence'] >= self.threshold
+            self.record('classifier', (time.perf_counter() - start) * 1000, hit)
+            if not agree:
+                with self._lock:
+                    self.disagreements += 1
+            if hit:
+                return dict(prediction, routed_by='classifier')
+
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Per tier: consultations, answers, hit rate, share of all messages and latency"""
+        with self._lock:
+            # Cache hits are answered before routing; everything else passes through route()
+            messages = self.routed + self._tiers['cache'].hits
+            tiers = {}
+            for name, tier in self._tiers.items():
+                if not tier.calls:
+                    continue
+                tiers[name] = {
+                    "calls": tier.calls,
+                    "hits": tier.hits,
+                    "hit_rate": round(tier.hits / tier.calls, 4),
+                    "share": round(tier.hits / messages, 4) if messages else 0.0,
+                    "mean_ms": round(tier.total_ms / tier.calls, 3),
+                    "max_ms": round(tier.max_ms, 3)
+                }
+            return {
+                "threshold": self.threshold,
+                "messages": messages,
+                "disagreements": self.disagreements,
+                "tiers": tiers
+            }
@@ -1,7 +1,10 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, AsyncIterator
 import asyncio
 import time
 from datetime import datetime
+from itertools import islice
+from .keyword_matcher import KeywordAutomaton
+from .features import MessageFeatures
 
 class SimpleMentalHealthOrchestrator:
     """Simplified orchestrator that works without complex dependencies"""
@@ -13,6 +16,7 @@ class SimpleMentalHealthOrchestrator:
             'panic': ['panic attack', 'cant breathe', 'heart racing', 'losing control'],
             'depression': ['hopeless', 'empty inside', 'no point', 'cant get out of bed']
         }
+        self.keyword_matcher = KeywordAutomaton(self.crisis_keywords)
     
     async def process_user_message(self, user_message: str, user_id: str = None, session_id: str = None) -> Dict:
         """Process user message with simplified logic"""
@@ -20,11 +24,38 @@ class SimpleMentalHealthOrchestrator:
         
         print(f"🎯 Processing message: {user_message[:50]}...")
         
+        return self._process(user_message, user_id, session_id, start_time)
+    
+    async def process_many(self, messages: Iterable[str], concurrency: int = 8, batch_size: int = 256,
+                           user_id: str = None, session_id: str = None) -> AsyncIterator[Dict]:
+        """Score many messages, yielding results in input order
+        
+        Takes the same arguments as ``MentalHealthOrchestrator.process_many`` so either can be
+        used, but ``concurrency`` is unused: everything here is rule-based and CPU-bound, so
+        there is nothing to run concurrently. Each batch of ``batch_size`` messages is scored in
+        one go, and the event loop gets a turn between batches so a long archive does not starve
+        other tasks.
+        """
+        iterator = iter(messages)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            start_time = time.time()
+            results = [self._process(message, user_id, session_id, start_time) for message in batch]
+            for result in results:
+                yield result
+            await asyncio.sleep(0)
+    
+    def _process(self, user_message: str, user_id: str, session_id: str, start_time: float) -> Dict:
+        """Rule-based pipeline for one message"""
+        features = MessageFeatures(user_message)
+        
         # Crisis detection
-        crisis_data = self._detect_crisis(user_message)
+        crisis_data = self._detect_crisis(user_message, features)
         
         # Emotion analysis
-        emotion_data = self._analyze_emotions(user_message)
+        emotion_data = self._analyze_emotions(user_message, features)
         
         # Generate response
         final_response = self._generate_response(user_message, crisis_data, emotion_data)
@@ -43,20 +74,19 @@ class SimpleMentalHealthOrchestrator:
             'timestamp': datetime.now().isoformat()
         }
     
-    def _detect_crisis(self, text: str) -> Dict:
+    def _detect_crisis(self, text: str, features: MessageFeatures = None) -> Dict:
         """Detect crisis level from text"""
-        text_lower = text.lower()
+        text_lower = MessageFeatures.of(text, features).text_lower
         
         crisis_level = "low"
         detected_issues = []
         
-        for category, keywords in self.crisis_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                detected_issues.append(category)
-                if category in ['suicidal', 'self_harm']:
-                    crisis_level = "high"
-                elif crisis_level != "high" and category in ['panic']:
-                    crisis_level = "medium"
+        for category in self.keyword_matcher.matched_categories(text_lower):
+            detected_issues.append(category)
+            if category in ['suicidal', 'self_harm']:
+                crisis_level = "high"
+            elif crisis_level != "high" and category in ['panic']:
+                crisis_level = "medium"
         
         return {
             "crisis_level": crisis_level,
@@ -64,15 +94,15 @@ class SimpleMentalHealthOrchestrator:
             "immediate_action_required": crisis_level in ["high", "medium"]
         }
     
-    def _analyze_emotions(self, text: str) -> Dict:
+    def _analyze_emotions(self, text: str, features: MessageFeatures = None) -> Dict:
         """Analyze emotions from text"""
-        text_lower = text.lower()
+        features = MessageFeatures.of(text, features)
         
-        if any(word in text_lower for word in ['die', 'suicide', 'kill myself']):
+        if features.contains_any(['die', 'suicide', 'kill myself']):
             return {"emotions": "desperate, hopeless, suicidal", "urgency": "high"}
-        elif any(word in text_lower for word in ['anxious', 'panic', 'overwhelmed']):
+        elif features.contains_any(['anxious', 'panic', 'overwhelmed']):
             return {"emotions": "anxious, overwhelmed, scared", "urgency": "medium"}
-        elif any(word in text_lower for word in ['sad', 'depressed', 'hopeless']):
+        elif features.contains_any(['sad', 'depressed', 'hopeless']):
             return {"emotions": "sad, depressed, hopeless", "urgency": "medium"}
         else:
             return {"emotions": "concerned, attentive", "urgency": "low"}
@@ -103,5 +133,18 @@ class SimpleMentalHealthOrchestrator:
             }
         }
 
-# Global instance
-simple_orchestrator = SimpleMentalHealthOrchestrator()
+# Global instance, created on first access
+_SIMPLE_ORCHESTRATOR = None
+
+def get_simple_orchestrator() -> SimpleMentalHealthOrchestrator:
+    """Shared SimpleMentalHealthOrchestrator"""
+    global _SIMPLE_ORCHESTRATOR
+    if _SIMPLE_ORCHESTRATOR is None:
+        _SIMPLE_ORCHESTRATOR = SimpleMentalHealthOrchestrator()
+    return _SIMPLE_ORCHESTRATOR
+
+def __getattr__(name):
+    # simple_orchestrator is kept for backwards compatibility
+    if name == 'simple_orchestrator':
+        return get_simple_orchestrator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
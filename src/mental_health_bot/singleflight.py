@@ -0,0 +1,60 @@
+from typing import Dict, Any, Awaitable, Callable, Hashable
+import asyncio
+import weakref
+
+class SingleFlight:
+    """Collapse concurrent calls that share a key into one shared task
+
+    The first caller for a key starts the work; callers arriving while it is still running
+    await the same task instead of starting their own. Each waiter is shielded, so
+    cancelling one caller does not cancel the shared call for the others.
+    """
+
+    def __init__(self):
+        self._flights = weakref.WeakKeyDictionary()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def _flights_for_loop(self) -> Dict[Hashable, asyncio.Task]:
+        loop = asyncio.get_running_loop()
+        flights = self._flights.get(loop)
+        if flights is None:
+            flights = {}
+            self._flights[loop] = flights
+        return flights
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``factory()`` once per key among concurrent callers"""
+        flights = self._flights_for_loop()
+        self.calls += 1
+
+        task = flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            flights[key] = task
+            task.add_done_callback(lambda done, k=key: self._finish(flights, k, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finish(flights: Dict, key: Hashable, task: asyncio.Task):
+        if flights.get(key) is task:
+            del flights[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved even if every waiter went away
+
+    def in_flight(self) -> int:
+        return sum(len(flights) for flights in self._flights.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight()
+        }
@@ -0,0 +1,44 @@
+from typing import Dict, Any, Mapping, Tuple
+from string import Formatter
+
+# A compiled template: literal text segments, each followed by the slot to fill (or None)
+CompiledTemplate = Tuple[Tuple[str, Any], ...]
+
+def compile_template(template: str) -> CompiledTemplate:
+    """Split a ``{slot}`` template once so rendering is just a join"""
+    parts = []
+    for literal, field, format_spec, conversion in Formatter().parse(template):
+        if field is not None and (format_spec or conversion or not field.isidentifier()):
+            raise ValueError(f"Only plain {{name}} slots are supported, got {{{field}}}")
+        parts.append((literal, field))
+    return tuple(parts)
+
+class TemplateRenderer:
+    """Render named templates with personalization slots, compiling each template once"""
+
+    def __init__(self, templates: Mapping[str, str], defaults: Mapping[str, Any] = None):
+        self.templates = templates
+        self.defaults = dict(defaults or {})
+        self._compiled: Dict[str, CompiledTemplate] = {}
+        self.compiled = 0
+        self.renders = 0
+
+    def compiled_template(self, name: str) -> CompiledTemplate:
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            compiled = compile_template(self.templates[name])
+            self._compiled[name] = compiled
+            self.compiled += 1
+        return compiled
+
+    def render(self, name: str, /, **slots) -> str:
+        """Fill a template's slots; missing slots fall back to ``defaults``"""
+        self.renders += 1
+        values = {**self.defaults, **slots} if self.defaults else slots
+        return "".join(
+            literal if field is None else literal + str(values[field])
+            for literal, field in self.compiled_template(name)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"templates": len(self.templates), "compiled": self.compiled, "renders": self.renders}
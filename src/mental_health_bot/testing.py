@@ -0,0 +1,115 @@
+"""
+Test doubles for running the pipeline without network access
+"""
+
+from typing import Callable, List, Tuple, Union
+import asyncio
+import random
+import threading
+import time
+
+DEFAULT_FAKE_RESPONSE = """EMOTIONS: anxious, worried
+URGENCY: medium
+NEEDS: anxiety_management
+APPROACH: grounding_techniques
+RESPONSE: It sounds like a lot is weighing on you. Let's slow down and take one breath together."""
+
+class FakeResponse:
+    """Mimics the ``.text`` attribute of a Gemini response"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeGenerativeModel:
+    """Local stand-in for ``genai.GenerativeModel`` with configurable latency
+
+    ``response_text`` may be a fixed string or a callable that receives the prompt. With
+    ``stream=True`` the text is returned in ``stream_chunk_size`` character chunks, like the
+    SDK's streaming responses, ``chunk_latency`` apart. A ``failure_rate`` share of calls
+    (drawn with ``seed``) raise ``failure`` after the latency instead of answering.
+    """
+
+    def __init__(self, response_text: Union[str, Callable[[str], str]] = DEFAULT_FAKE_RESPONSE,
+                 latency: float = 0.0, stream_chunk_size: int = 16, chunk_latency: float = 0.0,
+                 failure_rate: float = 0.0, failure: Exception = None, seed: int = 0):
+        self.response_text = response_text
+        self.latency = latency
+        self.stream_chunk_size = stream_chunk_size
+        self.chunk_latency = chunk_latency
+        self.failure_rate = failure_rate
+        self.failure = failure
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt: str) -> FakeResponse:
+        with self._lock:
+            self.calls += 1
+            self.prompts.append(prompt)
+            failed = self.failure_rate and self._rng.random() < self.failure_rate
+            self.failures += bool(failed)
+        if failed:
+            raise self.failure or ConnectionError("injected LLM failure")
+        text = self.response_text(prompt) if callable(self.response_text) else self.response_text
+        return FakeResponse(text)
+
+    def _chunks(self, text: str):
+        return [text[i:i + self.stream_chunk_size] for i in range(0, len(text), self.stream_chunk_size)]
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        if stream:
+            return self._stream(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(prompt)
+
+    def _stream(self, prompt: str):
+        if self.latency:
+            time.sleep(self.latency)
+        for index, chunk in enumerate(self._chunks(self._respond(prompt).text)):
+            if index and self.chunk_latency:
+                time.sleep(self.chunk_latency)
+            yield FakeResponse(chunk)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        if stream:
+            return self._stream_async(prompt)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(prompt)
+
+    async def _stream_async(self, prompt: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for index, chunk in enumerate(self._chunks(self._respond(prompt).text)):
+            if index and self.chunk_latency:
+                await asyncio.sleep(self.chunk_latency)
+            yield FakeResponse(chunk)
+
+# Phrases per emotion profile for synthetic labelled messages (classifier tests and benchmarks)
+LABELLED_PHRASES = {
+    'crisis': ["i want to die", "i want to kill myself", "thinking about suicide", "no reason to live",
+               "i want to end it all", "better off without me"],
+    'anxiety': ["i feel so anxious", "panic attack again", "my heart is racing", "overwhelmed by everything",
+                "cant stop worrying", "so nervous about tomorrow"],
+    'sadness': ["i feel so sad", "really depressed lately", "everything feels hopeless", "empty inside",
+                "crying all the time", "nothing makes me happy"],
+    'connection': ["just wanted to talk", "had an okay day", "thanks for listening", "can we chat",
+                   "work was fine today", "thinking about my weekend"],
+}
+FILLER_WORDS = "and today at work with my family again lately really just so honestly i".split()
+
+def make_labelled_messages(count: int, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """``count`` (message, label) pairs: a profile phrase padded with neutral filler words"""
+    rng = random.Random(seed)
+    labels = sorted(LABELLED_PHRASES)
+    texts, chosen = [], []
+    for _ in range(count):
+        label = rng.choice(labels)
+        words = rng.sample(FILLER_WORDS, rng.randint(0, 5))
+        words.insert(rng.randint(0, len(words)), rng.choice(LABELLED_PHRASES[label]))
+        texts.append(" ".join(words))
+        chosen.append(label)
+    return texts, chosen
@@ -1,9 +1,13 @@
-from typing import List, Dict, Any
-import numpy as np
+from typing import List, Dict, Any, Tuple
+from .keyword_matcher import KeywordAutomaton
+from .features import MessageFeatures
+from .catalog import get_response_catalog
 
 class MentalHealthTools:
     """Advanced custom tools for mental health analysis"""
     
+    ISSUE_WEIGHTS = {'suicidal': 1.0, 'self_harm': 0.9, 'panic': 0.7, 'depression': 0.6}
+    
     def __init__(self):
         self.crisis_keywords = {
             'suicidal': ['kill myself', 'end it all', 'suicide', 'want to die', 'not worth living'],
@@ -11,30 +15,22 @@ class MentalHealthTools:
             'panic': ['panic attack', 'cant breathe', 'heart racing', 'losing control'],
             'depression': ['hopeless', 'empty inside', 'no point', 'cant get out of bed']
         }
+        self.keyword_matcher = KeywordAutomaton(self.crisis_keywords)
         
-    def crisis_detector(self, text: str) -> Dict:
+    def crisis_detector(self, text: str, features: MessageFeatures = None) -> Dict:
         """Advanced crisis detection with multi-layer analysis"""
-        text_lower = text.lower()
+        features = MessageFeatures.of(text, features)
         
         # Layer 1: Keyword matching
-        crisis_level = "low"
-        detected_issues = []
-        
-        for category, keywords in self.crisis_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                detected_issues.append(category)
-                if category in ['suicidal', 'self_harm']:
-                    crisis_level = "high"
-                elif crisis_level != "high" and category in ['panic']:
-                    crisis_level = "medium"
+        crisis_level, detected_issues = self.assess_keywords(features.text_lower)
         
         # Layer 2: Emotional intensity analysis
-        emotional_intensity = self.analyze_emotional_intensity(text)
+        emotional_intensity = self.analyze_emotional_intensity(text, features)
         if emotional_intensity > 0.8 and crisis_level == "low":
             crisis_level = "medium"
             
         # Layer 3: Contextual risk assessment
-        risk_score = self.calculate_risk_score(text, detected_issues)
+        risk_score = self.calculate_risk_score(text, detected_issues, features)
         
         return {
             "crisis_level": crisis_level,
@@ -44,31 +40,56 @@ class MentalHealthTools:
             "immediate_action_required": crisis_level in ["high", "medium"]
         }
     
-    def analyze_emotional_intensity(self, text: str) -> float:
+    def crisis_detector_batch(self, texts: List[str], features: List[MessageFeatures] = None) -> List[Dict]:
+        """crisis_detector over a whole batch, reusing ``features`` already extracted
+
+        The automaton pass dominates the cost, so the scoring layers stay scalar; returns
+        exactly what calling crisis_detector on each text would return.
+        """
+        if features is None:
+            features = [MessageFeatures(text) for text in texts]
+        return [self.crisis_detector(text, message_features) for text, message_features in zip(texts, features)]
+    
+    def assess_keywords(self, text_lower: str) -> Tuple[str, List[str]]:
+        """Keyword layer only: crisis level and detected issues from one automaton pass"""
+        crisis_level = "low"
+        detected_issues = []
+        
+        for category in self.keyword_matcher.matched_categories(text_lower):
+            detected_issues.append(category)
+            if category in ['suicidal', 'self_harm']:
+                crisis_level = "high"
+            elif crisis_level != "high" and category in ['panic']:
+                crisis_level = "medium"
+        
+        return crisis_level, detected_issues
+    
+    def analyze_emotional_intensity(self, text: str, features: MessageFeatures = None) -> float:
         """Analyze emotional intensity from text"""
+        features = MessageFeatures.of(text, features)
         intensity_indicators = [
-            len([w for w in text.split() if w in ['very', 'extremely', 'really', 'so', 'too']]),
-            text.count('!'),
-            len([w for w in text.split() if len(w) > 8]),  # Long words often indicate intensity
-            text.count(' not ')  # Negations often indicate distress
+            features.intensifier_count,
+            features.exclamation_count,
+            features.long_word_count,  # Long words often indicate intensity
+            features.negation_count  # Negations often indicate distress
         ]
         
-        intensity = sum(intensity_indicators) / (len(text.split()) + 1)
+        intensity = sum(intensity_indicators) / (features.word_count + 1)
         return min(intensity, 1.0)
     
-    def calculate_risk_score(self, text: str, issues: List[str]) -> float:
+    def calculate_risk_score(self, text: str, issues: List[str], features: MessageFeatures = None) -> float:
         """Calculate comprehensive risk score"""
+        text_lower = MessageFeatures.of(text, features).text_lower
         base_score = 0.0
         
         # Issue-based scoring
-        issue_weights = {'suicidal': 1.0, 'self_harm': 0.9, 'panic': 0.7, 'depression': 0.6}
         for issue in issues:
-            base_score += issue_weights.get(issue, 0.5)
+            base_score += self.ISSUE_WEIGHTS.get(issue, 0.5)
             
         # Text characteristics
-        if 'help' in text.lower():
+        if 'help' in text_lower:
             base_score += 0.3  # Reaching out is positive but indicates need
-        if 'alone' in text.lower() or 'lonely' in text.lower():
+        if 'alone' in text_lower or 'lonely' in text_lower:
             base_score += 0.2
             
         return min(base_score, 1.0)
@@ -76,37 +97,25 @@ class MentalHealthTools:
     def generate_coping_strategy(self, crisis_data: Dict) -> str:
         """Generate personalized coping strategies"""
         issues = crisis_data['detected_issues']
+        catalog = get_response_catalog()
         
-        strategies = {
-            'suicidal': """🚨 **CRITICAL**: Please contact crisis support immediately:
-• Call 988 (Suicide Prevention)
-• Text HOME to 741741
-• You are not alone - help is available NOW""",
-            
-            'panic': """💨 **Panic Attack Protocol**:
-1. 5-4-3-2-1 Grounding Technique
-2. Deep breathing: 4-4-6 pattern
-3. Focus on one safe object in your environment""",
-            
-            'depression': """🤗 **Depression Support**:
-• Break tasks into tiny steps
-• Reach out to one person today  
-• Remember: feelings aren't facts""",
-            
-            'default': """🌱 **General Wellness**:
-• Practice mindfulness for 5 minutes
-• Connect with nature or pets
-• Engage in gentle physical activity"""
-        }
-        
-        if 'suicidal' in issues:
-            return strategies['suicidal']
-        elif 'panic' in issues:
-            return strategies['panic']
-        elif 'depression' in issues:
-            return strategies['depression']
-        else:
-            return strategies['default']
+        for issue in catalog['coping_priority']:
+            if issue in issues:
+                return catalog['coping_strategies'][issue]
+        return catalog['coping_strategies']['default']
+
+# Global tools instance, created on first access
+_MENTAL_HEALTH_TOOLS = None
+
+def get_mental_health_tools() -> MentalHealthTools:
+    """Shared MentalHealthTools instance (the keyword automaton is compiled once)"""
+    global _MENTAL_HEALTH_TOOLS
+    if _MENTAL_HEALTH_TOOLS is None:
+        _MENTAL_HEALTH_TOOLS = MentalHealthTools()
+    return _MENTAL_HEALTH_TOOLS
 
-# Global tools instance
-MENTAL_HEALTH_TOOLS = MentalHealthTools()
+def __getattr__(name):
+    # MENTAL_HEALTH_TOOLS is kept for backwards compatibility
+    if name == 'MENTAL_HEALTH_TOOLS':
+        return get_mental_health_tools()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,155 @@
+"""
+Per-user risk trajectory
+
+Every message updates a handful of running aggregates instead of storing the scores:
+
+* a fast and a slow exponentially weighted moving average of ``risk_score`` (their gap is
+  the trend, positive while risk is rising)
+* an EWMA of ``emotional_intensity``
+* the maximum risk over the last ``window`` turns, from a monotonic deque
+* a streak counter of consecutive turns with a rising trend
+
+A user is flagged as escalating once the trend has stayed above ``escalation_threshold``
+for ``min_rising_turns`` turns. Updates and queries cost the same on the first turn and the
+thousandth; the monotonic deque is amortized O(1) and never holds more than ``window`` items.
+"""
+
+from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict, deque
+
+DEFAULT_FAST_ALPHA = 0.5
+DEFAULT_SLOW_ALPHA = 0.1
+DEFAULT_WINDOW = 10
+DEFAULT_ESCALATION_THRESHOLD = 0.05
+DEFAULT_MIN_RISING_TURNS = 3
+DEFAULT_MAX_USERS = 10000
+
+class RiskTrajectory:
+    """Running risk aggregates for one user"""
+
+    __slots__ = ('turns', 'fast_risk', 'slow_risk', 'intensity', 'last_risk', 'last_level',
+                 'rising_turns', 'escalating', '_window')
+
+    def __init__(self):
+        self.turns = 0
+        self.fast_risk = 0.0
+        self.slow_risk = 0.0
+        self.intensity = 0.0
+        self.last_risk = 0.0
+        self.last_level = None
+        self.rising_turns = 0
+        self.escalating = False
+        self._window = deque()  # (turn, risk) with strictly decreasing risk: the head is the max
+
+    @property
+    def trend(self) -> float:
+        return self.fast_risk - self.slow_risk
+
+    @property
+    def window_max(self) -> float:
+        return self._window[0][1] if self._window else 0.0
+
+    def update(self, risk: float, intensity: float, level: Optional[str], tracker: 'RiskTrajectoryTracker'):
+        if self.turns == 0:
+            self.fast_risk = self.slow_risk = risk
+            self.intensity = intensity
+        else:
+            self.fast_risk += tracker.fast_alpha * (risk - self.fast_risk)
+            self.slow_risk += tracker.slow_alpha * (risk - self.slow_risk)
+            self.intensity += tracker.fast_alpha * (intensity - self.intensity)
+
+        # Rolling max: drop smaller values from the tail, expired turns from the head
+        window = self._window
+        while window and window[-1][1] <= risk:
+            window.pop()
+        window.append((self.turns, risk))
+        if window[0][0] <= self.turns - tracker.window:
+            window.popleft()
+
+        self.rising_turns = self.rising_turns + 1 if self.trend > tracker.escalation_threshold else 0
+        self.escalating = self.rising_turns >= tracker.min_rising_turns
+        self.last_risk = risk
+        self.last_level = level
+        self.turns += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "risk_ewma": round(self.fast_risk, 4),
+            "risk_baseline": round(self.slow_risk, 4),
+            "risk_trend": round(self.trend, 4),
+            "intensity_ewma": round(self.intensity, 4),
+            "window_max_risk": round(self.window_max, 4),
+            "last_risk": round(self.last_risk, 4),
+            "last_crisis_level": self.last_level,
+            "rising_turns": self.rising_turns,
+            "escalating": self.escalating
+        }
+
+class RiskTrajectoryTracker:
+    """RiskTrajectory per user, with the most recently active ``max_users`` kept"""
+
+    def __init__(self, fast_alpha: float = DEFAULT_FAST_ALPHA, slow_alpha: float = DEFAULT_SLOW_ALPHA,
+                 window: int = DEFAULT_WINDOW, escalation_threshold: float = DEFAULT_ESCALATION_THRESHOLD,
+                 min_rising_turns: int = DEFAULT_MIN_RISING_TURNS, max_users: int = DEFAULT_MAX_USERS):
+        if not 0 < slow_alpha < fast_alpha <= 1:
+            raise ValueError("Expected 0 < slow_alpha < fast_alpha <= 1")
+        self.fast_alpha = fast_alpha
+        self.slow_alpha = slow_alpha
+        self.window = window
+        self.escalation_threshold = escalation_threshold
+        self.min_rising_turns = min_rising_turns
+        self.max_users = max_users
+
+        self._trajectories: 'OrderedDict[str, RiskTrajectory]' = OrderedDict()
+        self._escalating = set()
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.evicted = 0
+
+    def update(self, key: str, risk_score: float, emotional_intensity: float = 0.0,
+               crisis_level: str = None) -> Dict[str, Any]:
+        """Fold one message into the user's trajectory and return the new snapshot"""
+        with self._lock:
+            trajectory = self._trajectories.get(key)
+            if trajectory is None:
+                trajectory = self._trajectories[key] = RiskTrajectory()
+                while len(self._trajectories) > self.max_users:
+                    old_key, _ = self._trajectories.popitem(last=False)
+                    self._escalating.discard(old_key)
+                    self.evicted += 1
+            else:
+                self._trajectories.move_to_end(key)
+
+            trajectory.update(float(risk_score), float(emotional_intensity), crisis_level, self)
+            if trajectory.escalating:
+                self._escalating.add(key)
+            else:
+                self._escalating.discard(key)
+            self.updates += 1
+            return trajectory.snapshot()
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """Current snapshot (all zeros for an unknown user)"""
+        with self._lock:
+            trajectory = self._trajectories.get(key)
+            return (trajectory or RiskTrajectory()).snapshot()
+
+    def escalating_users(self) -> List[str]:
+        """Users whose risk has been rising for at least ``min_rising_turns`` turns"""
+        with self._lock:
+            return list(self._escalating)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._trajectories.pop(key, None)
+            self._escalating.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._trajectories),
+            "escalating": len(self._escalating),
+            "updates": self.updates,
+            "evicted": self.evicted
+        }
@@ -0,0 +1,90 @@
+"""
+Process-pool entry points for CPU-bound analysis
+
+Functions here run inside worker processes, so they must stay importable at module level
+and cheap to pickle. Each worker builds its MentalHealthTools (and so compiles the keyword
+automaton) once, in the pool initializer, and reuses it for every task.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .tools import MentalHealthTools
+from .features import MessageFeatures
+
+_TOOLS: Optional[MentalHealthTools] = None
+
+def init_worker():
+    """Pool initializer: build the tools and pre-compiled matchers once per process"""
+    global _TOOLS
+    _TOOLS = MentalHealthTools()
+
+def worker_tools() -> MentalHealthTools:
+    if _TOOLS is None:
+        init_worker()
+    return _TOOLS
+
+def triage_batch(records: List[Tuple[int, Any, Optional[str], Optional[str]]]) -> List[Dict]:
+    """Crisis triage for a chunk of ``(index, record_id, text, error)`` records"""
+    valid = [(index, record_id, text) for index, record_id, text, error in records if error is None]
+    assessments = iter(worker_tools().crisis_detector_batch([text for _, _, text in valid]))
+
+    results = []
+    for index, record_id, text, error in records:
+        if error is not None:
+            results.append({"index": index, "id": record_id, "error": error})
+        else:
+            results.append({"index": index, "id": record_id, **next(assessments)})
+    return results
+
+def assess_message(text: str) -> Tuple[MessageFeatures, Dict]:
+    """Feature extraction and rule-based crisis assessment for one message"""
+    features = MessageFeatures(text)
+    return features, worker_tools().crisis_detector(text, features)
+
+def assess_messages(texts: List[str]) -> List[Tuple[MessageFeatures, Dict]]:
+    """assess_message over a batch, scored with crisis_detector_batch"""
+    features = [MessageFeatures(text) for text in texts]
+    return list(zip(features, worker_tools().crisis_detector_batch(texts, features)))
+
+def _warm(_) -> int:
+    worker_tools()
+    return os.getpid()
+
+class WorkerPool:
+    """Process pool that runs the CPU-bound analysis stages off the event loop
+
+    Every worker is initialized once with pre-compiled matchers. Any picklable module-level
+    function can be sent with ``run``, so new CPU-bound stages can use the same pool.
+    """
+
+    def __init__(self, workers: int = None, executor: ProcessPoolExecutor = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = executor or ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        self.tasks = 0
+
+    def warm(self) -> int:
+        """Start the workers now instead of on the first message; returns how many answered"""
+        return len(set(self.executor.map(_warm, range(self.workers))))
+
+    async def run(self, func, *args):
+        self.tasks += 1
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def assess(self, text: str) -> Tuple[MessageFeatures, Dict]:
+        return await self.run(assess_message, text)
+
+    async def assess_batch(self, texts: List[str]) -> List[Tuple[MessageFeatures, Dict]]:
+        """Split a batch evenly across the workers and keep the input order"""
+        size = max(1, -(-len(texts) // self.workers))
+        parts = await asyncio.gather(*[
+            self.run(assess_messages, texts[start:start + size]) for start in range(0, len(texts), size)
+        ])
+        return [item for part in parts for item in part]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "tasks": self.tasks}
+
+    def close(self):
+        self.executor.shutdown()
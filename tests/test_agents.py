@@ -1,7 +1,7 @@
 import pytest
 import asyncio
-from src.agents.crisis_detector import CrisisDetectionAgent
-from src.agents.emotion_analyzer import EmotionAnalysisAgent
+from mental_health_bot.agents.crisis_detector import CrisisDetectionAgent
+from mental_health_bot.agents.emotion_analyzer import EmotionAnalysisAgent
 
 class TestCrisisDetectionAgent:
     """Test crisis detection agent functionality"""
@@ -12,13 +12,13 @@ class TestCrisisDetectionAgent:
     
     @pytest.mark.asyncio
     async def test_crisis_detection_high(self, agent):
-        result = await agent.analyze("I want to kill myself")
+        result = await agent.detect_crisis("I want to kill myself", {})
         assert result['crisis_level'] == 'high'
         assert 'suicidal' in result['detected_issues']
     
     @pytest.mark.asyncio
     async def test_crisis_detection_low(self, agent):
-        result = await agent.analyze("I had a good day today")
+        result = await agent.detect_crisis("I had a good day today", {})
         assert result['crisis_level'] == 'low'
 
 class TestEmotionAnalysisAgent:
@@ -30,6 +30,6 @@ class TestEmotionAnalysisAgent:
     
     @pytest.mark.asyncio
     async def test_emotion_detection(self, agent):
-        result = await agent.analyze("I feel anxious and worried")
-        assert 'anxiety' in result['detected_emotions']
-        assert result['emotional_intensity'] >= 0
+        result = await agent.analyze_emotions("I feel anxious and worried", {})
+        assert 'anxious' in result['emotions_detected']
+        assert result['urgency_level'] in ['low', 'medium', 'high']
@@ -0,0 +1,110 @@
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+sys.path.insert(0, BENCHMARKS_DIR)
+
+class TestBenchmarkSuite:
+    """Smoke test for benchmarks/run_benchmarks.py"""
+
+    def test_writes_comparable_json(self, tmp_path):
+        output = tmp_path / "results.json"
+        command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'run_benchmarks.py'),
+                   '--lengths', '5', '--messages', '5', '--min-messages', '5', '--memory-samples', '2',
+                   '--llm-latency-ms', '1', '--output', str(output)]
+
+        subprocess.run(command, check=True, capture_output=True)
+
+        report = json.loads(output.read_text())
+        results = report['results']
+        assert set(results) == {'crisis_detector', 'simple_orchestrator', 'ai_orchestrator', 'parallel_agents'}
+        for lengths in results.values():
+            summary = lengths['5']
+            assert summary['messages'] == 5
+            assert summary['p50_ms'] <= summary['p99_ms']
+            assert summary['peak_traced_kb_per_message'] > 0
+            assert summary['alloc_blocks_per_message'] >= 0
+
+        # Every target was far faster in this baseline, so the comparison must fail the run
+        for lengths in report['results'].values():
+            lengths['5']['p50_ms'] = 1e-9
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps(report))
+
+        compared = subprocess.run(command + ['--compare', str(baseline)], capture_output=True, text=True)
+
+        assert compared.returncode == 1
+        assert 'REGRESSION' in compared.stdout
+
+    def test_compare_flags_only_regressions(self, capsys):
+        import run_benchmarks
+
+        def result(p50, throughput=100.0):
+            return {'5': {'p50_ms': p50, 'throughput_msgs_per_s': throughput}}
+        baseline = {'fast': result(1.0), 'steady': result(1.0), 'better': result(1.0), 'gone': result(1.0)}
+        current = {'fast': result(1.5, 60.0), 'steady': result(1.05), 'better': result(0.5, 200.0), 'new': result(9.0)}
+
+        regressions = run_benchmarks.compare(current, baseline, "baseline.json", regression_pct=10.0)
+
+        assert regressions == ['fast/5']
+        lines = capsys.readouterr().out.splitlines()
+        assert any(line.split()[:1] == ['fast'] and '+50.0%' in line and '-40.0%' in line for line in lines)
+        assert not any(line.split()[:1] == ['new'] for line in lines)
+
+    def test_worker_scaling_benchmark(self, tmp_path):
+        output = tmp_path / "workers.json"
+        command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'bench_workers.py'), '--max-workers', '2',
+                   '--messages', '40', '--words', '20', '--rounds', '1', '--single-rounds', '5', '--output', str(output)]
+
+        subprocess.run(command, check=True, capture_output=True)
+
+        results = json.loads(output.read_text())['results']
+        assert set(results) == {'inline', '1', '2'}
+        assert results['1']['speedup'] == 1.0
+        assert results['inline']['pool_round_trip_us'] > 0 and 'vs_inline' in results['2']
+
+    def test_event_loop_benchmark(self, tmp_path):
+        output = tmp_path / "loop.json"
+        command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'bench_event_loop.py'),
+                   '--messages', '5', '--words', '5', '--output', str(output)]
+
+        subprocess.run(command, check=True, capture_output=True)
+
+        results = json.loads(output.read_text())['results']
+        assert set(results) == {'empty_coroutine', 'process_message'}
+        assert 'saved_ms_per_message' in results['process_message']
+
+    def test_resource_index_benchmark(self, tmp_path):
+        output = tmp_path / "index.json"
+        command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'bench_resource_index.py'), '--services', '500',
+                   '--regions', '5', '--queries', '10', '--scan-queries', '5', '--output', str(output)]
+
+        subprocess.run(command, check=True, capture_output=True)
+
+        results = json.loads(output.read_text())['results']
+        assert {'index_full_query', 'linear_scan_full_query'} <= set(results)
+        assert results['index_full_query']['p50_ms'] <= results['index_full_query']['p99_ms']
+
+    def test_classifier_benchmark(self, tmp_path):
+        output = tmp_path / "classifier.json"
+        command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'bench_classifier.py'), '--train', '200',
+                   '--messages', '200', '--batch-sizes', '1', '50', '--output', str(output)]
+
+        subprocess.run(command, check=True, capture_output=True)
+
+        results = json.loads(output.read_text())['results']
+        assert set(results['batches']) == {'1', '50'}
+        assert 0.0 <= results['confident_share'] <= 1.0
+
+    def test_router_benchmark(self, tmp_path):
+        output = tmp_path / "router.json"
+        command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'bench_router.py'), '--messages', '40',
+                   '--thresholds', '0.5', '0.95', '--llm-latency-ms', '0', '--output', str(output)]
+
+        subprocess.run(command, check=True, capture_output=True)
+
+        results = json.loads(output.read_text())['results']
+        assert set(results) == {'0.5', '0.95'}
+        assert results['0.95']['llm_calls'] >= results['0.5']['llm_calls']
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import pytest
+from mental_health_bot.cache import AnalysisCache, SQLiteCacheBackend, make_cache_key, normalize_message
+from mental_health_bot.testing import FakeGenerativeModel
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestAnalysisCache:
+    """Test the LRU + TTL analysis cache"""
+
+    def test_key_normalizes_message_and_hashes_context(self):
+        assert normalize_message("  I feel   ANXIOUS!! ") == "i feel anxious"
+        assert make_cache_key("I feel anxious", {}) == make_cache_key("i feel  anxious.", None)
+        assert make_cache_key("I feel anxious", {"a": 1}) != make_cache_key("I feel anxious", {"a": 2})
+
+    def test_key_ignores_per_turn_memory_fields(self):
+        early = {"previous_turns": 1, "average_risk": 0.1, "recent_crisis_levels": ['low']}
+        later = {"previous_turns": 9, "average_risk": 0.3, "recent_crisis_levels": ['low', 'medium']}
+        after_crisis = dict(later, recent_crisis_levels=['high', 'low'])
+
+        assert make_cache_key("I feel anxious", early) == make_cache_key("I feel anxious", later)
+        assert make_cache_key("I feel anxious", later) == make_cache_key("I feel anxious", {})
+        assert make_cache_key("I feel anxious", after_crisis) != make_cache_key("I feel anxious", later)
+
+    def test_lru_eviction(self):
+        cache = AnalysisCache(max_size=2)
+        cache.set('a', {'v': 1})
+        cache.set('b', {'v': 2})
+        cache.get('a')
+        cache.set('c', {'v': 3})
+
+        assert cache.get('b') is None
+        assert cache.get('a')['v'] == 1
+        assert cache.stats()['evictions'] == 1
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = AnalysisCache(ttl=10, clock=clock)
+        cache.set('a', {'v': 1})
+
+        assert cache.get('a')['cached'] is True
+        clock.now += 11
+        assert cache.get('a') is None
+        assert cache.stats()['expirations'] == 1
+
+    def test_sqlite_backend_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        AnalysisCache(backend=SQLiteCacheBackend(path)).set('a', {'v': 1})
+
+        restarted = AnalysisCache(backend=SQLiteCacheBackend(path))
+
+        assert restarted.get('a')['v'] == 1
+        assert restarted.stats()['disk_hits'] == 1
+
+    def test_sqlite_backend_is_pruned(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "cache.db")
+        cache = AnalysisCache(ttl=10, backend=SQLiteCacheBackend(path), clock=clock, prune_every=3)
+        cache.set('a', {'v': 1})
+        cache.set('b', {'v': 2})
+        clock.now += 11
+        cache.set('c', {'v': 3})  # third write prunes 'a' and 'b'
+
+        assert cache.stats()['pruned'] == 2
+        cache.set('d', {'v': 4})
+        clock.now += 11
+        reopened = AnalysisCache(ttl=10, backend=SQLiteCacheBackend(path), clock=clock)
+        assert reopened.stats()['pruned'] == 2
+
+    @pytest.mark.asyncio
+    async def test_async_access_keeps_sqlite_off_the_loop(self, tmp_path):
+        backend = SQLiteCacheBackend(str(tmp_path / "cache.db"))
+        threads = []
+        for name in ('get', 'set'):
+            method = getattr(backend, name)
+            def spy(*args, _method=method):
+                threads.append(threading.current_thread())
+                return _method(*args)
+            setattr(backend, name, spy)
+        cache = AnalysisCache(backend=backend)
+
+        await cache.aset('a', {'v': 1})
+        assert (await cache.aget('a'))['v'] == 1  # memory hit: no disk access
+        cache._entries.clear()
+        assert (await cache.aget('a'))['v'] == 1
+        assert await cache.aget('missing') is None
+
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+        assert cache.stats()['disk_hits'] == 1 and cache.stats()['misses'] == 1
+
+class TestIntegrationCaching:
+    """Test the cache in front of analyze_with_ai"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_message_hits_cache(self):
+        model = FakeGenerativeModel()
+        integration = GeminiAIIntegration(model=model)
+
+        await integration.analyze_with_ai("I feel anxious")
+        second = await integration.analyze_with_ai("i feel anxious!")
+
+        assert model.calls == 1
+        assert second['cached'] is True
+
+    @pytest.mark.asyncio
+    async def test_crisis_messages_bypass_cache(self):
+        model = FakeGenerativeModel()
+        integration = GeminiAIIntegration(model=model)
+
+        await integration.analyze_with_ai("I want to kill myself")
+        await integration.analyze_with_ai("I want to kill myself")
+
+        assert model.calls == 2
+        assert len(integration.cache) == 0
+
+class TestRequestCoalescing:
+    """Test single-flight deduplication of identical in-flight analyses"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_messages_share_one_call(self):
+        model = FakeGenerativeModel(latency=0.05)
+        integration = GeminiAIIntegration(model=model, use_cache=False)
+
+        results = await asyncio.gather(*[
+            integration.analyze_with_ai(text) for text in ["I feel anxious", "i feel anxious!", "I feel anxious"]
+        ])
+
+        assert model.calls == 1
+        assert all(r['emotions'] == 'anxious, worried' for r in results)
+        assert results[0] is not results[1]
+        assert integration.stats()['coalescing']['coalesced'] == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_call(self):
+        model = FakeGenerativeModel(latency=0.05)
+        integration = GeminiAIIntegration(model=model, use_cache=False)
+
+        first = asyncio.create_task(integration.analyze_with_ai("I feel anxious"))
+        second = asyncio.create_task(integration.analyze_with_ai("I feel anxious"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        result = await second
+        assert result['ai_generated'] is True
+        assert model.calls == 1
@@ -0,0 +1,152 @@
+import time
+import pytest
+from mental_health_bot.circuit_breaker import CircuitBreaker
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.testing import FakeGenerativeModel
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_breaker(clock, **kwargs):
+    settings = dict(error_rate=0.5, slow_call_ms=100.0, open_seconds=10.0, window=10, min_calls=4)
+    settings.update(kwargs)
+    return CircuitBreaker(clock=clock, **settings)
+
+class TestCircuitBreaker:
+    """Test the breaker's state machine"""
+
+    def test_opens_on_error_rate(self):
+        breaker = make_breaker(FakeClock())
+        for _ in range(2):
+            breaker.record_success(5.0)
+        breaker.record_failure()
+        assert breaker.state == 'closed'
+
+        breaker.record_failure()
+
+        assert breaker.state == 'open'
+        assert breaker.allow() is False
+        assert breaker.stats()['rejected'] == 1 and breaker.stats()['times_opened'] == 1
+
+    def test_opens_on_slow_calls(self):
+        breaker = make_breaker(FakeClock())
+        for _ in range(4):
+            breaker.record_success(250.0)
+
+        assert breaker.state == 'open'
+        assert breaker.stats()['slow_calls'] == 4 and breaker.stats()['failures'] == 0
+
+    def test_half_open_probe_closes_on_success(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        assert breaker.stats()['retry_in_s'] == 10.0
+
+        clock.now = 10.0
+        assert breaker.state == 'half_open'
+        assert breaker.allow() is True
+        assert breaker.allow() is False  # one probe at a time
+        breaker.record_success(5.0)
+
+        assert breaker.state == 'closed' and breaker.stats()['error_rate'] == 0.0
+
+    def test_half_open_probe_failure_reopens(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now = 10.0
+        assert breaker.allow()
+
+        breaker.record_success(500.0)
+
+        assert breaker.state == 'open' and breaker.stats()['times_opened'] == 2
+
+    def test_cancelled_calls(self):
+        clock = FakeClock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record_failure()
+        clock.now = 10.0
+        assert breaker.allow()
+
+        breaker.record_cancelled(1.0)  # abandoned quickly: the probe slot is freed
+        assert breaker.allow()
+        breaker.record_cancelled(150.0)  # abandoned after running slow
+        assert breaker.state == 'open'
+
+    def test_rolling_window_forgets_old_failures(self):
+        breaker = make_breaker(FakeClock(), window=4)
+        for _ in range(3):
+            breaker.record_failure()
+            breaker.record_success(1.0)
+            breaker.record_success(1.0)
+            breaker.record_success(1.0)
+
+        assert breaker.state == 'closed' and breaker.stats()['error_rate'] == 0.25
+
+class TestCircuitBreakerIntegration:
+    """Test GeminiAIIntegration falling back while the circuit is open"""
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_the_llm_and_recovers(self):
+        clock = FakeClock()
+        model = FakeGenerativeModel(failure_rate=1.0)
+        integration = GeminiAIIntegration(model=model, use_cache=False, circuit_breaker=make_breaker(clock))
+
+        for i in range(4):
+            result = await integration.analyze_with_ai(f"message {i}")
+            assert result['simulated_ai'] is True and 'circuit_open' not in result
+        assert model.failures == 4
+
+        t0 = time.perf_counter()
+        skipped = [await integration.analyze_with_ai(f"skipped {i}") for i in range(100)]
+        elapsed = time.perf_counter() - t0
+
+        assert all(result['circuit_open'] is True for result in skipped)
+        assert model.calls == 4
+        assert elapsed / 100 < 0.005
+        assert integration.stats()['circuit_breaker']['state'] == 'open'
+
+        model.failure_rate = 0.0
+        clock.now = 10.0
+        recovered = await integration.analyze_with_ai("back again")
+
+        assert recovered['ai_generated'] is True
+        assert integration.stats()['circuit_breaker']['state'] == 'closed'
+
+    @pytest.mark.asyncio
+    async def test_stream_falls_back_while_open(self):
+        model = FakeGenerativeModel(failure_rate=1.0)
+        integration = GeminiAIIntegration(model=model, use_cache=False,
+                                          circuit_breaker=make_breaker(FakeClock(), min_calls=2))
+
+        for _ in range(2):
+            [e async for e in integration.stream_analysis("work is stressing me out")]
+        events = [e async for e in integration.stream_analysis("work is stressing me out")]
+
+        assert [e['type'] for e in events] == ['header', 'token', 'done']
+        assert events[-1]['analysis']['circuit_open'] is True
+        assert model.calls == 2
+
+    def test_breaker_can_be_disabled(self):
+        assert GeminiAIIntegration(use_circuit_breaker=False).stats()['circuit_breaker'] is None
+
+    def test_fake_model_injects_failures(self):
+        model = FakeGenerativeModel(failure_rate=0.5, failure=TimeoutError("slow backend"), seed=3)
+
+        outcomes = []
+        for _ in range(200):
+            try:
+                model.generate_content("hi")
+                outcomes.append(True)
+            except TimeoutError:
+                outcomes.append(False)
+
+        assert model.failures == outcomes.count(False)
+        assert 60 < model.failures < 140 and model.calls == 200
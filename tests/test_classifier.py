@@ -0,0 +1,114 @@
+import json
+import time
+import pytest
+from mental_health_bot.classifier import EmotionClassifier, train_emotion_classifier
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration, EmotionAnalysisAgent, HEADER_FIELDS
+from mental_health_bot.catalog import get_response_catalog
+from mental_health_bot.cli import main
+from mental_health_bot.testing import FakeGenerativeModel, make_labelled_messages
+
+@pytest.fixture(scope='module')
+def classifier():
+    texts, labels = make_labelled_messages(800, seed=1)
+    return train_emotion_classifier(texts, labels)
+
+class TestEmotionClassifier:
+    """Test the hashing-vectorizer emotion classifier"""
+
+    def test_predicts_held_out_messages(self, classifier):
+        texts, labels = make_labelled_messages(300, seed=2)
+
+        predicted = [result['label'] for result in classifier.predict_batch(texts)]
+
+        accuracy = sum(p == l for p, l in zip(predicted, labels)) / len(labels)
+        assert accuracy > 0.95
+
+    def test_returns_analysis_schema(self, classifier):
+        result = classifier.predict("i feel so anxious and my heart is racing")
+
+        profile = get_response_catalog()['emotion_profiles']['anxiety']
+        assert result['label'] == 'anxiety'
+        assert all(result[field] == profile[field] for field in HEADER_FIELDS + ('response',))
+        assert 0.0 < result['confidence'] <= 1.0
+        assert result['ai_generated'] is False and result['classifier'] is True
+        assert classifier.predict_batch([]) == []
+
+    def test_save_and_load_round_trip(self, classifier, tmp_path):
+        path = str(tmp_path / "model.npz")
+        classifier.save(path)
+        texts, _ = make_labelled_messages(50, seed=3)
+
+        loaded = EmotionClassifier.load(path)
+
+        assert loaded.labels == classifier.labels
+        assert loaded.predict_batch(texts) == classifier.predict_batch(texts)
+        assert (tmp_path / "model.npz").stat().st_size < 512 * 1024
+
+    def test_binary_training(self):
+        texts, labels = make_labelled_messages(200, seed=4)
+        pairs = [(t, l) for t, l in zip(texts, labels) if l in ('anxiety', 'connection')]
+
+        binary = train_emotion_classifier([t for t, _ in pairs], [l for _, l in pairs])
+
+        assert binary.predict("panic attack again")['label'] == 'anxiety'
+        assert binary.predict("thanks for listening")['label'] == 'connection'
+
+    def test_rejects_unknown_labels(self):
+        with pytest.raises(ValueError):
+            train_emotion_classifier(["a", "b"], ["anxiety", "joy"])
+
+    def test_scores_thousands_of_messages_per_second(self, classifier):
+        texts, _ = make_labelled_messages(5000, seed=5)
+        classifier.predict_batch(texts[:10])
+
+        t0 = time.perf_counter()
+        classifier.predict_batch(texts)
+        assert len(texts) / (time.perf_counter() - t0) > 2000
+
+class TestClassifierTier:
+    """Test the classifier as a tier between the cache and the LLM"""
+
+    @pytest.mark.asyncio
+    async def test_confident_messages_skip_the_llm(self, classifier):
+        model = FakeGenerativeModel()
+        integration = GeminiAIIntegration(model=model, classifier=classifier)
+
+        local = await integration.analyze_with_ai("i feel so sad and empty inside")
+        remote = await integration.analyze_with_ai("hello")
+
+        assert local['classifier'] is True and local['needs'] == 'emotional_support'
+        assert remote['emotions'] == 'anxious, worried'
+        assert model.calls == 1
+        assert integration.stats()['classifier'] == {"hits": 1, "misses": 1}
+
+    @pytest.mark.asyncio
+    async def test_simulated_mode_prefers_confident_classifier(self, classifier):
+        integration = GeminiAIIntegration(classifier=classifier)
+        integration.set_model(None)
+        agent = EmotionAnalysisAgent(integration)
+
+        result = await agent.analyze_emotions("so nervous about tomorrow", {})
+
+        assert result['support_needs'] == 'anxiety_management'
+
+    @pytest.mark.asyncio
+    async def test_stream_uses_classifier(self, classifier):
+        model = FakeGenerativeModel()
+        integration = GeminiAIIntegration(model=model, classifier=classifier)
+
+        events = [e async for e in integration.stream_analysis("really depressed lately")]
+
+        assert [e['type'] for e in events] == ['header', 'token', 'done']
+        assert events[-1]['analysis']['classifier'] is True
+        assert model.calls == 0
+
+    def test_train_classifier_command(self, tmp_path, capsys):
+        texts, labels = make_labelled_messages(200, seed=6)
+        source = tmp_path / "labelled.jsonl"
+        source.write_text("\n".join(json.dumps({'message': t, 'label': l}) for t, l in zip(texts, labels)))
+        output = tmp_path / "model.npz"
+
+        assert main(['train-classifier', str(source), '-o', str(output)]) == 0
+
+        assert EmotionClassifier.load(str(output)).predict("i want to die")['label'] == 'crisis'
+        assert "Trained on 200 messages" in capsys.readouterr().out
@@ -0,0 +1,123 @@
+import csv
+import json
+import pytest
+from mental_health_bot import cli
+from mental_health_bot.cli import run_triage, main
+from mental_health_bot.tools import MentalHealthTools
+
+MESSAGES = ["I want to die", "had a nice day", "panic attack and heart racing!!", "feeling hopeless",
+            "not sure", "I cut myself again", "just tired", "extremely anxious"] * 5
+
+def write_jsonl(path, messages):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, message in enumerate(messages):
+            f.write(json.dumps({"id": f"m{i}", "message": message}) + "\n")
+
+def read_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+class TestTriageCLI:
+    """Test streaming bulk triage"""
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_jsonl_results_in_input_order(self, tmp_path, workers):
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, MESSAGES)
+
+        summary = run_triage(str(source), str(output), workers=workers, chunk_size=3)
+        results = read_results(output)
+        tools = MentalHealthTools()
+
+        assert summary['records'] == len(MESSAGES)
+        assert [r['id'] for r in results] == [f"m{i}" for i in range(len(MESSAGES))]
+        assert [r['crisis_level'] for r in results] == [tools.crisis_detector(m)['crisis_level'] for m in MESSAGES]
+
+    def test_csv_and_bad_records(self, tmp_path):
+        source, output = tmp_path / "in.csv", tmp_path / "out.jsonl"
+        with open(source, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "body"])
+            writer.writerow(["a", "I want to die"])
+            writer.writerow(["b", "multi\nline, with commas"])
+
+        summary = run_triage(str(source), str(output), text_field='body', workers=0)
+
+        assert [r['id'] for r in read_results(output)] == ["a", "b"]
+        assert summary['crisis_levels'] == {"high": 1, "low": 1}
+
+        source = tmp_path / "bad.jsonl"
+        source.write_text('{"message": "hi"}\nnot json\n\n{"other": 1}\n')
+        summary = run_triage(str(source), str(output), workers=0)
+
+        assert summary['records'] == 3
+        assert summary['errors'] == 2
+
+    def test_resume_after_interruption(self, tmp_path, monkeypatch):
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        write_jsonl(source, MESSAGES)
+        run_triage(str(source), str(tmp_path / "full.jsonl"), workers=0, chunk_size=4)
+
+        real_batch, calls = cli.triage_batch, []
+
+        def flaky_batch(records):
+            calls.append(len(records))
+            if len(calls) == 4:
+                raise RuntimeError("worker crashed")
+            return real_batch(records)
+
+        monkeypatch.setattr(cli, 'triage_batch', flaky_batch)
+        with pytest.raises(RuntimeError):
+            run_triage(str(source), str(output), workers=0, chunk_size=4)
+        monkeypatch.setattr(cli, 'triage_batch', real_batch)
+
+        summary = run_triage(str(source), str(output), workers=0, chunk_size=4, resume=True)
+
+        assert 0 < summary['resumed_from'] < len(MESSAGES)
+        assert read_results(output) == read_results(tmp_path / "full.jsonl")
+
+    def test_csv_long_and_oversized_fields(self, tmp_path, monkeypatch):
+        source, output = tmp_path / "in.csv", tmp_path / "out.jsonl"
+        with open(source, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "message"])
+            writer.writerow(["long", "I want to die " + "x" * 200000])
+            writer.writerow(["after", "had a nice day"])
+
+        summary = run_triage(str(source), str(output), workers=0)
+
+        assert [r['id'] for r in read_results(output)] == ["long", "after"]
+        assert summary['errors'] == 0 and summary['crisis_levels']['high'] == 1
+
+        monkeypatch.setattr(cli, 'CSV_FIELD_SIZE_LIMIT', 1000)
+        try:
+            summary = run_triage(str(source), str(output), workers=0)
+        finally:
+            csv.field_size_limit(131072)
+        results = read_results(output)
+
+        assert summary == {"records": 2, "errors": 1, "crisis_levels": {"low": 1}, "resumed_from": 0}
+        assert results[0]['error'].startswith("invalid CSV") and results[1]['id'] == "after"
+
+    def test_resume_ignores_checkpoints_for_other_input(self, tmp_path):
+        source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+        checkpoint = tmp_path / "out.jsonl.checkpoint"
+        write_jsonl(source, MESSAGES[:4])
+        run_triage(str(source), str(output), workers=0)
+
+        write_jsonl(source, MESSAGES[:6])
+        summary = run_triage(str(source), str(output), workers=0, resume=True)
+
+        assert summary['resumed_from'] == 0 and len(read_results(output)) == 6
+
+        for broken in ['[]', '{"version": 2}', json.dumps(dict(json.loads(checkpoint.read_text()), records="4"))]:
+            checkpoint.write_text(broken)
+            assert cli.load_checkpoint(str(checkpoint)) is None
+
+    def test_main_prints_summary(self, tmp_path, capsys):
+        source = tmp_path / "in.jsonl"
+        write_jsonl(source, MESSAGES[:4])
+
+        assert main(["triage", str(source), "--workers", "0"]) == 0
+        assert "Triaged 4 records" in capsys.readouterr().out
+        assert len(read_results(f"{source}.triage.jsonl")) == 4
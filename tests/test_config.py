@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import pytest
+from mental_health_bot.config import GeminiAIConfigurator
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.testing import FakeGenerativeModel
+
+class FailingModel:
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, prompt):
+        raise RuntimeError("model unavailable")
+
+class HangingModel:
+    def __init__(self, release: threading.Event):
+        self.release = release
+
+    def generate_content(self, prompt):
+        self.release.wait(5)
+        raise RuntimeError("timed out")
+
+def model_factory(failing=(), latency=0.0, hanging=(), release=None):
+    built = []
+
+    def factory(name):
+        built.append(name)
+        if name in hanging:
+            return HangingModel(release)
+        return FailingModel(name) if name in failing else FakeGenerativeModel(latency=latency)
+    factory.built = built
+    return factory
+
+class TestGeminiAIConfigurator:
+    """Test lazy, concurrent and cached model discovery"""
+
+    def test_discovery_is_lazy(self, tmp_path):
+        factory = model_factory()
+        config = GeminiAIConfigurator(api_key="key", model_factory=factory, cache_path=str(tmp_path / "d.json"))
+
+        assert not config.discovered
+        assert factory.built == []
+
+        assert config.fallback_mode is False
+        assert config.primary_model_name == config.priority_models[0]
+
+    def test_probes_concurrently_and_skips_failures(self, tmp_path):
+        models = ['a', 'b', 'c', 'd']
+        factory = model_factory(failing={'a'}, latency=0.1)
+        config = GeminiAIConfigurator(api_key="key", priority_models=models, model_factory=factory,
+                                      cache_path=str(tmp_path / "d.json"))
+
+        start = time.perf_counter()
+        assert config.discover_models() is True
+
+        assert time.perf_counter() - start < 0.3
+        assert config.primary_model_name == 'b'
+        assert 'a' not in config.working_models
+
+    def test_cached_result_skips_probe(self, tmp_path):
+        cache_path = str(tmp_path / "d.json")
+        GeminiAIConfigurator(api_key="key", priority_models=['x', 'y'], model_factory=model_factory(failing={'x'}),
+                             cache_path=cache_path).discover_models()
+
+        probe = FakeGenerativeModel()
+        config = GeminiAIConfigurator(api_key="key", priority_models=['x', 'y'],
+                                      model_factory=lambda name: probe, cache_path=cache_path)
+
+        assert config.discover_models() is True
+        assert config.primary_model_name == 'y'
+        assert probe.calls == 0
+
+    def test_expired_cache_is_ignored(self, tmp_path):
+        cache_path = tmp_path / "d.json"
+        GeminiAIConfigurator(api_key="key", priority_models=['x'], model_factory=model_factory(),
+                             cache_path=str(cache_path), cache_ttl=-1).discover_models()
+
+        probe = FakeGenerativeModel()
+        GeminiAIConfigurator(api_key="key", priority_models=['x'], model_factory=lambda name: probe,
+                             cache_path=str(cache_path)).discover_models()
+
+        assert probe.calls == 1
+        assert "key" not in cache_path.read_text()
+
+    def test_missing_api_key_falls_back(self, monkeypatch, tmp_path):
+        monkeypatch.delenv('GOOGLE_API_KEY', raising=False)
+        monkeypatch.chdir(tmp_path)
+        config = GeminiAIConfigurator(model_factory=model_factory(), cache_path=str(tmp_path / "d.json"))
+
+        assert config.fallback_mode is True
+        assert config.primary_model is None
+
+    def test_hanging_top_model_keeps_lower_ranked_success(self, tmp_path):
+        release = threading.Event()
+        config = GeminiAIConfigurator(api_key="key", priority_models=['a', 'b'], probe_timeout=0.2,
+                                      model_factory=model_factory(hanging={'a'}, release=release),
+                                      cache_path=str(tmp_path / "d.json"))
+        try:
+            start = time.perf_counter()
+            assert config.discover_models() is True
+            assert time.perf_counter() - start < 1.0
+        finally:
+            release.set()
+
+        assert config.primary_model_name == 'b'
+        assert config.working_models == ['b']
+
+    def test_better_model_is_awaited_within_the_deadline(self, tmp_path):
+        def factory(name):
+            return FakeGenerativeModel(latency=0.1 if name == 'a' else 0.0)
+        config = GeminiAIConfigurator(api_key="key", priority_models=['a', 'b'], model_factory=factory,
+                                      cache_path=str(tmp_path / "d.json"))
+
+        assert config.discover_models() is True
+        assert config.primary_model_name == 'a'
+
+    @pytest.mark.asyncio
+    async def test_concurrent_resolve_waits_for_discovery(self, tmp_path):
+        config = GeminiAIConfigurator(api_key="key", priority_models=['a', 'b'],
+                                      model_factory=model_factory(failing={'a'}, latency=0.2),
+                                      cache_path=str(tmp_path / "d.json"))
+        integration = GeminiAIIntegration(config=config)
+
+        discovery = threading.Thread(target=config.ensure_discovered)
+        discovery.start()
+        await asyncio.sleep(0.05)
+        assert not config.discovered
+
+        await integration.analyze_with_ai("hello")
+        discovery.join()
+
+        assert config.primary_model_name == 'b'
+        assert integration.model is config.primary_model
+
+    def test_models_are_bound_to_their_own_key(self, tmp_path):
+        pytest.importorskip("google.generativeai")
+        cache_path = tmp_path / "d.json"
+        entry = {'primary_model': 'models/gemini-2.0-flash-lite', 'working_models': [], 'expires_at': time.time() + 60}
+        keys = ["AIzaUSER_A", "AIzaUSER_B"]
+        cache_path.write_text(json.dumps({hashlib.sha256(k.encode()).hexdigest()[:16]: entry for k in keys}))
+
+        # Both come from the discovery cache, so neither model is probed before it is used
+        configs = [GeminiAIConfigurator(api_key=key, cache_path=str(cache_path)) for key in keys]
+        for config in configs:
+            assert config.discover_models()
+
+        for key, config in zip(keys, configs):
+            model = config.primary_model
+            assert model._client._client_options.api_key == key
+
+    @pytest.mark.asyncio
+    async def test_async_client_uses_the_models_key(self):
+        pytest.importorskip("google.generativeai")
+        config = GeminiAIConfigurator(api_key="AIzaUSER_A")
+        config._clients = config._make_clients("AIzaUSER_A")
+
+        model = config._build_model('models/gemini-2.0-flash-lite')
+
+        assert model._async_client._client._client_options.api_key == "AIzaUSER_A"
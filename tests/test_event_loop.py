@@ -0,0 +1,38 @@
+import asyncio
+import concurrent.futures
+import pytest
+from mental_health_bot.event_loop import BackgroundEventLoop
+
+class TestBackgroundEventLoop:
+    """Test the persistent event loop used by synchronous front ends"""
+
+    def test_runs_every_coroutine_on_the_same_loop(self):
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        with BackgroundEventLoop() as background:
+            loops = {background.run(current_loop()) for _ in range(3)}
+
+            assert loops == {background.loop}
+            assert background.stats()['submitted'] == 3
+
+    def test_exceptions_and_timeouts_propagate(self):
+        async def fail():
+            raise ValueError("boom")
+
+        with BackgroundEventLoop() as background:
+            with pytest.raises(ValueError):
+                background.run(fail())
+            with pytest.raises(concurrent.futures.TimeoutError):
+                background.run(asyncio.sleep(1), timeout=0.01)
+
+            assert background.stats()['failed'] == 1
+            assert background.stats()['timed_out'] == 1
+
+    def test_closed_loop_rejects_work(self):
+        background = BackgroundEventLoop()
+        background.close()
+
+        assert not background.is_running
+        with pytest.raises(RuntimeError):
+            background.run(asyncio.sleep(0))
@@ -0,0 +1,41 @@
+import pytest
+from mental_health_bot.features import MessageFeatures
+from mental_health_bot.tools import MentalHealthTools
+
+def reference_intensity(text):
+    indicators = [
+        len([w for w in text.split() if w in ['very', 'extremely', 'really', 'so', 'too']]),
+        text.count('!'),
+        len([w for w in text.split() if len(w) > 8]),
+        text.count(' not ')
+    ]
+    return min(sum(indicators) / (len(text.split()) + 1), 1.0)
+
+class TestMessageFeatures:
+    """Test single-pass feature extraction"""
+
+    @pytest.mark.parametrize("text", [
+        "",
+        "I am so very tired!!",
+        "Everything is overwhelming and I do not know what to do",
+        "I am NOT okay, really not okay?",
+    ])
+    def test_intensity_matches_reference(self, text):
+        tools = MentalHealthTools()
+        assert tools.analyze_emotional_intensity(text, MessageFeatures(text)) == reference_intensity(text)
+
+    def test_counts(self):
+        features = MessageFeatures("Help! I'm really alone and not coping?")
+
+        assert features.text_lower == "help! i'm really alone and not coping?"
+        assert features.word_count == 7
+        assert features.intensifier_count == 1
+        assert features.exclamation_count == 1
+        assert features.question_count == 1
+        assert features.negation_count == 1
+
+    def test_of_reuses_matching_features(self):
+        features = MessageFeatures("hello there")
+
+        assert MessageFeatures.of("hello there", features) is features
+        assert MessageFeatures.of("something else", features) is not features
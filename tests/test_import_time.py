@@ -0,0 +1,34 @@
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ['google.generativeai', 'dotenv', 'numpy', 'sklearn', 'pandas', 'streamlit']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import mental_health_bot, mental_health_bot.tools, mental_health_bot.simple_orchestrator
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({"ms": elapsed, "heavy": [m for m in %r if m in sys.modules]}))
+""" % HEAVY_MODULES
+
+def run_probe():
+    output = subprocess.run([sys.executable, '-c', PROBE], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+class TestImportTime:
+    """Guard the fast rule-based import path (see benchmarks/bench_import.py)"""
+
+    def test_rule_based_path_skips_heavy_dependencies(self):
+        assert run_probe()['heavy'] == []
+
+    def test_rule_based_path_import_time(self):
+        # Budget is 50 ms; allow headroom for noisy CI machines
+        assert min(run_probe()['ms'] for _ in range(3)) < 100
+
+    def test_singletons_are_still_available(self):
+        from mental_health_bot import mental_health_agent, MentalHealthAgent
+        from mental_health_bot.tools import MENTAL_HEALTH_TOOLS, get_mental_health_tools
+
+        assert isinstance(mental_health_agent, MentalHealthAgent)
+        assert MENTAL_HEALTH_TOOLS is get_mental_health_tools()
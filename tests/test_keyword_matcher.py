@@ -0,0 +1,48 @@
+import random
+import pytest
+from mental_health_bot.keyword_matcher import KeywordAutomaton, KeywordMatch
+from mental_health_bot.tools import MentalHealthTools
+
+def naive_categories(keywords, text_lower):
+    return [category for category, phrases in keywords.items()
+            if any(phrase in text_lower for phrase in phrases)]
+
+class TestKeywordAutomaton:
+    """Test the compiled crisis keyword matcher"""
+
+    @pytest.fixture
+    def keywords(self):
+        return MentalHealthTools().crisis_keywords
+
+    def test_matches_substring_scan_on_existing_lexicon(self, keywords):
+        automaton = KeywordAutomaton(keywords)
+        vocabulary = [phrase for phrases in keywords.values() for phrase in phrases]
+        vocabulary += ['i', 'feel', 'so', 'tired', 'myself', 'die', 'panic', 'no', 'point!', 'cant']
+        rng = random.Random(7)
+
+        for _ in range(500):
+            text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12))).lower()
+            assert automaton.matched_categories(text) == naive_categories(keywords, text)
+
+    def test_reports_match_positions(self, keywords):
+        automaton = KeywordAutomaton(keywords)
+        text = "i feel hopeless and want to die"
+
+        matches = automaton.find_all(text)
+
+        assert KeywordMatch('depression', 'hopeless', 7, 15) in matches
+        assert KeywordMatch('suicidal', 'want to die', 20, 31) in matches
+        for match in matches:
+            assert text[match.start:match.end] == match.keyword
+
+    def test_overlapping_phrases_are_all_reported(self):
+        automaton = KeywordAutomaton({'a': ['he', 'she', 'hers'], 'b': ['his']})
+
+        grouped = automaton.match_categories('ushers')
+
+        assert [m.keyword for m in grouped['a']] == ['she', 'he', 'hers']
+        assert 'b' not in grouped
+
+    def test_rejects_empty_phrase(self):
+        with pytest.raises(ValueError):
+            KeywordAutomaton({'a': ['']})
@@ -0,0 +1,59 @@
+import asyncio
+import time
+import pytest
+from mental_health_bot.llm_client import AsyncLLMClient
+from mental_health_bot.testing import FakeGenerativeModel
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+
+class TestAsyncLLMClient:
+    """Test the non-blocking LLM client against a fake model"""
+
+    @pytest.mark.asyncio
+    async def test_calls_overlap_without_blocking_loop(self):
+        client = AsyncLLMClient(FakeGenerativeModel(latency=0.1), max_concurrency=5)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(ticker(), *[client.generate("hi") for _ in range(5)])
+
+        assert time.perf_counter() - start < 0.3
+        assert ticks == 5
+        assert client.completed == 5
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        client = AsyncLLMClient(FakeGenerativeModel(latency=0.05), max_concurrency=1)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client.generate("hi") for _ in range(4)])
+
+        assert time.perf_counter() - start >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_cancellation(self):
+        client = AsyncLLMClient(FakeGenerativeModel(latency=0.5), use_async_api=True)
+
+        task = asyncio.create_task(client.generate("hi"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert client.cancelled == 1
+        assert client.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_integration_parses_fake_model_output(self):
+        integration = GeminiAIIntegration(model=FakeGenerativeModel())
+
+        result = await integration.analyze_with_ai("I feel anxious")
+
+        assert result['ai_generated'] is True
+        assert result['urgency'] == 'medium'
+        assert result['emotions'] == 'anxious, worried'
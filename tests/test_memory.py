@@ -0,0 +1,190 @@
+import sys
+import threading
+import pytest
+from mental_health_bot.memory import ConversationMemory, Turn
+from mental_health_bot.ai_orchestrator import MentalHealthOrchestrator
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.testing import FakeGenerativeModel
+
+def fill(memory, key, count, level='low'):
+    for i in range(count):
+        memory.record(key, f"message {i}", level, i / 100.0, 'sad', timestamp=1000.0 + i)
+
+class TestConversationMemory:
+    """Test the bounded conversation memory and its SQLite overflow"""
+
+    def test_turns_are_compact(self):
+        turn = Turn(0, 0.0, "hi", 'low', 0.1, 'calm')
+
+        assert not hasattr(turn, '__dict__')
+        assert sys.getsizeof(turn) < 100
+
+    def test_ring_buffer_overflows_to_sqlite(self, tmp_path):
+        memory = ConversationMemory(str(tmp_path / "memory.db"), max_recent=5)
+        fill(memory, 'u1', 12)
+
+        recent = memory.recent('u1')
+        assert [t.seq for t in recent] == [7, 8, 9, 10, 11]
+        assert memory.stats()['overflowed'] == 7
+        assert [t.message for t in memory.history('u1', limit=100)] == [f"message {i}" for i in range(12)]
+        assert [t.seq for t in memory.history('u1', limit=8)] == list(range(4, 12))
+
+    def test_without_a_path_overflow_is_dropped(self):
+        memory = ConversationMemory(max_recent=5, max_conversations=2)
+        fill(memory, 'u1', 12)
+        fill(memory, 'u2', 1)
+        fill(memory, 'u3', 1)  # evicts u1
+
+        assert memory._db is None
+        assert memory.stats()['dropped'] == 7 + 5
+        assert memory.recent('u1') == [] and memory.summary('u1')['turns'] == 0
+        assert [t.seq for t in memory.history('u2')] == [0]
+
+    def test_summary_covers_every_turn(self):
+        memory = ConversationMemory(max_recent=3)
+        fill(memory, 'u1', 10)
+        memory.record('u1', "I want to die", 'high', 0.95, 'hopeless')
+
+        summary = memory.summary('u1')
+        assert summary['turns'] == 11
+        assert summary['level_counts'] == [10, 0, 1]
+        assert summary['peak_risk'] == pytest.approx(0.95)
+
+        context = memory.context('u1')
+        assert context['previous_turns'] == 11
+        assert context['recent_crisis_levels'] == ['low', 'low', 'high']
+        assert context['crisis_counts'] == {'low': 10, 'medium': 0, 'high': 1}
+        assert memory.context('nobody') == {}
+
+    def test_context_size_does_not_grow(self):
+        memory = ConversationMemory(max_recent=4)
+        fill(memory, 'u1', 5)
+        small = memory.context('u1')
+        fill(memory, 'u1', 500)
+
+        assert len(repr(memory.context('u1'))) <= len(repr(small)) + 10
+        assert len(memory.recent('u1')) == 4
+
+    def test_evicted_conversations_reload(self, tmp_path):
+        path = str(tmp_path / "memory.db")
+        memory = ConversationMemory(path, max_recent=3, max_conversations=2)
+        for key in ('a', 'b', 'c'):
+            fill(memory, key, 4)
+
+        stats = memory.stats()
+        assert stats['conversations_in_memory'] == 2 and stats['evicted'] == 1
+        assert memory.summary('a')['turns'] == 4
+        assert [t.seq for t in memory.recent('a')] == [1, 2, 3]
+        memory.close()
+
+        reopened = ConversationMemory(path)
+        assert reopened.summary('c')['turns'] == 4
+        assert len(reopened.history('b')) == 4
+
+    def test_restart_without_close_keeps_numbering(self, tmp_path):
+        path = str(tmp_path / "memory.db")
+        crashed = ConversationMemory(path, max_recent=3)
+        fill(crashed, 'u1', 6)  # turns 0-2 overflowed to disk, 3-5 only in the buffer
+
+        restarted = ConversationMemory(path, max_recent=3)
+        restarted.record('u1', "after restart")
+
+        history = restarted.history('u1', limit=100)
+        assert [t.seq for t in history] == [0, 1, 2, 6]
+        assert history[0].message == "message 0"
+        assert restarted.summary('u1')['turns'] == 7
+
+    def test_summary_is_rebuilt_from_turns(self, tmp_path):
+        path = str(tmp_path / "memory.db")
+        memory = ConversationMemory(path, max_recent=2)
+        fill(memory, 'u1', 5, level='medium')
+        memory.db.execute("DELETE FROM summaries")
+        memory.db.commit()
+
+        restarted = ConversationMemory(path, max_recent=2)
+
+        summary = restarted.summary('u1')
+        assert summary['turns'] == 3 and summary['level_counts'] == [0, 3, 0]
+        assert restarted.record('u1', "next").seq == 3
+
+    def test_orchestrator_close_persists_buffered_turns(self, tmp_path):
+        path = str(tmp_path / "memory.db")
+        orchestrator = MentalHealthOrchestrator(ai_integration=GeminiAIIntegration(model=FakeGenerativeModel()),
+                                                memory=ConversationMemory(path))
+        orchestrator.memory.record('u1', "hello")
+
+        orchestrator.close()
+
+        assert [t.message for t in ConversationMemory(path).history('u1')] == ["hello"]
+
+    def test_clear_forgets_everything(self):
+        memory = ConversationMemory(max_recent=2)
+        fill(memory, 'u1', 5)
+
+        memory.clear('u1')
+
+        assert memory.recent('u1') == [] and memory.history('u1') == []
+        assert memory.summary('u1')['turns'] == 0
+
+    def test_long_messages_are_truncated(self):
+        memory = ConversationMemory(max_message_chars=10)
+
+        assert memory.record('u1', "x" * 1000).message == "x" * 10
+
+class TestOrchestratorMemory:
+    """Test that the orchestrator feeds the conversation summary into user_context"""
+
+    @pytest.mark.asyncio
+    async def test_async_access_runs_sqlite_off_the_loop(self, tmp_path):
+        memory = ConversationMemory(str(tmp_path / "memory.db"), max_recent=2)
+        threads = []
+        for name in ('record', 'context'):
+            method = getattr(memory, name)
+            def spy(*args, _method=method):
+                threads.append(threading.current_thread())
+                return _method(*args)
+            setattr(memory, name, spy)
+
+        for i in range(3):
+            await memory.arecord('u1', f"message {i}", 'low', 0.1)
+        context = await memory.acontext('u1')
+
+        assert context['previous_turns'] == 3
+        assert len(threads) == 4 and threading.main_thread() not in threads
+        memory.close()
+
+    @pytest.mark.asyncio
+    async def test_user_context_comes_from_memory(self):
+        memory = ConversationMemory()
+        orchestrator = MentalHealthOrchestrator(
+            ai_integration=GeminiAIIntegration(model=FakeGenerativeModel()), memory=memory)
+        seen = []
+        original = orchestrator.parallel_agents.process_message
+
+        async def spy(message, user_context, *args, **kwargs):
+            seen.append(dict(user_context))
+            return await original(message, user_context, *args, **kwargs)
+        orchestrator.parallel_agents.process_message = spy
+
+        await orchestrator.process_user_message("I feel anxious about work", user_id='u1')
+        await orchestrator.process_user_message("I want to die", user_id='u1')
+        await orchestrator.process_user_message("hello", session_id='s1')
+        await orchestrator.process_user_message("anonymous")
+
+        assert seen[0] == {} and seen[2] == {} and seen[3] == {}
+        assert seen[1]['previous_turns'] == 1
+        assert memory.summary('u1')['level_counts'][2] == 1
+        assert memory.summary('s1')['turns'] == 1
+        assert memory.stats()['recorded'] == 3
+
+    @pytest.mark.asyncio
+    async def test_memory_context_keeps_the_cache_warm(self):
+        model = FakeGenerativeModel()
+        orchestrator = MentalHealthOrchestrator(
+            ai_integration=GeminiAIIntegration(model=model), memory=ConversationMemory())
+
+        await orchestrator.process_user_message("work is stressing me out")
+        for _ in range(3):
+            await orchestrator.process_user_message("work is stressing me out", user_id='u1')
+
+        assert model.calls == 1
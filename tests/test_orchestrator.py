@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+import pytest
+from mental_health_bot.catalog import json_default
+from mental_health_bot.ai_orchestrator import ParallelAgentsSystem, MentalHealthOrchestrator
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.router import ConfidenceRouter
+from mental_health_bot.testing import FakeGenerativeModel
+
+class TestParallelAgentsSystem:
+    """Test the parallel agent pipeline"""
+
+    @pytest.mark.asyncio
+    async def test_all_agents_report(self):
+        system = ParallelAgentsSystem()
+
+        result = await system.process_message("I feel anxious about work", {})
+
+        assert result['agents_used'] == 4
+        assert set(result['agent_latency_ms']) == set(result['agent_results'])
+        assert all('error' not in r for r in result['agent_results'].values())
+
+    @pytest.mark.asyncio
+    async def test_output_is_json_serializable(self):
+        orchestrator = MentalHealthOrchestrator(ai_integration=GeminiAIIntegration(model=FakeGenerativeModel()))
+
+        output = await orchestrator.process_user_message("I feel anxious about work", user_id='u1')
+
+        decoded = json.loads(json.dumps(output, default=json_default))
+        assert decoded['user_id'] == 'u1'
+        assert decoded['agent_analysis']['support_planner']['support_plan']['immediate_actions'][0]
+        with pytest.raises(TypeError):
+            output['agent_analysis']['support_planner']['support_plan']['edited'] = True
+
+    @pytest.mark.asyncio
+    async def test_slow_agent_falls_back_within_budget(self):
+        system = ParallelAgentsSystem(agent_timeouts={'emotion_analyzer': 0.05})
+
+        async def slow_analysis(text, context=None, features=None, crisis_data=None):
+            await asyncio.sleep(1)
+
+        system.emotion_agent.ai_integration = type(system.emotion_agent.ai_integration)()
+        system.emotion_agent.ai_integration.analyze_with_ai = slow_analysis
+
+        start = time.perf_counter()
+        result = await system.process_message("I feel so sad", {})
+        elapsed = time.perf_counter() - start
+
+        emotion = result['agent_results']['emotion_analyzer']
+        assert elapsed < 0.5
+        assert emotion['timed_out'] is True
+        assert emotion['emotions_detected'] == "sad, depressed, hopeless"
+
+    @pytest.mark.asyncio
+    async def test_primary_response_is_the_emotion_agent_reply(self):
+        system = ParallelAgentsSystem()
+
+        result = await system.process_message("I feel so sad", {})
+
+        emotion = result['agent_results']['emotion_analyzer']
+        assert result['final_response']['primary_response'] == emotion['agent_response']
+        assert emotion['agent_response'].startswith("🤗 I hear you're feeling really low")
+
+class TestCrisisFastPath:
+    """Test the staged pipeline for high crisis levels"""
+
+    @pytest.mark.asyncio
+    async def test_high_crisis_skips_the_llm(self):
+        model = FakeGenerativeModel(latency=1.0)
+        system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(model=model))
+
+        start = time.perf_counter()
+        result = await system.process_message("I want to die", {})
+
+        assert time.perf_counter() - start < 0.2
+        assert model.calls == 0
+        assert result['fast_path'] is True
+        assert result['agent_results']['emotion_analyzer']['skipped'] is True
+        assert result['final_response']['primary_response'] == \
+            result['agent_results']['crisis_detector']['coping_strategy']
+
+    @pytest.mark.asyncio
+    async def test_background_enrichment_fills_in_the_analysis(self):
+        enriched = []
+        model = FakeGenerativeModel(latency=0.05)
+        system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(model=model),
+                                      background_enrichment=True, on_enrichment=enriched.append)
+
+        result = await system.process_message("I want to die", {})
+        assert result['agent_results']['emotion_analyzer']['deferred'] is True
+
+        await system.wait_for_enrichment()
+
+        assert enriched == [result]
+        assert result['agent_results']['emotion_analyzer']['emotions_detected'] == "anxious, worried"
+
+    @pytest.mark.asyncio
+    async def test_fast_path_can_be_disabled(self):
+        model = FakeGenerativeModel()
+        system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(model=model), fast_path=False)
+
+        result = await system.process_message("I want to die", {})
+
+        assert result['fast_path'] is False
+        assert model.calls == 1
+
+class TestSingleCrisisScan:
+    """The crisis assessment made up front is reused by the emotion analysis"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("message", ["I had a good day today", "hmm"])
+    async def test_keywords_are_scanned_once_per_message(self, monkeypatch, message):
+        system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(model=FakeGenerativeModel(),
+                                                                         router=ConfidenceRouter()))
+        scans = []
+        assess_keywords = system.tools.assess_keywords
+        monkeypatch.setattr(system.tools, 'assess_keywords', lambda text: scans.append(text) or assess_keywords(text))
+
+        await system.process_message(message, {})
+        [e async for e in system.stream_message(message, {})]
+
+        assert len(scans) == 2
@@ -0,0 +1,83 @@
+import asyncio
+import random
+import pytest
+from mental_health_bot.tools import MentalHealthTools
+from mental_health_bot.simple_orchestrator import SimpleMentalHealthOrchestrator
+from mental_health_bot.ai_orchestrator import MentalHealthOrchestrator
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.testing import FakeGenerativeModel
+
+VOCABULARY = ("i feel so very tired help alone lonely not hopeless want to die panic attack "
+              "cant breathe extremely really !! bleeding empty inside no point unbelievably").split()
+
+def random_messages(count, seed=3):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(0, 15))) for _ in range(count)]
+
+class TestBatchProcessing:
+    """Test batch scoring of many messages"""
+
+    def test_crisis_detector_batch_matches_scalar(self):
+        tools = MentalHealthTools()
+        messages = random_messages(2000) + ["", " not ", "!!!!"]
+
+        assert tools.crisis_detector_batch(messages) == [tools.crisis_detector(m) for m in messages]
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_streams_in_input_order(self):
+        orchestrator = MentalHealthOrchestrator(
+            ai_integration=GeminiAIIntegration(model=FakeGenerativeModel(latency=0.01), use_cache=False))
+        messages = random_messages(25)
+
+        results = [r async for r in orchestrator.process_many(messages, concurrency=4, batch_size=10)]
+
+        tools = MentalHealthTools()
+        assert len(results) == len(messages)
+        assert [r['crisis_assessment'] for r in results] == [tools.crisis_detector(m) for m in messages]
+        for result in results:
+            emotion = result['agent_analysis']['emotion_analyzer']
+            if result['crisis_assessment']['crisis_level'] == 'high':
+                assert emotion['skipped'] is True
+            else:
+                assert emotion['emotions_detected'] == 'anxious, worried'
+
+    @pytest.mark.asyncio
+    async def test_simple_orchestrator_process_many(self):
+        orchestrator = SimpleMentalHealthOrchestrator()
+        messages = random_messages(30)
+
+        results = [r async for r in orchestrator.process_many(messages, concurrency=4, batch_size=7)]
+
+        expected = [orchestrator._detect_crisis(m) for m in messages]
+        assert [r['crisis_assessment'] for r in results] == expected
+
+    @pytest.mark.asyncio
+    async def test_same_user_updates_follow_input_order(self):
+        orchestrator = MentalHealthOrchestrator(
+            ai_integration=GeminiAIIntegration(model=FakeGenerativeModel(latency=0.02), use_cache=False))
+        # High-crisis messages skip the LLM, so they finish before the messages ahead of them
+        messages = ["had a long day", "I want to die", "feeling a bit low", "I want to kill myself"]
+
+        results = [r async for r in orchestrator.process_many(messages, concurrency=4, user_id="u1")]
+
+        assert [turn.message for turn in orchestrator.memory.history("u1")] == messages
+        assert [r['risk_trajectory']['turns'] for r in results] == [1, 2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_simple_process_many_yields_between_batches(self):
+        orchestrator = SimpleMentalHealthOrchestrator()
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0)
+
+        task = asyncio.ensure_future(ticker())
+        try:
+            results = [r async for r in orchestrator.process_many(random_messages(30), batch_size=10)]
+        finally:
+            task.cancel()
+
+        assert len(results) == 30
+        assert len(ticks) >= 3
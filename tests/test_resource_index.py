@@ -0,0 +1,145 @@
+import math
+import random
+import time
+import pytest
+from mental_health_bot.resource_index import ResourceIndex, build_resource_index
+from mental_health_bot.agents.resource_matcher import ResourceMatchingAgent
+from mental_health_bot.ai_orchestrator import ParallelAgentsSystem
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.cli import main
+from mental_health_bot.testing import FakeGenerativeModel
+
+CATEGORIES = ['suicidal', 'self_harm', 'panic', 'depression', 'general']
+REGIONS = ['US-CA', 'US-NY', 'GB-LND', 'IN-MH']
+LANGUAGES = ['en', 'es', 'hi']
+
+def make_services(count, seed=7):
+    rng = random.Random(seed)
+    services = []
+    for i in range(count):
+        open_hour = rng.choice([0, 8, 9, 20])
+        services.append({
+            'id': 1000 + i,
+            'name': f"Service {i} ✓",
+            'contact': f"+1-555-{i:04d}",
+            'lat': rng.uniform(30.0, 45.0),
+            'lon': rng.uniform(-125.0, -70.0),
+            'region': rng.choice(REGIONS),
+            'categories': rng.sample(CATEGORIES, rng.randint(1, 2)),
+            'languages': rng.sample(LANGUAGES, rng.randint(1, 2)),
+            'open_hour': open_hour,
+            'close_hour': {0: 24, 8: 18, 9: 17, 20: 6}[open_hour]
+        })
+    return services
+
+def distance_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+def is_open(service, hour):
+    open_hour, close_hour = service['open_hour'], service['close_hour']
+    if open_hour <= close_hour:
+        return open_hour <= hour < close_hour
+    return hour >= open_hour or hour < close_hour
+
+@pytest.fixture(scope='module')
+def services():
+    return make_services(3000)
+
+@pytest.fixture(scope='module')
+def index(services, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('resource_index'))
+    build_resource_index(services, path, cell_degrees=0.5)
+    return ResourceIndex.load(path)
+
+class TestResourceIndex:
+    """Test the memory-mapped resource index against a linear scan"""
+
+    def test_arrays_are_memory_mapped(self, index, services):
+        import numpy as np
+
+        assert len(index) == len(services)
+        assert isinstance(index.records, np.memmap) and isinstance(index.postings, np.memmap)
+
+    def test_filters_match_linear_scan(self, index, services):
+        rng = random.Random(1)
+        for _ in range(50):
+            categories = rng.sample(CATEGORIES, rng.randint(1, 2))
+            region, language, hour = rng.choice(REGIONS), rng.choice(LANGUAGES), rng.randint(0, 23)
+            near, radius = (rng.uniform(32, 43), rng.uniform(-120, -75)), rng.choice([50, 200, 500])
+
+            found = index.query(categories=categories, region=region, language=language, near=near,
+                                radius_km=radius, open_at_hour=hour, limit=10000)
+
+            expected = [
+                s for s in services
+                if set(categories) & set(s['categories']) and s['region'] == region
+                and language in s['languages'] and is_open(s, hour) and distance_km(near, (s['lat'], s['lon'])) <= radius
+            ]
+            assert {r['id'] for r in found} == {s['id'] for s in expected}
+            distances = [r['distance_km'] for r in found]
+            assert distances == sorted(distances)
+
+    def test_result_fields(self, index, services):
+        result = index.query(categories=['panic'], limit=1)[0]
+        service = next(s for s in services if s['id'] == result['id'])
+
+        assert result['name'] == service['name'] and result['contact'] == service['contact']
+        assert set(result['categories']) == set(service['categories'])
+        assert result['region'] == service['region']
+        assert 'distance_km' not in result
+        assert index.query(categories=['unknown']) == []
+        assert len(index.query(limit=3)) == 3
+
+    def test_query_is_sub_millisecond(self, index):
+        index.query(categories=['panic', 'depression'], region='US-CA', near=(37.7, -122.4), radius_km=100)
+        timings = []
+        for _ in range(200):
+            t0 = time.perf_counter()
+            index.query(categories=['panic', 'depression'], region='US-CA', near=(37.7, -122.4), radius_km=100)
+            timings.append(time.perf_counter() - t0)
+
+        assert sorted(timings)[len(timings) // 2] < 0.001
+
+class TestResourceMatching:
+    """Test ResourceMatchingAgent and the orchestrator with a resource index"""
+
+    @pytest.mark.asyncio
+    async def test_agent_uses_detected_issues_and_context(self, index):
+        agent = ResourceMatchingAgent(index, max_services=3, radius_km=500)
+        context = {'region': 'US-NY', 'location': (40.7, -74.0), 'language': 'en'}
+
+        result = await agent.match_resources("I keep having panic attacks", context)
+
+        assert result['matched_resources'] == agent.fallback_result("", {})['matched_resources']
+        assert 1 <= len(result['local_services']) <= 3
+        for service in result['local_services']:
+            assert 'panic' in service['categories'] and service['region'] == 'US-NY'
+
+    @pytest.mark.asyncio
+    async def test_agent_without_index_keeps_catalog_result(self):
+        result = await ResourceMatchingAgent().match_resources("I keep having panic attacks", {})
+
+        assert 'local_services' not in result
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_reports_local_services(self, index):
+        system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(model=FakeGenerativeModel()),
+                                      resource_index=index)
+
+        result = await system.process_message("I want to die", {'region': 'US-CA'})
+
+        services = result['final_response']['local_services']
+        assert services and all('suicidal' in s['categories'] for s in services)
+
+    def test_build_index_command(self, tmp_path, capsys):
+        import json
+
+        source = tmp_path / "services.jsonl"
+        source.write_text("\n".join(json.dumps(s) for s in make_services(20)) + "\n")
+
+        assert main(['build-index', str(source), str(tmp_path / 'index')]) == 0
+
+        assert len(ResourceIndex.load(str(tmp_path / 'index'))) == 20
+        assert "Indexed 20 services" in capsys.readouterr().out
@@ -0,0 +1,183 @@
+import json
+import pytest
+from mental_health_bot.response_parser import ResponseParser, ParseMetrics, parse_response, is_complete
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.testing import FakeGenerativeModel, DEFAULT_FAKE_RESPONSE
+
+REORDERED = """RESPONSE: First line of support.
+Second line, still the response.
+
+A new paragraph.
+URGENCY: High
+EMOTIONS: sad, tired
+APPROACH: validation
+NEEDS: emotional_support"""
+
+JSON_ANSWER = json.dumps({"emotions": ["anxious", "worried"], "urgency": "medium", "needs": "anxiety_management",
+                          "approach": "grounding_techniques", "response": "Let's breathe.\nYou're safe."})
+
+def stream(text, size, mode=None):
+    parser = ResponseParser(mode=mode)
+    tokens = []
+    for i in range(0, len(text), size):
+        tokens.extend(parser.feed(text[i:i + size]))
+    tokens.extend(parser.close())
+    return parser, "".join(tokens)
+
+class TestResponseParser:
+    """Test the incremental structured-response parser"""
+
+    @pytest.mark.parametrize("size", [1, 3, 7, 1000])
+    def test_any_order_and_multiline_response(self, size):
+        parser, streamed = stream(REORDERED, size)
+
+        result = parser.result()
+        assert result['response'] == "First line of support.\nSecond line, still the response.\n\nA new paragraph."
+        assert streamed == result['response']
+        assert result['urgency'] == 'high' and result['emotions'] == 'sad, tired'
+        assert result['needs'] == 'emotional_support' and 'parse_errors' not in result
+
+    def test_default_answer_parses_cleanly(self):
+        result = parse_response(DEFAULT_FAKE_RESPONSE)
+
+        assert result['emotions'] == "anxious, worried" and result['ai_generated'] is True
+        assert 'parse_errors' not in result
+
+    def test_indented_and_markdown_tags(self):
+        result = parse_response("   **EMOTIONS:** calm\n  URGENCY: [low]\n- NEEDS: rest\nAPPROACH: listening\n"
+                                "**RESPONSE**: Glad to hear it.")
+
+        assert result['emotions'] == 'calm' and result['urgency'] == 'low'
+        assert result['needs'] == 'rest' and result['response'] == 'Glad to hear it.'
+
+    def test_tag_words_inside_the_response_are_text(self):
+        result = parse_response("EMOTIONS: calm\nURGENCY: low\nNEEDS: rest\nAPPROACH: listening\n"
+                                "RESPONSE: Your needs matter.\nEMOTIONS like these pass.")
+
+        assert result['response'] == "Your needs matter.\nEMOTIONS like these pass."
+
+    @pytest.mark.parametrize("size", [1, 5, 1000])
+    def test_json_mode(self, size):
+        parser, streamed = stream("```json\n" + JSON_ANSWER + "\n```", size)
+
+        result = parser.result()
+        assert result['emotions'] == "anxious, worried"
+        assert result['response'] == "Let's breathe.\nYou're safe." == streamed
+        assert parser.mode == 'json' and 'parse_errors' not in result
+
+    def test_failures_are_reported(self):
+        metrics = ParseMetrics()
+
+        bad_urgency = parse_response("EMOTIONS: sad\nURGENCY: soonish\nRESPONSE: ok", metrics)
+        bad_types = parse_response('{"emotions": 3, "urgency": "low", "needs": "", "approach": "x", "response": "y"}',
+                                   metrics)
+        bad_json = parse_response('{"emotions": "sad", ', metrics)
+        duplicate = parse_response(DEFAULT_FAKE_RESPONSE + "\nURGENCY: high", metrics)
+
+        assert bad_urgency['urgency'] == 'medium'
+        assert set(bad_urgency['parse_errors']) == {"invalid_value:urgency", "missing_field:needs",
+                                                     "missing_field:approach"}
+        assert set(bad_types['parse_errors']) == {"invalid_type:emotions", "empty_field:needs"}
+        assert bad_types['emotions'] == 'concerned'
+        assert bad_json['parse_errors'] == ["invalid_json"]
+        assert duplicate['urgency'] == 'medium' and duplicate['parse_errors'] == ["duplicate_field:urgency"]
+
+        stats = metrics.stats()
+        assert stats['responses'] == 4 and stats['failed'] == 4 and stats['failure_rate'] == 1.0
+        assert stats['modes'] == {'tagged': 2, 'json': 2}
+        assert stats['errors']['invalid_json'] == 1
+
+    def test_is_complete(self):
+        assert is_complete(parse_response("EMOTIONS: sad\nURGENCY: low"))
+        assert not is_complete(parse_response("EMOTIONS: sad\nURGENCY: someday"))
+        assert not is_complete(parse_response("{oops"))
+
+    @pytest.mark.parametrize("size", [1, 6, 1000])
+    def test_expected_json_mode_with_leading_prose(self, size):
+        parser, streamed = stream("Sure! Here is the analysis:\n" + JSON_ANSWER, size, mode='json')
+
+        result = parser.result()
+        assert streamed == "Let's breathe.\nYou're safe."
+        assert result['emotions'] == "anxious, worried" and 'parse_errors' not in result
+        assert parser.mode == 'json'
+
+        # Without an expected mode the prose makes it look tagged; finding no tag, it is read as JSON
+        sniffed, streamed = stream("Sure! " + JSON_ANSWER, size)
+        assert sniffed.mode == 'json' and 'parse_errors' not in sniffed.result()
+        assert streamed == "Let's breathe.\nYou're safe."
+
+        with pytest.raises(ValueError):
+            ResponseParser(mode='xml')
+
+    @pytest.mark.parametrize("size", [1, 6, 1000])
+    def test_tagged_answer_in_json_mode(self, size):
+        parser, streamed = stream("Here you go:\n" + REORDERED, size, mode='json')
+
+        result = parser.result()
+        assert parser.mode == 'tagged' and 'parse_errors' not in result
+        assert result['urgency'] == 'high' and result['emotions'] == 'sad, tired'
+        assert streamed == result['response'].strip()
+        assert result['response'].startswith("First line of support.")
+
+    @pytest.mark.parametrize("size", [1, 6, 1000])
+    def test_json_answer_in_tagged_mode(self, size):
+        parser, streamed = stream("```json\n" + JSON_ANSWER + "\n```", size, mode='tagged')
+
+        result = parser.result()
+        assert parser.mode == 'json' and 'parse_errors' not in result
+        assert result['needs'] == 'anxiety_management'
+        assert streamed == "Let's breathe.\nYou're safe."
+
+    def test_neither_format_is_invalid(self):
+        assert "invalid_json" in parse_response("no idea, sorry", mode='json')['parse_errors']
+        tagged = parse_response("no idea, sorry", mode='tagged')['parse_errors']
+        assert 'missing_field:emotions' in tagged
+
+class TestParserIntegration:
+    """Test the parser inside GeminiAIIntegration"""
+
+    @pytest.mark.asyncio
+    async def test_json_format_prompt_and_metrics(self):
+        model = FakeGenerativeModel(JSON_ANSWER)
+        integration = GeminiAIIntegration(model=model, response_format='json')
+
+        result = await integration.analyze_with_ai("work is stressing me out")
+
+        assert '"emotions"' in model.prompts[0] and 'EMOTIONS:' not in model.prompts[0]
+        assert result['needs'] == 'anxiety_management'
+        assert integration.stats()['parsing']['modes'] == {'json': 1}
+
+    @pytest.mark.asyncio
+    async def test_json_format_accepts_a_tagged_answer(self):
+        integration = GeminiAIIntegration(model=FakeGenerativeModel(DEFAULT_FAKE_RESPONSE), response_format='json')
+
+        result = await integration.analyze_with_ai("work is stressing me out")
+
+        assert result['emotions'] == "anxious, worried" and 'parse_errors' not in result
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            GeminiAIIntegration(response_format='xml')
+
+    @pytest.mark.asyncio
+    async def test_stream_reordered_answer(self):
+        integration = GeminiAIIntegration(model=FakeGenerativeModel(REORDERED, stream_chunk_size=4))
+
+        events = [e async for e in integration.stream_analysis("work is stressing me out")]
+
+        assert events[0]['type'] == 'header'
+        streamed = "".join(e['text'] for e in events if e['type'] == 'token')
+        assert streamed == events[-1]['analysis']['response'].strip()
+        assert events[-1]['analysis']['urgency'] == 'high'
+        assert integration.stats()['parsing']['failed'] == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_json_answer(self):
+        integration = GeminiAIIntegration(model=FakeGenerativeModel(JSON_ANSWER, stream_chunk_size=8),
+                                          response_format='json')
+
+        events = [e async for e in integration.stream_analysis("work is stressing me out")]
+
+        assert [e['type'] for e in events] == ['header', 'token', 'done']
+        assert events[0]['analysis']['emotions'] == "anxious, worried"
+        assert events[1]['text'] == "Let's breathe.\nYou're safe."
@@ -0,0 +1,86 @@
+import pytest
+from mental_health_bot.router import ConfidenceRouter, urgencies_agree
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.testing import FakeGenerativeModel
+
+@pytest.fixture
+def integration():
+    return GeminiAIIntegration(model=FakeGenerativeModel(), router=ConfidenceRouter())
+
+class TestConfidenceRouter:
+    """Test routing between the rule-based analyzers and the LLM"""
+
+    def test_confident_rules_answer_locally(self, integration):
+        router = integration.router
+
+        benign = router.route("I had a good day today", simulate=integration._simulated_ai_analysis)
+        anxious = router.route("I feel so anxious", simulate=integration._simulated_ai_analysis)
+
+        assert benign['routed_by'] == 'rules' and benign['urgency'] == 'low'
+        assert anxious['routed_by'] == 'rules' and anxious['needs'] == 'anxiety_management'
+        assert anxious['confidence'] >= router.threshold
+
+    @pytest.mark.parametrize("text", [
+        "I cant stop crying and I hate myself",
+        "I want to end it all",
+        "hmm",
+        "I'm not sad anymore, honestly I feel happy today",
+        "I'm not anxious at all, everything is calm",
+        "I don't feel depressed, just overwhelmed",
+    ])
+    def test_uncertain_messages_escalate(self, integration, text):
+        assert integration.router.route(text, simulate=integration._simulated_ai_analysis) is None
+
+    def test_disagreement_is_counted(self, integration):
+        integration.router.route("I want to end it all", simulate=integration._simulated_ai_analysis)
+
+        assert integration.router.stats()['disagreements'] == 1
+
+    def test_threshold_controls_escalation(self):
+        strict = GeminiAIIntegration(model=FakeGenerativeModel(), router=ConfidenceRouter(threshold=0.95))
+
+        assert strict.router.route("I feel so anxious", simulate=strict._simulated_ai_analysis) is None
+
+    def test_urgencies_agree(self):
+        assert urgencies_agree('low', 'medium')
+        assert urgencies_agree('high', 'high')
+        assert not urgencies_agree('high', 'medium')
+        assert not urgencies_agree('low', 'high')
+
+    @pytest.mark.asyncio
+    async def test_only_unrouted_messages_reach_the_llm(self, integration):
+        model = integration.model
+
+        local = await integration.analyze_with_ai("I had a good day today")
+        remote = await integration.analyze_with_ai("hmm")
+        cached = await integration.analyze_with_ai("hmm")
+
+        assert local['routed_by'] == 'rules'
+        assert remote['ai_generated'] is True and cached['cached'] is True
+        assert model.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_stats_report_hit_rates_and_latency(self, integration):
+        for text in ("I had a good day today", "I feel so anxious", "hmm", "hmm"):
+            await integration.analyze_with_ai(text)
+
+        routing = integration.stats()['routing']
+
+        assert routing['messages'] == 4
+        assert routing['tiers']['rules'] == pytest.approx(
+            {"calls": 3, "hits": 2, "hit_rate": 0.6667, "share": 0.5,
+             "mean_ms": routing['tiers']['rules']['mean_ms'], "max_ms": routing['tiers']['rules']['max_ms']})
+        assert routing['tiers']['llm']['hits'] == 1 and routing['tiers']['llm']['share'] == 0.25
+        assert routing['tiers']['cache']['hits'] == 1
+        assert all(tier['mean_ms'] >= 0 for tier in routing['tiers'].values())
+
+    @pytest.mark.asyncio
+    async def test_stream_uses_router(self, integration):
+        events = [e async for e in integration.stream_analysis("I feel so anxious")]
+
+        assert [e['type'] for e in events] == ['header', 'token', 'done']
+        assert events[-1]['analysis']['routed_by'] == 'rules'
+        assert integration.model.calls == 0
+
+    def test_router_is_opt_in(self):
+        assert GeminiAIIntegration(model=FakeGenerativeModel()).stats()['routing'] is None
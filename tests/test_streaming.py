@@ -0,0 +1,113 @@
+import time
+import pytest
+from mental_health_bot.llm_client import AsyncLLMClient
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.ai_orchestrator import ParallelAgentsSystem
+from mental_health_bot.event_loop import BackgroundEventLoop
+from mental_health_bot.circuit_breaker import CircuitBreaker
+from mental_health_bot.testing import FakeGenerativeModel, DEFAULT_FAKE_RESPONSE
+
+MULTILINE_RESPONSE = DEFAULT_FAKE_RESPONSE + "\nYou are not alone in this."
+
+class BrokenStreamModel(FakeGenerativeModel):
+    def _stream(self, prompt):
+        yield from list(super()._stream(prompt))[:6]
+        raise ConnectionError("stream reset")
+
+async def collect(agen):
+    return [event async for event in agen]
+
+class TestStreaming:
+    """Test token streaming from the LLM client to the agents"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_async_api", [False, True])
+    async def test_client_streams_chunks(self, use_async_api):
+        client = AsyncLLMClient(FakeGenerativeModel(stream_chunk_size=7), use_async_api=use_async_api)
+
+        chunks = [chunk async for chunk in client.stream("hi")]
+
+        assert len(chunks) > 1
+        assert "".join(chunks) == DEFAULT_FAKE_RESPONSE
+        assert client.stats()['completed'] == 1 and client.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_header_then_tokens_then_done(self):
+        integration = GeminiAIIntegration(model=FakeGenerativeModel(MULTILINE_RESPONSE, stream_chunk_size=5))
+
+        events = await collect(integration.stream_analysis("work is stressing me out"))
+
+        types = [event['type'] for event in events]
+        assert types[0] == 'header' and types[-1] == 'done' and types.count('header') == 1
+        assert events[0]['analysis']['emotions'] == "anxious, worried"
+        streamed = "".join(event['text'] for event in events if event['type'] == 'token')
+        assert streamed.strip() == events[-1]['analysis']['response']
+        assert events[-1]['analysis']['response'].endswith("You are not alone in this.")
+
+        cached = await collect(integration.stream_analysis("work is stressing me out"))
+        assert cached[-1]['analysis']['cached'] is True
+        assert integration.model.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_crisis_never_streams_llm_text(self):
+        model = FakeGenerativeModel()
+        system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(model=model))
+
+        events = await collect(system.stream_message("I want to die", {}))
+
+        tokens = [event['text'] for event in events if event['type'] == 'token']
+        result = events[-1]['result']
+        assert tokens == [result['agent_results']['crisis_detector']['coping_strategy']]
+        assert result['final_response']['primary_response'] == tokens[0]
+        assert model.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_message_matches_process_message_shape(self):
+        system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(model=FakeGenerativeModel()))
+
+        events = await collect(system.stream_message("I feel anxious about work", {}))
+        expected = await system.process_message("I feel anxious about work", {})
+
+        result = events[-1]['result']
+        assert set(result) == set(expected)
+        assert result['agents_used'] == 4
+        assert result['final_response']['primary_response'] == expected['final_response']['primary_response']
+
+    @pytest.mark.asyncio
+    async def test_interrupted_stream_keeps_partial_text(self):
+        integration = GeminiAIIntegration(model=BrokenStreamModel(stream_chunk_size=20), use_cache=False)
+
+        events = await collect(integration.stream_analysis("work is stressing me out"))
+
+        analysis = events[-1]['analysis']
+        assert analysis['stream_interrupted'] is True
+        assert analysis['response'] == "".join(e['text'] for e in events if e['type'] == 'token').strip()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("latency, chunk_latency", [(1.5, 0.0), (0.0, 0.5)])
+    async def test_stalled_stream_respects_the_emotion_budget(self, latency, chunk_latency):
+        model = FakeGenerativeModel(latency=latency, chunk_latency=chunk_latency, stream_chunk_size=40)
+        breaker = CircuitBreaker(slow_call_ms=100.0, min_calls=1)
+        system = ParallelAgentsSystem(agent_timeouts={'emotion_analyzer': 0.2}, ai_integration=GeminiAIIntegration(
+            model=model, use_cache=False, circuit_breaker=breaker))
+
+        start = time.perf_counter()
+        events = await collect(system.stream_message("work is stressing me out", {}))
+        elapsed = time.perf_counter() - start
+
+        result = events[-1]['result']
+        emotion = result['agent_results']['emotion_analyzer']
+        assert elapsed < 0.6
+        assert emotion['timed_out'] is True
+        assert "".join(e['text'] for e in events if e['type'] == 'token').endswith(emotion['agent_response'])
+        assert result['final_response']['primary_response'] == emotion['agent_response']
+        assert breaker.state == 'open'
+
+    def test_background_loop_iterates_async_generator(self):
+        system = ParallelAgentsSystem(ai_integration=GeminiAIIntegration(model=FakeGenerativeModel()))
+
+        with BackgroundEventLoop() as background:
+            events = list(background.iterate(system.stream_message("I feel anxious", {})))
+
+            assert events[-1]['type'] == 'done'
+            assert background.stats()['failed'] == 0
@@ -0,0 +1,40 @@
+import pytest
+from mental_health_bot.catalog import get_response_catalog, thaw
+from mental_health_bot.templates import TemplateRenderer, compile_template
+from mental_health_bot.agents.support_planner import SupportPlanningAgent
+from mental_health_bot.agents.resource_matcher import ResourceMatchingAgent
+from mental_health_bot.tools import MentalHealthTools
+
+class TestResponseCatalog:
+    """Test the frozen response catalog and the template renderer"""
+
+    def test_catalog_is_immutable_and_shared(self):
+        catalog = get_response_catalog()
+
+        with pytest.raises(TypeError):
+            catalog['resources']['crisis']['Emergency'] = "changed"
+        assert isinstance(catalog['support_plan']['immediate_actions'], tuple)
+
+        plans = [SupportPlanningAgent().fallback_result("hi", {})['support_plan'] for _ in range(2)]
+        assert plans[0] is plans[1] is catalog['support_plan']
+        assert ResourceMatchingAgent().fallback_result("hi", {})['matched_resources'] is catalog['resources']
+        assert thaw(catalog['support_plan'])['immediate_actions'][0] == "Practice grounding techniques"
+
+    def test_coping_strategy_priority(self):
+        tools = MentalHealthTools()
+        strategies = get_response_catalog()['coping_strategies']
+
+        assert tools.generate_coping_strategy({'detected_issues': ['panic', 'suicidal']}) is strategies['suicidal']
+        assert tools.generate_coping_strategy({'detected_issues': ['self_harm']}) is strategies['default']
+
+    def test_renderer_compiles_each_template_once(self):
+        renderer = TemplateRenderer({'greeting': "Hi {name}, try {strategy}."}, defaults={'strategy': "breathing"})
+
+        assert renderer.render('greeting', name="Sam") == "Hi Sam, try breathing."
+        assert renderer.render('greeting', name="Alex", strategy="a walk") == "Hi Alex, try a walk."
+        assert renderer.stats() == {"templates": 1, "compiled": 1, "renders": 2}
+
+        with pytest.raises(KeyError):
+            TemplateRenderer({'t': "{missing}"}).render('t')
+        with pytest.raises(ValueError):
+            compile_template("{value:.2f}")
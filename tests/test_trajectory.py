@@ -0,0 +1,82 @@
+import random
+import pytest
+from mental_health_bot.trajectory import RiskTrajectoryTracker
+from mental_health_bot.ai_orchestrator import MentalHealthOrchestrator
+from mental_health_bot.agents.emotion_analyzer import GeminiAIIntegration
+from mental_health_bot.memory import ConversationMemory
+from mental_health_bot.testing import FakeGenerativeModel
+
+class TestRiskTrajectory:
+    """Test the incremental per-user risk aggregates"""
+
+    def test_aggregates_match_full_recomputation(self):
+        tracker = RiskTrajectoryTracker(fast_alpha=0.4, slow_alpha=0.1, window=7)
+        rng = random.Random(2)
+        risks = [rng.random() for _ in range(300)]
+
+        for turn, risk in enumerate(risks):
+            snapshot = tracker.update('u1', risk, risk / 2)
+
+            fast = slow = risks[0]
+            for value in risks[1:turn + 1]:
+                fast += 0.4 * (value - fast)
+                slow += 0.1 * (value - slow)
+            assert snapshot['risk_ewma'] == pytest.approx(fast, abs=1e-4)
+            assert snapshot['risk_baseline'] == pytest.approx(slow, abs=1e-4)
+            assert snapshot['window_max_risk'] == pytest.approx(max(risks[max(0, turn - 6):turn + 1]), abs=1e-4)
+            assert snapshot['turns'] == turn + 1
+
+    def test_window_stays_bounded(self):
+        tracker = RiskTrajectoryTracker(window=5)
+        for i in range(1000):
+            tracker.update('u1', 1.0 - i / 1000.0)
+
+        assert len(tracker._trajectories['u1']._window) <= 5
+
+    def test_gradual_rise_is_flagged(self):
+        tracker = RiskTrajectoryTracker()
+        for step in range(10):
+            snapshot = tracker.update('rising', 0.1 + 0.08 * step)
+            tracker.update('steady', 0.5)
+            tracker.update('noisy', 0.3 if step % 2 else 0.5)
+
+        assert snapshot['escalating'] is True and snapshot['risk_trend'] > 0
+        assert tracker.escalating_users() == ['rising']
+        assert tracker.get('steady')['escalating'] is False
+
+        for _ in range(10):
+            tracker.update('rising', 0.1)
+        assert tracker.get('rising')['escalating'] is False
+        assert tracker.escalating_users() == []
+
+    def test_unknown_users_and_eviction(self):
+        tracker = RiskTrajectoryTracker(max_users=2)
+        assert tracker.get('nobody')['turns'] == 0
+
+        for key in ('a', 'b', 'c'):
+            tracker.update(key, 0.5)
+
+        assert tracker.stats()['users'] == 2 and tracker.stats()['evicted'] == 1
+        assert tracker.get('a')['turns'] == 0
+        tracker.reset('c')
+        assert tracker.get('c')['turns'] == 0
+
+    def test_invalid_alphas(self):
+        with pytest.raises(ValueError):
+            RiskTrajectoryTracker(fast_alpha=0.1, slow_alpha=0.5)
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_reports_trajectory(self):
+        orchestrator = MentalHealthOrchestrator(
+            ai_integration=GeminiAIIntegration(model=FakeGenerativeModel()), memory=ConversationMemory())
+
+        first = await orchestrator.process_user_message("I feel a bit tired", user_id='u1')
+        second = await orchestrator.process_user_message("I want to die", user_id='u1')
+        anonymous = await orchestrator.process_user_message("hello")
+
+        assert first['risk_trajectory']['turns'] == 1
+        assert second['risk_trajectory']['turns'] == 2
+        assert second['risk_trajectory']['last_crisis_level'] == 'high'
+        assert second['risk_trajectory']['risk_trend'] > 0
+        assert anonymous['risk_trajectory'] is None
+        assert anonymous['system_metrics']['risk_escalating'] is False
@@ -0,0 +1,71 @@
+import pytest
+from mental_health_bot import config
+from mental_health_bot.ai_orchestrator import ParallelAgentsSystem, MentalHealthOrchestrator
+from mental_health_bot.tools import MentalHealthTools
+from mental_health_bot.workers import WorkerPool
+
+MESSAGES = ["I want to die", "panic attack, heart racing!!", "had an okay day", "feeling hopeless", ""] * 3
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = WorkerPool(workers=2)
+    assert pool.warm() >= 1
+    yield pool
+    pool.close()
+
+class TestProcessExecutionMode:
+    """Test the worker-pool execution mode"""
+
+    @pytest.mark.asyncio
+    async def test_pool_matches_inline_assessment(self, pool):
+        tools = MentalHealthTools()
+
+        assessed = await pool.assess_batch(MESSAGES)
+
+        assert [crisis for _, crisis in assessed] == [tools.crisis_detector(m) for m in MESSAGES]
+        assert [features.text for features, _ in assessed] == MESSAGES
+
+    @pytest.mark.asyncio
+    async def test_only_large_batches_use_pool(self, pool):
+        system = ParallelAgentsSystem(worker_pool=pool, pool_min_batch=4)
+        tasks_before = pool.tasks
+
+        result = await system.process_message("I want to die", {})
+        small = await system.assess_batch(MESSAGES[:3])
+        assert system.execution_mode == 'process'
+        assert pool.tasks == tasks_before
+        assert result['final_response']['crisis_level'] == 'high'
+
+        large = await system.assess_batch(MESSAGES)
+        assert pool.tasks > tasks_before
+        assert [crisis for _, crisis in large[:3]] == [crisis for _, crisis in small]
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_process_many_in_order(self):
+        orchestrator = MentalHealthOrchestrator(execution_mode='process', workers=2)
+        orchestrator.parallel_agents.pool_min_batch = 1
+        try:
+            results = [r async for r in orchestrator.process_many(MESSAGES, batch_size=4)]
+        finally:
+            orchestrator.parallel_agents.close()
+
+        tools = MentalHealthTools()
+        assert [r['crisis_assessment'] for r in results] == [tools.crisis_detector(m) for m in MESSAGES]
+
+    def test_mode_comes_from_config(self, monkeypatch):
+        monkeypatch.setattr(config, 'EXECUTION_MODE', 'process')
+        system = ParallelAgentsSystem()
+        assert system.worker_pool is not None
+        system.close()
+
+    def test_created_pool_is_warmed(self, monkeypatch):
+        warmed = []
+        monkeypatch.setattr(WorkerPool, 'warm', lambda pool: warmed.append(pool) or pool.workers)
+
+        system = ParallelAgentsSystem(execution_mode='process', workers=1)
+        system.close()
+
+        assert warmed == [system.worker_pool]
+
+        with pytest.raises(ValueError):
+            ParallelAgentsSystem(execution_mode='threads')